@@ -8,6 +8,9 @@ class APIManager extends StatefulWidget {
 }
 
 class _APIManagerState extends State<APIManager> {
+  // /recommend 가 돌려준 참조 논문 집합 토큰 (universal-extraction 에 전달)
+  String? referenceSetToken;
+
 Future<List<PaperInfo>> fetchRecommendedPapers(String prompt) async {
     final url = Uri.parse('http://${SERVER_ADDR}/recommend');
 
@@ -20,6 +23,7 @@ Future<List<PaperInfo>> fetchRecommendedPapers(String prompt) async {
 
       if (response.statusCode == 200) {
         final responseJson = jsonDecode(response.body);
+        referenceSetToken = responseJson['reference_set'];
         final List<dynamic> fileNames = responseJson['files'];
         final List<PaperInfo> papers = fileNames.map((file) {
           final Map<String, dynamic> f = file as Map<String, dynamic>;  // 명시적 캐스팅
@@ -113,6 +117,9 @@ Future<List<PaperInfo>> fetchRecommendedPapers(String prompt) async {
       );
 
       request.fields['schema'] = json.encode(schema);
+      if (referenceSetToken != null) {
+        request.fields['reference_set'] = referenceSetToken!;
+      }
 
       var response = await request.send();
       var responseBody = await response.stream.bytesToString();
@@ -153,9 +160,10 @@ Future<List<PaperInfo>> fetchRecommendedPapers(String prompt) async {
       if (response.statusCode == 200) {
         final jsonRes = json.decode(responseBody);
         final filename = jsonRes["html_file"] ?? "";
+        final docId = jsonRes["doc_id"] ?? "";
 
-        // ✅ 업로드 성공 후 perplexity 후처리 API 호출
-        final perplexityUri = Uri.parse("http://${SERVER_ADDR}/run-perplexity");//$filenameWithoutExt");
+        // ✅ 업로드 성공 후 perplexity 후처리 API 호출 (문서 ID 기준)
+        final perplexityUri = Uri.parse("http://${SERVER_ADDR}/run-perplexity/$docId");
         final perplexityRes = await http.get(perplexityUri);
 
         if (perplexityRes.statusCode == 200) {
@@ -1,11 +1,13 @@
-import pandas as pd
-import pymysql
-import json
-import os
-from openai import OpenAI
+from students_ai_backend.config import config
+from students_ai_backend import http_client
+from students_ai_backend.response_parser import parse_llm_json
+from students_ai_backend.paper_index import get_paper_index, load_catalog
+from students_ai_backend.condition_parser import ConditionResolver
+from students_ai_backend.paper_store import get_store
  
 
-UPSTAGE_API_KEY = os.getenv("UPSTAGE_API_KEY")
+UPSTAGE_API_KEY = config.upstage_api_key
+SOLAR_BASE_URL = config.upstage_base_url
 
 # 1. 프롬프트에서 조건 추출
 def extract_conditions(prompt):
@@ -17,45 +19,65 @@ def extract_conditions(prompt):
 
     프롬프트: "{prompt}"
     """
-    client = OpenAI(
-        api_key=UPSTAGE_API_KEY,
-        base_url="https://api.upstage.ai/v1"
-    )
-    
-    stream = client.chat.completions.create(
-        model="solar-pro",
-        messages=[
-            {
-                "role": "user",
-                "content": system_prompt
-            }
-        ],
-        stream=True,
-    )
+    return solar_chat(system_prompt)
+
+
+# Solar 호출 (stream 으로 받은 응답을 이어붙여 반환)
+def solar_chat(content):
+    client = http_client.get_openai_client(UPSTAGE_API_KEY, SOLAR_BASE_URL)
     
     full_response = ""
 
-    for chunk in stream:
-        if chunk.choices[0].delta.content is not None:
-            full_response += chunk.choices[0].delta.content
+    with http_client.circuit(SOLAR_BASE_URL):
+        stream = client.chat.completions.create(
+            model="solar-pro",
+            messages=[
+                {
+                    "role": "user",
+                    "content": content
+                }
+            ],
+            stream=True,
+        )
+
+        for chunk in stream:
+            if chunk.choices[0].delta.content is not None:
+                full_response += chunk.choices[0].delta.content
     return(full_response)
 
 
-# 2. 논문 후보 필터링
-def find_top_papers(prompt):
-    conn = pymysql.connect(host='localhost', user='root', password='1234', db='papers')
-    conditions = extract_conditions(prompt)
-    parsed = json.loads(conditions)
-    query = "SELECT * FROM papers WHERE 1=1"
-    if "journal_name" in parsed:
-        query += f" AND publications = '{parsed['journal_name']}'"
-    if "min_citation" in parsed:
-        query += f" AND citations >= {parsed['min_citation']}"
-        
-    df = pd.read_sql(query, conn)
-
-    # 'date' 컬럼 기준으로 내림차순 정렬 (오름차순 정렬하려면 ascending=True로 설정)
-    df_sorted = df.sort_values(by='date', ascending=False)
-
-    # 상위 3개 데이터 반환
-    return df_sorted.head(3).to_dict(orient="records")
+# LLM 이 돌려주는 조건의 허용 형식 (숫자를 문자열로 주는 경우 포함)
+CONDITION_TYPES = {
+    "min_year": (int, float, str),
+    "max_year": (int, float, str),
+    "journal_name": str,
+    "keywords": (list, str),
+    "min_citation": (int, float, str),
+}
+
+
+# 간단한 프롬프트는 규칙 기반으로 처리하고 (프롬프트 → 조건 LRU 캐시 포함),
+# 규칙으로 해석할 수 없을 때만 LLM 으로 조건 추출
+condition_resolver = ConditionResolver(
+    lambda prompt: parse_llm_json(extract_conditions(prompt), types=CONDITION_TYPES, reprompt=solar_chat),
+    venues_loader=lambda: [row["publications"] for row in load_catalog() if row["publications"]]
+)
+
+
+# 2. 논문 후보 필터링 + 의미 기반 순위화
+def find_top_papers(prompt, top_k=3):
+    parsed = condition_resolver.resolve(prompt)
+
+    # 구조화 필터 적용 결과 ('date' 내림차순, 점수가 같거나 인덱스를 쓸 수 없을 때의 기본 순서)
+    candidates = get_store().find_papers(parsed)
+
+    # 프롬프트 + 추출된 키워드로 논문 임베딩 인덱스에서 유사도 순위화
+    keywords = parsed.get("keywords") or []
+    if isinstance(keywords, str):
+        keywords = [keywords]
+    semantic_query = " ".join([prompt] + [str(k) for k in keywords])
+    try:
+        return get_paper_index().rank(semantic_query, candidates, top_k=top_k)
+    except Exception as e:
+        print("⚠️ 논문 인덱스 사용 불가, 최신순으로 반환:", e)
+        return candidates[:top_k]
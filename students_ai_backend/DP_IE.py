@@ -1,42 +1,58 @@
 # Flask 및 필요 라이브러리 임포트
 import os
-import requests
+import re
 import json
-from dotenv import load_dotenv
-from openai import OpenAI
+import time
 import base64
-from bs4 import BeautifulSoup
-
-# .env 파일에서 API Key 로드
-load_dotenv()
-API_KEY = os.getenv("UPSTAGE_API_KEY")
-API_URL = "https://api.upstage.ai/v1/document-digitization" 
-
-# 디렉토리 경로 설정
-PAPER_DIR = "papers"
-INPUT_DIR = "input_pdfs"
-OUTPUT_DIR = "output_html"
-PREVIEW_DATA_DIR = "output_data"
-STATIC_PDF_DIR = os.path.join("static", "pdfs")
-HIGHLIGHT_DIR = "data"
-
-# 필요한 디렉토리들이 존재하지 않으면 생성
-os.makedirs(INPUT_DIR, exist_ok=True)
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-os.makedirs(PREVIEW_DATA_DIR, exist_ok=True)
-os.makedirs(STATIC_PDF_DIR, exist_ok=True)
-os.makedirs(HIGHLIGHT_DIR, exist_ok=True)
+import mmap
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from students_ai_backend.config import config, env, env_flag
+from students_ai_backend.html_text import html_texts
+from students_ai_backend.extraction_cache import extraction_cache
+from students_ai_backend.preview_store import preview_store
+from students_ai_backend import http_client
+from students_ai_backend import workspace
+from students_ai_backend import element_index
+from students_ai_backend import local_parse
+from students_ai_backend import metrics
+
+API_KEY = config.upstage_api_key
+UPSTAGE_BASE_URL = config.upstage_base_url
+API_URL = f"{UPSTAGE_BASE_URL}/document-digitization"
+IE_API_URL = f"{UPSTAGE_BASE_URL}/information-extraction/chat/completions"
+
+# base64 스트리밍 인코딩 단위 (3의 배수여야 청크별 인코딩 결과를 그대로 이어붙일 수 있음)
+BASE64_CHUNK_SIZE = 3 * 64 * 1024
+
+# 파싱 직후 요소 임베딩 인덱스를 미리 만들어 둘지 여부
+ELEMENT_INDEX_ON_PARSE = env_flag("ELEMENT_INDEX_ON_PARSE", "1")
+
+# 텍스트 레이어가 있는 PDF 는 로컬에서 파싱할지 여부 (스캔 페이지만 document-parse 사용)
+LOCAL_PARSE = env_flag("LOCAL_PARSE", "1")
+
+# 긴 문서의 원격 파싱: 청크당 페이지 수 / 동시 청크 수 / 실패한 청크 재시도 횟수
+PARSE_CHUNK_PAGES = int(env("PARSE_CHUNK_PAGES", 10))
+PARSE_MAX_WORKERS = int(env("PARSE_MAX_WORKERS", 4))
+PARSE_CHUNK_RETRIES = int(env("PARSE_CHUNK_RETRIES", 2))
+
+# Information Extraction 동시 호출 수 / 호출당 타임아웃(초)
+EXTRACTION_MAX_WORKERS = int(env("EXTRACTION_MAX_WORKERS", 4))
+EXTRACTION_TIMEOUT = float(env("EXTRACTION_TIMEOUT", 120))
+
+# 디렉토리 경로 설정 (import 시점에는 만들지 않고 쓸 때 생성)
+PAPER_DIR = config.paper_dir
+INPUT_DIR = config.input_dir
+PREVIEW_DATA_DIR = config.preview_data_dir
+STATIC_PDF_DIR = config.static_pdf_dir
 
 # elements 항목으로부터 문장과 ID 매핑, ID와 좌표 매핑을 추출
+# (html 텍스트 추출은 BeautifulSoup 트리 대신 html_text 로 요소들을 묶어서 처리)
 def extract_text_and_id_maps(elements):
     text_to_id = {}
     id_to_coord = {}
-    for el in elements:
-        html = el.get("content", {}).get("html", "")
-        if not html:
-            continue
-        soup = BeautifulSoup(html, "html.parser")
-        text = soup.get_text(separator=' ', strip=True)
+    with_html = [el for el in elements if el.get("content", {}).get("html", "")]
+    texts = html_texts([el["content"]["html"] for el in with_html])
+    for el, text in zip(with_html, texts):
         if not text:
             continue
         eid = el.get("id")
@@ -47,117 +63,249 @@ def extract_text_and_id_maps(elements):
         }
     return text_to_id, id_to_coord
 
-def process_pdf(file_path):
+_parse_pool = ThreadPoolExecutor(max_workers=PARSE_MAX_WORKERS, thread_name_prefix="parse")
+
+class DocumentParseError(Exception):
+    pass
+
+# Upstage document-parse 호출 후 elements 반환 (document 는 파일 객체 또는 바이트)
+def request_document_parse(filename, document):
+    files = {
+        'document': (filename, document, 'application/pdf')
+    }
+    data = {
+        'ocr': 'force',
+        'base64_encoding': "['table']",
+        'model': 'document-parse'
+    }
+    headers = {'Authorization': f'Bearer {API_KEY}'}
+
+    response = http_client.post(API_URL, headers=headers, files=files, data=data)
+    if response.status_code != 200:
+        raise DocumentParseError(response.text)
+    return response.json().get("elements", [])
+
+# 지정한 페이지들만 document-parse 로 파싱 (페이지 번호는 원본 기준으로 되돌림)
+def parse_chunk(file_path, pages):
+    base = os.path.splitext(os.path.basename(file_path))[0]
+    document = local_parse.page_subset(file_path, pages)
+    with metrics.span("document_parse_chunk"):
+        elements = request_document_parse(f'{base}_p{pages[0]}-{pages[-1]}.pdf', document)
+    for el in elements:
+        el["page"] = pages[el["page"] - 1]
+    return elements
+
+# 페이지들을 PARSE_CHUNK_PAGES 씩 나눠 동시에 파싱하고 페이지 순서대로 합침
+# 실패한 청크만 다시 시도 (성공한 청크 결과는 유지)
+def parse_pages(file_path, pages):
+    chunks = [pages[i:i + PARSE_CHUNK_PAGES] for i in range(0, len(pages), PARSE_CHUNK_PAGES)]
+    results = {}
+    pending = list(range(len(chunks)))
+    for attempt in range(PARSE_CHUNK_RETRIES + 1):
+        if attempt > 0:
+            print(f"⚠️ 파싱 실패한 청크 {len(pending)}/{len(chunks)}개 재시도 ({attempt}/{PARSE_CHUNK_RETRIES})")
+            time.sleep(http_client.backoff_delay(attempt))
+        futures = {_parse_pool.submit(parse_chunk, file_path, chunks[i]): i for i in pending}
+        failed = []
+        for future in as_completed(futures):
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:
+                failed.append(futures[future])
+                error = e
+        if not failed:
+            break
+        metrics.inc("parse_chunk_failures", len(failed), help="실패한 document-parse 페이지 청크 수")
+        pending = sorted(failed)
+    else:
+        raise DocumentParseError(f"{len(pending)}개 페이지 청크 파싱 실패: {error}")
+    return [el for i in range(len(chunks)) for el in results[i]]
+
+# 텍스트 레이어가 있는 페이지는 로컬에서 파싱하고, 스캔 페이지만 document-parse(OCR)로 보냄
+# 원격으로 파싱할 페이지가 PARSE_CHUNK_PAGES 보다 많으면 페이지 청크 단위로 나눠 동시에 파싱
+def parse_document(file_path):
     filename = os.path.basename(file_path)
-    with open(file_path, 'rb') as f:
-        files = {
-            'document': (filename, f, 'application/pdf')
-        }
-        data = {
-            'ocr': 'force',
-            'base64_encoding': "['table']",
-            'model': 'document-parse'
-        }
-        headers = {'Authorization': f'Bearer {API_KEY}'}
+    local_elements = []
+    pages = None
+    if LOCAL_PARSE:
+        try:
+            with metrics.span("local_parse"):
+                local_elements, scanned_pages = local_parse.parse_pdf(file_path)
+        except Exception as e:
+            print("⚠️ 로컬 파싱 실패, document-parse 사용:", e)
+        else:
+            if not scanned_pages:
+                metrics.inc("local_parse_documents", help="로컬 파싱만으로 처리한 문서 수")
+                return local_elements
+            if local_elements:
+                print(f"ℹ️ 스캔 페이지 {scanned_pages} 만 document-parse 로 파싱")
+                metrics.inc("scanned_pages", len(scanned_pages), help="document-parse 로 보낸 스캔 페이지 수")
+                pages = scanned_pages
 
-        response = requests.post(API_URL, headers=headers, files=files, data=data)
+    try:
+        page_count = local_parse.page_count(file_path)
+    except Exception as e:
+        print("⚠️ 페이지 분리 불가, 문서 전체를 한 번에 파싱:", e)
+        local_elements, pages, page_count = [], None, None
 
-        if response.status_code == 200:
-            result = response.json()
+    if page_count is not None and (pages or page_count > PARSE_CHUNK_PAGES):
+        remote = parse_pages(file_path, pages or list(range(1, page_count + 1)))
+        return local_parse.renumber(local_elements + remote)
 
-            # 결과에서 필요한 매핑 정보 추출
-            text_to_id, id_to_coord = extract_text_and_id_maps(result.get("elements", []))
+    with open(file_path, 'rb') as f:
+        return request_document_parse(filename, f)
 
-            # JSON 파일로 저장
-            with open(os.path.join(HIGHLIGHT_DIR, "text_to_id.json"), 'w', encoding='utf-8') as f:
-                json.dump(text_to_id, f, ensure_ascii=False, indent=2)
+def process_pdf(file_path):
+    filename = os.path.basename(file_path)
+    try:
+        with metrics.span("document_parse"):
+            elements = parse_document(file_path)
+    except DocumentParseError as e:
+        return {
+            "filename": filename,
+            "error": str(e),
+            "status": "failed"
+        }
 
-            with open(os.path.join(HIGHLIGHT_DIR, "id_to_coord.json"), 'w', encoding='utf-8') as f:
-                json.dump(id_to_coord, f, ensure_ascii=False, indent=2)
+    # 결과에서 필요한 매핑 정보 추출
+    with metrics.span("text_maps"):
+        text_to_id, id_to_coord = extract_text_and_id_maps(elements)
 
-            # 업로드된 PDF를 static 폴더로 복사
-            target_pdf_path = os.path.join(STATIC_PDF_DIR, filename)
-            if not os.path.exists(target_pdf_path):
-                with open(file_path, 'rb') as src, open(target_pdf_path, 'wb') as dst:
-                    dst.write(src.read())
+    # 문서별 작업 공간에 JSON 파일로 저장
+    doc_id = workspace.document_id(file_path)
+    element_index.invalidate(doc_id)
+    workspace.write_json(doc_id, workspace.TEXT_TO_ID, text_to_id)
+    workspace.write_json(doc_id, workspace.ID_TO_COORD, id_to_coord)
 
-            return {
-                "filename": filename,
-                "status": "success"
-            }
-        else:
-            return {
-                "filename": filename,
-                "error": response.text,
-                "status": "failed"
-            }
+    # 요소 임베딩 인덱스 생성 (실패해도 매칭 시점에 다시 생성되므로 파싱 결과는 유지)
+    if ELEMENT_INDEX_ON_PARSE:
+        try:
+            with metrics.span("element_index"):
+                element_index.build_index(doc_id, text_to_id, id_to_coord)
+        except Exception as e:
+            print("⚠️ 요소 임베딩 인덱스 생성 실패:", e)
+
+    # 업로드된 PDF를 static 폴더로 복사
+    target_pdf_path = os.path.join(STATIC_PDF_DIR, filename)
+    if not os.path.exists(target_pdf_path):
+        os.makedirs(STATIC_PDF_DIR, exist_ok=True)
+        with open(file_path, 'rb') as src, open(target_pdf_path, 'wb') as dst:
+            dst.write(src.read())
+
+    return {
+        "filename": filename,
+        "doc_id": doc_id,
+        "status": "success"
+    }
 
 def is_pdf_file(filename):
     return filename.lower().endswith('.pdf')
 
-def encode_pdf_to_base64(pdf_path):
+# PDF 를 mmap 으로 열어 base64 를 청크 단위로 생성 (파일 전체를 메모리에 올리지 않음)
+def iter_pdf_base64(pdf_path, chunk_size=BASE64_CHUNK_SIZE):
     with open(pdf_path, 'rb') as pdf_file:
-        pdf_bytes = pdf_file.read()
-        base64_data = base64.b64encode(pdf_bytes).decode('utf-8')
-        return base64_data
+        if os.fstat(pdf_file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(pdf_file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for offset in range(0, len(mm), chunk_size):
+                yield base64.b64encode(mm[offset:offset + chunk_size])
+
+# Information Extraction 요청 본문(JSON)을 스트리밍으로 생성
+# data URL 자리에 표식을 넣어 직렬화한 뒤, 그 앞/뒤 사이에 base64 청크를 흘려보냄
+def iter_extraction_request_body(file_path, schema):
+    placeholder = "__PDF_BASE64__"
+    body = json.dumps({
+        "model": "information-extract",
+        "messages": [
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": f"data:application/pdf;base64,{placeholder}"
+                        }
+                    }
+                ]
+            }
+        ],
+        "response_format": {
+            "type": "json_schema",
+            "json_schema": schema
+        }
+    }, ensure_ascii=False)
+    prefix, suffix = body.split(placeholder, 1)
+    yield prefix.encode('utf-8')
+    yield from iter_pdf_base64(file_path)
+    yield suffix.encode('utf-8')
+
+# 미리보기 파일 이름 ({basename}_universal.json): preview_store 가 거부하는 문자(경로 구분자, 앞쪽 '.')는 바꿔서 사용
+def preview_name(basename):
+    name = re.sub(r'[\\/\x00]', '_', basename).lstrip('.') or 'document'
+    return f'{name}_universal.json'
+
 
-def process_universal_extraction(file_path, schema):
+# 미리보기 저장은 부가 기능이므로 실패해도 추출 결과(캐시 포함)는 성공으로 반환 (output_file 은 None)
+def _write_preview(basename, data):
+    name = preview_name(basename)
+    try:
+        preview_store.write_json(name, data)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ 미리보기 저장 실패 ({name}):", e)
+        return None
+    return name
+
+
+def process_universal_extraction(file_path, schema, timeout=EXTRACTION_TIMEOUT):
     filename = os.path.basename(file_path)
     basename = os.path.splitext(filename)[0]
-    
-    # OpenAI 클라이언트 초기화
-    client = OpenAI(
-        api_key=API_KEY,
-        base_url="https://api.upstage.ai/v1/information-extraction"
-    )
-    
-    # PDF를 base64로 인코딩
-    base64_data = encode_pdf_to_base64(file_path)
-    
+    # PDF 내용 + 스키마 해시로 캐시 확인 (파일 이름이 달라도 같은 내용이면 재사용)
+    cache_key = extraction_cache.make_key(file_path, schema)
+    cached = extraction_cache.get(cache_key)
+    if cached is not None:
+        return {
+            "filename": filename,
+            "output_file": _write_preview(basename, cached),
+            "status": "success",
+            "cached": True,
+            "result": cached
+        }
+
     try:
-        # Information Extraction 요청
-        extraction_response = client.chat.completions.create(
-            model="information-extract",
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:application/pdf;base64,{base64_data}"
-                            }
-                        }
-                    ]
-                }
-            ],
-            response_format={
-                "type": "json_schema",
-                "json_schema": schema
-            }
-        )
-        
-        # ChatCompletion 객체에서 필요한 데이터 추출
+        # Information Extraction 요청 (본문을 청크 단위로 전송해 PDF 크기와 무관하게 메모리 사용량 유지)
+        headers = {
+            'Authorization': f'Bearer {API_KEY}',
+            'Content-Type': 'application/json'
+        }
+        with metrics.span("information_extract"):
+            response = http_client.post(
+                IE_API_URL,
+                headers=headers,
+                data=lambda: iter_extraction_request_body(file_path, schema),
+                timeout=(http_client.HTTP_CONNECT_TIMEOUT, timeout)
+            )
+        if response.status_code != 200:
+            raise Exception(f"Information Extraction 호출 실패 ({response.status_code}): {response.text}")
+
+        # 응답에서 필요한 데이터 추출
         response_data = {
             "choices": [
                 {
                     "message": {
-                        "content": choice.message.content,
-                        "role": choice.message.role
+                        "content": choice["message"]["content"],
+                        "role": choice["message"]["role"]
                     }
                 }
-                for choice in extraction_response.choices
+                for choice in response.json()["choices"]
             ]
         }
         
         # 결과 저장
-        output_path = os.path.join(PREVIEW_DATA_DIR, f'{basename}_universal.json')
-        with open(output_path, 'w', encoding='utf-8') as json_file:
-            json.dump(response_data, json_file, ensure_ascii=False, indent=2)
+        extraction_cache.put(cache_key, response_data)
             
         return {
             "filename": filename,
-            "output_file": f'{basename}_universal.json',
+            "output_file": _write_preview(basename, response_data),
             "status": "success",
             "result": response_data
         }
@@ -168,3 +316,23 @@ def process_universal_extraction(file_path, schema):
             "error": str(e),
             "status": "failed"
         }
+
+
+# 여러 PDF 를 스레드 풀로 동시에 추출 (결과는 입력 순서 그대로 반환)
+_extraction_pool = ThreadPoolExecutor(max_workers=EXTRACTION_MAX_WORKERS, thread_name_prefix="extraction")
+
+def process_universal_extractions(file_paths, schema, timeout=EXTRACTION_TIMEOUT):
+    futures = [
+        _extraction_pool.submit(process_universal_extraction, file_path, schema, timeout)
+        for file_path in file_paths
+    ]
+    return [future.result() for future in futures]
+
+# 완료되는 순서대로 (입력 위치, 결과) 를 돌려줌 (스트리밍 응답에서 단계별 진행 상황 전송용)
+def iter_universal_extractions(file_paths, schema, timeout=EXTRACTION_TIMEOUT):
+    futures = {
+        _extraction_pool.submit(process_universal_extraction, file_path, schema, timeout): i
+        for i, file_path in enumerate(file_paths)
+    }
+    for future in as_completed(futures):
+        yield futures[future], future.result()
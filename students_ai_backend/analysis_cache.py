@@ -0,0 +1,55 @@
+# 비교 분석(Perplexity) 결과 캐시
+# 메인 논문 추출 결과 해시 + 정렬된 참조 논문 추출 결과 해시 + 프롬프트 버전 + 모델 이름을 키로 사용
+# 같은 보고서를 다시 열면 Perplexity 호출 없이 저장된 combined_result 를 돌려줌
+import os
+import time
+import hashlib
+
+from students_ai_backend.config import config, env
+from students_ai_backend.extraction_cache import ExtractionCache
+
+ANALYSIS_CACHE_DIR = env("ANALYSIS_CACHE_DIR", os.path.join(config.preview_data_dir, "analysis_cache"))
+ANALYSIS_CACHE_MAX_BYTES = int(env("ANALYSIS_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+ANALYSIS_CACHE_HOT_ENTRIES = int(env("ANALYSIS_CACHE_HOT_ENTRIES", 64))
+# 저장 후 이 시간(초)이 지나면 다시 분석
+ANALYSIS_CACHE_TTL = float(env("ANALYSIS_CACHE_TTL", 7 * 24 * 3600))
+
+
+def content_sha256(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class AnalysisCache:
+    def __init__(self, cache_dir=ANALYSIS_CACHE_DIR, max_bytes=ANALYSIS_CACHE_MAX_BYTES,
+                 hot_entries=ANALYSIS_CACHE_HOT_ENTRIES, ttl=ANALYSIS_CACHE_TTL):
+        self.store = ExtractionCache(cache_dir=cache_dir, max_bytes=max_bytes, hot_entries=hot_entries)
+        self.ttl = ttl
+        self.expired = 0
+
+    # 참조 논문 순서와 무관하게 같은 집합이면 같은 키
+    def make_key(self, main_content, reference_contents, prompt_version, model):
+        digest = hashlib.sha256()
+        digest.update(content_sha256(main_content).encode('ascii'))
+        for ref_hash in sorted(content_sha256(content) for content in reference_contents):
+            digest.update(ref_hash.encode('ascii'))
+        digest.update(f'{prompt_version}:{model}'.encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key):
+        entry = self.store.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry["created_at"] > self.ttl:
+            self.store.delete(key)
+            self.expired += 1
+            return None
+        return entry["result"]
+
+    def put(self, key, result):
+        self.store.put(key, {"created_at": time.time(), "result": result})
+
+    def snapshot(self):
+        return dict(self.store.snapshot(), expired=self.expired)
+
+
+analysis_cache = AnalysisCache()
@@ -1,52 +1,44 @@
-from flask import Flask, request, jsonify, send_file
+# 설정(.env)을 가장 먼저 읽음 (다른 모듈도 config 의 env / env_flag 로 설정을 읽음)
+from students_ai_backend.config import config
+from flask import Flask, Response, request, jsonify, send_file
 import os
-import shutil
-import requests
 import json
-from dotenv import load_dotenv
+import time
+import uuid
 from flask_cors import CORS
-from students_ai_backend.Chatbot_recommand import *
-from students_ai_backend.DP_IE import *
-from students_ai_backend.perplexity_utils import *
+from students_ai_backend.Chatbot_recommand import find_top_papers, condition_resolver
+from students_ai_backend.DP_IE import (
+    is_pdf_file, process_pdf, process_universal_extractions, iter_universal_extractions
+)
+from students_ai_backend.perplexity_utils import run_perplexity, chat, stream_chat, record_usage
+from students_ai_backend import http_client
+from students_ai_backend import prewarm
+from students_ai_backend import jobs
+from students_ai_backend import workspace
+from students_ai_backend import corpus_warmup
+from students_ai_backend import reference_sets
+from students_ai_backend import metrics
+from students_ai_backend import response_parser
+from students_ai_backend.extraction_cache import extraction_cache
+from students_ai_backend.preview_store import preview_store
+from students_ai_backend.prompt_builder import build_comparison_prompt, COMPARISON_PROMPT_VERSION, COMPARISON_RESPONSE_TYPES, COMPARISON_REQUIRED_KEYS
+from students_ai_backend.response_parser import parse_llm_json
+from students_ai_backend.analysis_cache import analysis_cache
+from students_ai_backend.json_stream import IncrementalJSONParser
 
-
-# 모델 로드 (Sentence Transformers)
-#model = SentenceTransformer('all-MiniLM-L6-v2')
-
-load_dotenv()
-API_KEY = os.getenv("UPSTAGE_API_KEY")
-PERPLEXITY_API_KEY = os.getenv("PERPLEXITY_API_KEY")
-
-API_URL = "https://api.upstage.ai/v1/document-digitization" 
-PERP_API_URL = "https://api.perplexity.ai/chat/completions"
+PERPLEXITY_API_KEY = config.perplexity_api_key
+PERP_API_URL = f"{config.perplexity_base_url}/chat/completions"
+ANALYSIS_MODEL = "sonar"
 
 app = Flask(__name__, template_folder="templates")
 CORS(app)
 #CORS(app, resources={r"/upload-pdf": {"origins": "*"}}, supports_credentials=True)
 
-# 디렉토리 경로 설정
-REF_DIR = "ref_pdfs"
-PAPER_DIR = "papers"
-INPUT_DIR = "input_pdfs"
-OUTPUT_DIR = "output_html"
-PREVIEW_DATA_DIR = "output_data"
-STATIC_PDF_DIR = os.path.join("static", "pdfs")
-HIGHLIGHT_DIR = "data"
-
-# 필요한 디렉토리들이 존재하지 않으면 생성
-os.makedirs(INPUT_DIR, exist_ok=True)
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-os.makedirs(PREVIEW_DATA_DIR, exist_ok=True)
-os.makedirs(STATIC_PDF_DIR, exist_ok=True)
-os.makedirs(HIGHLIGHT_DIR, exist_ok=True)
-
-
-# 데이터 파일 경로 설정
-DATA_DIR = "data"
-TEXT_TO_ID_PATH = os.path.join(DATA_DIR, "text_to_id.json")         # 원문 문장 → ID
-ID_TO_COORD_PATH = os.path.join(DATA_DIR, "id_to_coord.json")       # ID → 좌표 정보
-SUMMARY_LIST_PATH = os.path.join(DATA_DIR, "summary_list.json")     # 요약 문장 리스트
-SUMMARY_COORD_PATH = os.path.join(DATA_DIR, "summary_to_coords.json")  # 결과 저장 위치
+# 디렉토리 경로 설정 (import 시점에는 만들지 않고 업로드를 저장할 때 생성)
+REF_DIR = config.ref_dir
+PAPER_DIR = config.paper_dir
+INPUT_DIR = config.input_dir
+
 
 @app.route('/recommend', methods=['POST'])
 def recommend():
@@ -64,26 +56,38 @@ def recommend():
     if len(file_paths) == 1:
         return send_file(file_paths[0], as_attachment=True)
 
-    # REF_DIR 초기화 (기존 파일 삭제)
-    if os.path.exists(REF_DIR):
-        shutil.rmtree(REF_DIR)
-    os.makedirs(REF_DIR)
-
+    # 추천 논문 id 목록을 세션별 참조 집합으로 저장 (papers/ 의 파일을 그대로 참조, 복사 없음)
     result_filenames = []
+    reference_ids = []
     for paper in top_papers:
-        src = os.path.join(PAPER_DIR, f"{paper['paper_id']}.pdf")
-        if os.path.exists(src):
-            dst = os.path.join(REF_DIR, os.path.basename(src))
-            shutil.copyfile(src, dst)
+        if os.path.exists(reference_sets.paper_path(paper['paper_id'])):
+            reference_ids.append(paper['paper_id'])
             result_filenames.append(
                 {
                     "title":paper['title'],
                     "year":str(paper['date']),
-                    "pub":paper['publications']
+                    "pub":paper['publications'],
+                    "score":paper.get('score')
                 }
             )
+    token = reference_sets.create(reference_ids)
 
-    return jsonify({"files": result_filenames}), 200
+    return jsonify({"files": result_filenames, "reference_set": token}), 200
+
+# 업로드 파일을 INPUT_DIR/<문서 ID>/<파일 이름> 에 저장하고 경로 반환
+# 같은 이름의 다른 PDF 가 나중에 올라와도 대기 중인 비동기 작업의 입력을 덮어쓰지 않도록 내용 해시별 디렉토리 사용
+# (파일 이름은 그대로 두어 output_data / static 의 결과 파일 이름은 바뀌지 않음)
+def save_upload(file):
+    os.makedirs(INPUT_DIR, exist_ok=True)
+    filename = os.path.basename(file.filename)
+    tmp_path = os.path.join(INPUT_DIR, f'.{uuid.uuid4().hex}.upload')
+    with metrics.span("save_upload"):
+        file.save(tmp_path)
+        doc_dir = os.path.join(INPUT_DIR, workspace.document_id(tmp_path))
+        os.makedirs(doc_dir, exist_ok=True)
+        save_path = os.path.join(doc_dir, filename)
+        os.replace(tmp_path, save_path)
+    return save_path
 
 @app.route("/upload-pdf", methods=['POST'])
 def upload_pdf():
@@ -94,182 +98,245 @@ def upload_pdf():
     if file.filename == '':
         return jsonify({"error": "No selected file"}), 400
 
-    save_path = os.path.join(INPUT_DIR, file.filename)
-    file.save(save_path)
+    save_path = save_upload(file)
+
+    if is_async_request():
+        job_id = jobs.enqueue("upload-pdf", {"save_path": save_path})
+        return jsonify({"job_id": job_id, "status": "queued"}), 202
 
     result = process_pdf(save_path)
     return jsonify(result)
 
+# output_data/ 의 저장된 JSON 바이트(또는 미리 압축해 둔 gzip/br)를 그대로 전송
+# ETag / Last-Modified 가 맞으면 304, 뷰어가 폴링할 때마다 다시 확인하도록 no-cache
+def send_preview(name):
+    accepts = {enc for enc, quality in request.accept_encodings if quality > 0}
+    preview = preview_store.open(name, accepts)
+    if preview is None:
+        return jsonify({"error": "file not found"}), 404
+    if "path" in preview:
+        response = send_file(preview["path"], mimetype='application/json', download_name=name, etag=preview["etag"],
+                             last_modified=preview["last_modified"], max_age=None)
+    else:
+        response = Response(preview["body"], mimetype='application/json')
+        response.set_etag(preview["etag"])
+        response.last_modified = preview["last_modified"]
+    if preview["encoding"]:
+        response.headers["Content-Encoding"] = preview["encoding"]
+    response.headers["Vary"] = "Accept-Encoding"
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
 @app.route('/data/<filename>.json')
 def get_json_data(filename):
-    path = os.path.join(PREVIEW_DATA_DIR, f'{filename}.json')
-    if not os.path.exists(path):
-        return jsonify({"error": "file not found"}), 404
-    with open(path, 'r', encoding='utf-8') as f:
-        return jsonify(json.load(f))
+    return send_preview(f'{filename}.json')
 
 @app.route('/universal-extraction', methods=['POST'])
 def universal_extraction():
+    params, error = read_extraction_request()
+    if error:
+        return error
+    save_path, schema, reference_files = params
+
+    if is_async_request():
+        job_id = jobs.enqueue("universal-extraction",
+                              {"save_path": save_path, "schema": schema, "reference_files": reference_files})
+        return jsonify({"job_id": job_id, "status": "queued"}), 202
+
+    return run_universal_extraction(save_path, schema, reference_files)
+
+# 같은 요청을 Server-Sent Events 로 처리: 단계가 끝날 때마다, 분석 토큰이 도착할 때마다 이벤트 전송
+@app.route('/universal-extraction/stream', methods=['POST'])
+def universal_extraction_stream():
+    params, error = read_extraction_request()
+    if error:
+        return error
+    save_path, schema, reference_files = params
+
+    return Response(
+        stream_universal_extraction(save_path, schema, reference_files),
+        mimetype='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# 업로드 파일/스키마/참조 논문 집합 검증 후 ((저장 경로, 스키마, 참조 논문 경로), 오류 응답) 반환
+def read_extraction_request():
     if 'file' not in request.files:
-        return jsonify({"error": "파일이 없습니다"}), 400
+        return None, (jsonify({"error": "파일이 없습니다"}), 400)
         
     file = request.files['file']
     if file.filename == '':
-        return jsonify({"error": "선택된 파일이 없습니다"}), 400
+        return None, (jsonify({"error": "선택된 파일이 없습니다"}), 400)
     
     if not is_pdf_file(file.filename):
-        return jsonify({"error": "PDF 파일만 업로드 가능합니다"}), 400
+        return None, (jsonify({"error": "PDF 파일만 업로드 가능합니다"}), 400)
     
     # 스키마 검증 추가
     if 'schema' not in request.form:
-        return jsonify({"error": "스키마가 필요합니다"}), 400
+        return None, (jsonify({"error": "스키마가 필요합니다"}), 400)
         
     try:
         schema = json.loads(request.form['schema'])
     except json.JSONDecodeError:
-        return jsonify({"error": "잘못된 스키마 형식입니다"}), 400
-    
-    # 파일 이름에서 확장자 제거
-    basename = os.path.splitext(file.filename)[0]
-    # universal json 파일 경로 확인
-    universal_json_path = os.path.join(PREVIEW_DATA_DIR, f'{basename}_universal.json')
+        return None, (jsonify({"error": "잘못된 스키마 형식입니다"}), 400)
     
-    # 이미 존재하는 universal json 파일이 있는지 확인
-    if os.path.exists(universal_json_path):
-        # 이미 존재하는 universal json 파일 사용
-        with open(universal_json_path, 'r', encoding='utf-8') as f:
-            result = {
-                "filename": file.filename,
-                "output_file": f'{basename}_universal.json',
-                "status": "success",
-                "result": json.load(f)
-            }
+    # 참조 논문: /recommend 가 돌려준 참조 집합 토큰이 있으면 그 논문들, 없으면 기본 참조 논문(REF_DIR)
+    token = request.form.get('reference_set')
+    if token:
+        reference_ids = reference_sets.get(token)
+        if reference_ids is None:
+            return None, (jsonify({"error": "참조 논문 집합을 찾을 수 없습니다"}), 404)
+        reference_files = reference_sets.resolve_paths(reference_ids)
     else:
-        # 없으면 파일 저장하고 새로 추출
-        save_path = os.path.join(INPUT_DIR, file.filename)
-        file.save(save_path)
-        result = process_universal_extraction(save_path, schema)  # schema 파라미터 추가
-    # 참조 논문 처리
-    reference_results = []
-    
-    # 참조 논문 파일 경로
-    reference_files = [
+        reference_files = default_reference_files()
+
+    # 파일 저장
+    save_path = save_upload(file)
+    return (save_path, schema, reference_files), None
+
+# 기본 참조 논문 (reference_id 가 요청마다 같도록 이름순 정렬)
+def default_reference_files():
+    if not os.path.isdir(REF_DIR):
+        return []
+    return sorted(
         os.path.join(REF_DIR, fname)
         for fname in os.listdir(REF_DIR)
         if os.path.isfile(os.path.join(REF_DIR, fname))
-    ]
+    )
+
+def extraction_content(extraction):
+    return json.loads(extraction['result']['choices'][0]['message']['content'])
+
+# 메인 논문 추출 결과 + 참조 논문 추출 결과(reference_id 순)로 비교 분석 프롬프트 생성
+def prepare_comparison(result, reference_results):
+    main_paper_data = extraction_content(result)
+    reference_papers_data = []
     
-    # 각 참조 논문에 대해 동일한 스키마로 추출 진행
-    for i, ref_file in enumerate(reference_files, 1):
-        if os.path.exists(ref_file):
-            # 파일 이름에서 확장자 제거
-            ref_basename = os.path.splitext(os.path.basename(ref_file))[0]
-            # universal json 파일 경로 확인
-            universal_json_path = os.path.join(PREVIEW_DATA_DIR, f'{ref_basename}_universal.json')
-            
-            if os.path.exists(universal_json_path):
-                # 이미 존재하는 universal json 파일 사용
-                with open(universal_json_path, 'r', encoding='utf-8') as f:
-                    ref_result = {
-                        "filename": f'{os.path.basename(ref_file)}',
-                        "output_file": f'{ref_basename}_universal.json',
-                        "status": "success",
-                        "result": json.load(f)
-                    }
-            else:
-                # 없으면 새로 추출
-                ref_result = process_universal_extraction(ref_file, schema)
-                
-            ref_result['reference_id'] = i
-            reference_results.append(ref_result)
-        else:
-            raise Exception (f"참조 논문 파일이 존재하지 않습니다: {ref_file}")
+    for ref in reference_results:
+        if 'result' in ref and 'choices' in ref['result'] and len(ref['result']['choices']) > 0:
+            reference_papers_data.append({
+                "reference_id": ref.get('reference_id', 0),
+                "content": extraction_content(ref)
+            })
+    
+    # Perplexity API 요청 데이터 구성 - 토큰 예산 안에서 compact JSON 으로 조립
+    with metrics.span("prompt_build"):
+        prompt, prompt_usage = build_comparison_prompt(main_paper_data, reference_papers_data)
+    metrics.inc("prompt_tokens_estimated", prompt_usage['total_tokens'], help="조립한 프롬프트의 추정 토큰 수",
+                call="comparison")
+    print(f"📏 프롬프트 토큰: {prompt_usage['total_tokens']}/{prompt_usage['budget']}")
+    return main_paper_data, prompt, prompt_usage
+
+# 응답 텍스트에서 JSON 부분만 추출/복구하여 파싱, 형식이 맞지 않으면 형식 복구만 짧게 재요청
+# 핵심 키만 필수로 보고, 빠진 목록 항목은 경고 후 빈 목록으로 채움
+def parse_analysis(content):
+    with metrics.span("analysis_parse"):
+        analysis_data = parse_llm_json(
+            content,
+            types=COMPARISON_RESPONSE_TYPES,
+            required=COMPARISON_REQUIRED_KEYS,
+            reprompt=lambda prompt: chat(prompt, model=ANALYSIS_MODEL)
+        )
+    missing = [key for key in COMPARISON_RESPONSE_TYPES if key not in analysis_data]
+    if missing:
+        print("⚠️ 분석 응답에 없는 항목 (빈 목록으로 채움):", ", ".join(missing))
+    for key in missing:
+        analysis_data[key] = []
+    return analysis_data
+
+# 원본 데이터와 분석 결과를 메인 논문의 작업 공간에 함께 저장하고 비교 분석 캐시에도 저장
+def save_analysis(save_path, main_paper_data, analysis_data, prompt_usage, cache_key):
+    doc_id = workspace.document_id(save_path)
+    combined_result = {
+        "doc_id": doc_id,
+        "original_data": main_paper_data,
+        "analysis": analysis_data,
+        "prompt_usage": prompt_usage
+    }
+    workspace.write_json(doc_id, workspace.SUMMARY_LIST, combined_result)
+    analysis_cache.put(cache_key, combined_result)
+    return combined_result
+
+# 추출 결과 원문(메인 + 참조 논문 집합), 프롬프트 버전, 모델이 같으면 같은 비교 분석 캐시 키
+def comparison_cache_key(result, reference_results):
+    reference_contents = [
+        ref['result']['choices'][0]['message']['content']
+        for ref in reference_results
+        if 'result' in ref and 'choices' in ref['result'] and len(ref['result']['choices']) > 0
+    ]
+    return analysis_cache.make_key(result['result']['choices'][0]['message']['content'],
+                                   reference_contents, COMPARISON_PROMPT_VERSION, ANALYSIS_MODEL)
+
+# 캐시된 비교 분석 결과를 이번 요청의 문서 작업 공간에 저장하고 반환 (없으면 None)
+def load_cached_analysis(save_path, cache_key):
+    cached = analysis_cache.get(cache_key)
+    if cached is None:
+        return None
+    doc_id = workspace.document_id(save_path)
+    combined_result = dict(cached, doc_id=doc_id)
+    workspace.write_json(doc_id, workspace.SUMMARY_LIST, combined_result)
+    print("✅ 비교 분석 캐시 사용")
+    return dict(combined_result, cached=True)
+
+# 메인 논문 + 참조 논문 추출 후 Perplexity 로 비교 분석 (동기 요청과 백그라운드 작업이 공유)
+def run_universal_extraction(save_path, schema, reference_files, progress=None):
+    progress = progress or (lambda value, stage=None: None)
+
+    # 메인 논문과 참조 논문들을 동일한 스키마로 동시에 추출
+    # (PDF 내용 + 스키마 기준 캐시는 process_universal_extraction 내부에서 처리)
+    progress(0.1, "extracting")
+    with metrics.span("extract_all"):
+        results = process_universal_extractions([save_path] + reference_files, schema)
+    result = results[0]
+
+    reference_results = []
+    for i, ref_result in enumerate(results[1:], 1):
+        ref_result['reference_id'] = i
+        reference_results.append(ref_result)
     
     # 참조 논문 결과는 별도로 반환
     # Perplexity API 호출을 위한 코드
     try:
+        # 같은 추출 결과 조합으로 이미 분석한 적이 있으면 재사용
+        cache_key = comparison_cache_key(result, reference_results)
+        cached = load_cached_analysis(save_path, cache_key)
+        if cached is not None:
+            return cached
+
         if not PERPLEXITY_API_KEY:
             raise Exception("Perplexity API 키가 설정되지 않았습니다.")
         else:
             # 메인 논문과 참조 논문 데이터 준비
-            main_paper_data = json.loads(result['result']['choices'][0]['message']['content'])
-            reference_papers_data = []
-            
-            for ref in reference_results:
-                if 'result' in ref and 'choices' in ref['result'] and len(ref['result']['choices']) > 0:
-                    ref_content = json.loads(ref['result']['choices'][0]['message']['content'])
-                    reference_papers_data.append({
-                        "reference_id": ref.get('reference_id', 0),
-                        "content": ref_content
-                    })
-            
-            # Perplexity API 요청 데이터 구성 - JSON 형식으로 응답 요청
-            prompt = f"""
-            다음은 학술 논문과 참조 논문들의 분석 결과입니다:
-            
-            메인 논문:
-            {json.dumps(main_paper_data, indent=2, ensure_ascii=False)}
-            
-            참조 논문들:
-            {json.dumps(reference_papers_data, indent=2, ensure_ascii=False)}
-            
-            참조논문들은 이미 저널에 게제된 검증된 논문들입니다. 다른 소스는 참고하지 말고, 해당 논문들을 레퍼런스로 하여 메인 논문의 허점을 찾고 개선 방향을 찾아주세요.
-            위 데이터를 바탕으로 다음 사항을 분석해주세요. 반드시 JSON 형식으로 응답해주세요:
-            {{
-              "subsections_comments": [메인 논문의 각 섹션에 대한 참조 논문들에 비해 부족한 점이나 괜찮은 점 코멘트 배열],
-              "figures_comments": [메인 논문의 그림에 대한 참조 논문들에 비해 부족한 점이나 괜찮은 점 코멘트 배열],
-              "equations_comments": [메인 논문의 수식에 대한 참조 논문들에 비해 부족한 점이나 괜찮은 점 코멘트 배열],
-              "methods_comparison": [메인 논문의 방법들의 참신성을 기존의 논문들에 없던 새로운 내용들을 비교하며 코멘트 배열],
-              "metrics_comparison": [메인 논문과 참조 논문들의 평가 지표의 양이나 정확도 비교 코멘트 배열],
-              "academic_improvements": [메인 논문의 비학술적 표현 수정 제안 배열],
-              "key_differences": [메인 논문과 참조 논문들 간의 주요 차이점을 포함한 배열],
-              "accept_probability": [잘쓴 논문의 accept rate 기준이 50의 accept rate 가진다는 것을 토대로 계산, 일단 50에서 감점 방식으로 subsections_comments, figures_comments, equations_comments, methods_comparison, metrics_comparison, academic_improvements, key_differences 에서 마이너한(사소하더라도) critic 있을 때마다 4씩 감점, 메이저(내용과 관련된 심각한 결함) critic있으면 10씩 감점]
-              "accept_probability_metrics": [어떤 메이저한 크리틱과 어떤 마이너한 크리틱이있었는지 보여주면서 이유 설명해주기.]
-            }}
-            
-            각 배열의 항목은 문자열이며, 영어로 작성해야 합니다. 다른 형식이나 추가 설명 없이 오직 위 JSON 형식으로만 응답해주세요. 
-            """
+            main_paper_data, prompt, prompt_usage = prepare_comparison(result, reference_results)
             
             # Perplexity API 호출
+            progress(0.6, "analyzing")
             headers = {
                 "Authorization": f"Bearer {PERPLEXITY_API_KEY}",
                 "Content-Type": "application/json"
             }
             
             api_data = {
-                "model": "sonar",
+                "model": ANALYSIS_MODEL,
                 "messages": [{"role": "user", "content": prompt}]
             }
             
-            perplexity_response = requests.post(
-                "https://api.perplexity.ai/chat/completions",
-                headers=headers,
-                json=api_data
-            )
+            with metrics.span("analysis_llm"):
+                perplexity_response = http_client.post(
+                    PERP_API_URL,
+                    headers=headers,
+                    json=api_data
+                )
             
             if perplexity_response.status_code == 200:
                 perplexity_result = perplexity_response.json()
+                record_usage(perplexity_result.get("usage"), ANALYSIS_MODEL)
                 
                 # JSON 응답 파싱 시도
                 try:
                     content = perplexity_result['choices'][0]['message']['content']
-                    # JSON 문자열 추출 (만약 추가 텍스트가 있는 경우 처리)
-                    json_str = content
-                    if "```json" in content:
-                        json_str = content.split("```json")[1].split("```")[0].strip()
-                    elif "```" in content:
-                        json_str = content.split("```")[1].split("```")[0].strip()
-                    
-                    # JSON 파싱
-                    analysis_data = json.loads(json_str)
-                    
-                    # 원본 데이터와 분석 결과를 함께 저장
-                    combined_result = {
-                        "original_data": main_paper_data,
-                        "analysis": analysis_data
-                    }
-                    with open(SUMMARY_LIST_PATH, "w", encoding="utf-8") as f:
-                        json.dump(combined_result, f, ensure_ascii=False, indent=2)
+                    analysis_data = parse_analysis(content)
+                    combined_result = save_analysis(save_path, main_paper_data, analysis_data, prompt_usage, cache_key)
                     
                     # 결과에 추가
                     print("✅ Perplexity API 호출 및 JSON 파싱 성공")
@@ -286,17 +353,155 @@ def universal_extraction():
         result['perplexity_error'] = str(e)
         raise Exception(f"❌ Perplexity API 처리 중 오류 발생: {str(e)}")
 
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+# run_universal_extraction 의 스트리밍 버전
+# stage: 메인/참조 논문 추출 완료, 분석 시작 / token: 분석 텍스트 조각
+# partial: 분석 JSON 의 항목이 완성될 때마다 (예: subsections_comments 의 코멘트 하나) / result: 최종 결과 / error
+def stream_universal_extraction(save_path, schema, reference_files):
+    try:
+        results = [None] * (len(reference_files) + 1)
+        for i, extraction in iter_universal_extractions([save_path] + reference_files, schema):
+            results[i] = extraction
+            failed = extraction.get('status') != 'success'
+            if i == 0:
+                if failed:
+                    raise Exception(f"메인 논문 추출 실패: {extraction.get('error')}")
+                yield sse_event("stage", {"stage": "main_extracted", "cached": extraction.get('cached', False),
+                                          "data": extraction_content(extraction)})
+            else:
+                extraction['reference_id'] = i
+                yield sse_event("stage", {"stage": "reference_extracted", "reference_id": i,
+                                          "filename": extraction['filename'], "status": extraction['status'],
+                                          "cached": extraction.get('cached', False)})
+
+        cache_key = comparison_cache_key(results[0], results[1:])
+        cached = load_cached_analysis(save_path, cache_key)
+        if cached is not None:
+            yield sse_event("result", cached)
+            return
+
+        if not PERPLEXITY_API_KEY:
+            raise Exception("Perplexity API 키가 설정되지 않았습니다.")
+        main_paper_data, prompt, prompt_usage = prepare_comparison(results[0], results[1:])
+        yield sse_event("stage", {"stage": "analyzing", "prompt_usage": prompt_usage})
+
+        parser = IncrementalJSONParser()
+        # (클라이언트로 이벤트를 보내는 시간까지 포함)
+        with metrics.span("analysis_llm_stream"):
+            for text in stream_chat(prompt, model=ANALYSIS_MODEL):
+                yield sse_event("token", {"text": text})
+                for kind, key, value in parser.feed(text):
+                    yield sse_event("partial", {"kind": kind, "key": key, "value": value})
+        for kind, key, value in parser.close():
+            yield sse_event("partial", {"kind": kind, "key": key, "value": value})
+
+        analysis_data = parse_analysis(parser.buffer)
+        combined_result = save_analysis(save_path, main_paper_data, analysis_data, prompt_usage, cache_key)
+        print("✅ Perplexity 스트리밍 분석 및 JSON 파싱 성공")
+        yield sse_event("result", combined_result)
+    except Exception as e:
+        print("❌ 스트리밍 분석 중 오류 발생:", e)
+        yield sse_event("error", {"error": str(e)})
+
 @app.route('/universal-data/<filename>')
 def get_universal_data(filename):
-    path = os.path.join(PREVIEW_DATA_DIR, filename)
-    if not os.path.exists(path):
-        return jsonify({"error": "file not found"}), 404
-    with open(path, 'r', encoding='utf-8') as f:
-        return jsonify(json.load(f))
+    return send_preview(filename)
+
+# ?async=1 이면 작업 큐에 등록하고 job id 를 바로 반환
+def is_async_request():
+    value = request.args.get('async') or request.form.get('async') or ''
+    return value.lower() in ('1', 'true', 'yes')
+
+@app.route('/jobs/<job_id>')
+def get_job_status(job_id):
+    job = jobs.get_job(job_id)
+    if job is None:
+        return jsonify({"error": "job not found"}), 404
+    return jsonify(job)
+
+jobs.register("upload-pdf", lambda payload, progress: process_pdf(payload["save_path"]))
+jobs.register("universal-extraction",
+              lambda payload, progress: run_universal_extraction(
+                  payload["save_path"], payload["schema"], payload["reference_files"], progress))
+
+# 요청별 소요 시간 + (PROFILE_REQUESTS=1 일 때) ?profile=1 요청의 프로파일 저장
+@app.before_request
+def start_request_timer():
+    request.environ["metrics.start"] = time.perf_counter()
+    if metrics.PROFILE_REQUESTS and request.args.get('profile', '').lower() in ('1', 'true', 'yes'):
+        profiler = metrics.RequestProfiler(request.endpoint or "unknown")
+        try:
+            profiler.start()
+            request.environ["metrics.profiler"] = profiler
+        except Exception as e:
+            print("⚠️ 프로파일러 시작 실패:", e)
+
+@app.after_request
+def record_request(response):
+    profiler = request.environ.pop("metrics.profiler", None)
+    if profiler is not None:
+        response.headers["X-Profile-Path"] = profiler.stop()
+    start = request.environ.get("metrics.start")
+    if start is not None:
+        metrics.observe("http_request_seconds", time.perf_counter() - start, help="엔드포인트별 응답 시간",
+                        endpoint=request.url_rule.rule if request.url_rule else "unmatched",
+                        method=request.method, status=response.status_code)
+    return response
+
+@app.route('/metrics')
+def get_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+metrics.register_collector(metrics.stats_collector(
+    "extraction_cache", extraction_cache.snapshot, help="Information Extraction 캐시", gauges=("entries", "bytes")))
+metrics.register_collector(metrics.stats_collector(
+    "analysis_cache", analysis_cache.snapshot, help="비교 분석 결과 캐시", gauges=("entries", "bytes")))
+metrics.register_collector(metrics.stats_collector(
+    "preview_data", preview_store.snapshot, help="/data, /universal-data 전송", gauges=("indexed", "hot_entries")))
+metrics.register_collector(metrics.stats_collector(
+    "llm_response_parse", lambda: dict(response_parser.stats), help="LLM 응답 JSON 파싱 결과"))
+metrics.register_collector(metrics.stats_collector(
+    "recommend_conditions", lambda: dict(condition_resolver.stats), help="추천 조건 추출 경로"))
+
+@app.route('/warmup/status')
+def get_warmup_status():
+    return jsonify(corpus_warmup.warmup_status())
+
+@app.route('/prewarm/status')
+def get_prewarm_status():
+    return jsonify(prewarm.prewarm_status())
+
+# PREWARM_ON_STARTUP=1 이면 서버가 첫 요청(헬스 체크 등)을 받은 뒤 무거운 의존성/모델을 백그라운드에서 로드
+@app.before_request
+def start_prewarm():
+    if config.prewarm_on_startup:
+        prewarm.start_background()
+
+# WARMUP_ON_STARTUP=1 이면 papers/ 전체를 백그라운드에서 미리 추출
+if config.warmup_on_startup:
+    corpus_warmup.start_background()
 
 @app.route("/run-perplexity", methods=["GET"])
-def run():
-    success, result = run_perplexity()
+@app.route("/run-perplexity/<doc_id>", methods=["GET"])
+def run(doc_id=None):
+    doc_id = doc_id or request.args.get('doc_id')
+    if not doc_id:
+        return jsonify({"error": "doc_id 가 필요합니다"}), 400
+    try:
+        if not (workspace.exists(doc_id, workspace.TEXT_TO_ID) and workspace.exists(doc_id, workspace.ID_TO_COORD)):
+            return jsonify({"error": "document not found"}), 404
+        # 문서는 파싱됐지만 비교 분석이 아직 끝나지 않은 경우
+        if not workspace.exists(doc_id, workspace.SUMMARY_LIST):
+            return jsonify({"error": "analysis not found, run the comparison analysis first"}), 409
+    except workspace.InvalidDocumentId as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        success, result = run_perplexity(doc_id)
+    except FileNotFoundError:
+        # 확인 직후 작업 공간이 정리된 경우
+        return jsonify({"error": "document not found"}), 404
     return jsonify(result), (200 if success else 500)
 
 if __name__ == '__main__':
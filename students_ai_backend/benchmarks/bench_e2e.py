@@ -0,0 +1,230 @@
+# API 키 없이 실행하는 엔드투엔드 벤치마크
+# 사용법: python -m students_ai_backend.benchmarks.bench_e2e [--clients 4] [--iterations 3] [--latency-ms 200] ...
+# - mock_upstream 의 대역 서버(Upstage / Perplexity)를 띄우고 Flask 앱을 임시 작업 디렉토리에서 실행
+# - /recommend, /upload-pdf, /universal-extraction, /run-perplexity 를 동시 클라이언트로 호출하여
+#   엔드포인트별 p50/p95/p99, req/s, 오류 수, RSS, 업스트림 호출 수를 출력
+import os
+import sys
+import glob
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from students_ai_backend.benchmarks.mock_upstream import MockUpstream
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SCHEMA_PATH = os.path.join(BACKEND_DIR, "schemas", "academic_paper_analysis_schema.json")
+
+RECOMMEND_PROMPTS = [
+    "CVPR papers after 2015",
+    "papers about image classification with more than 1000 citations",
+    "2018년 이후 NeurIPS 논문 추천해줘",
+    "recent work on large scale visual recognition benchmarks and their evaluation protocols in detail",
+]
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, int(round(p / 100 * len(values))) - 1))]
+
+
+# 벤치마크 전용 작업 디렉토리 (앱이 상대 경로로 쓰는 디렉토리들을 격리)
+def prepare_workdir(args):
+    workdir = tempfile.mkdtemp(prefix="bench_e2e_")
+    os.symlink(os.path.join(BACKEND_DIR, "papers"), os.path.join(workdir, "papers"))
+    ref_dir = os.path.join(BACKEND_DIR, "ref_pdfs")
+    if os.path.isdir(ref_dir):
+        os.symlink(ref_dir, os.path.join(workdir, "ref_pdfs"))
+    os.chdir(workdir)
+    return workdir
+
+
+def configure_env(args, upstage_url, perplexity_url):
+    os.environ.update({
+        "UPSTAGE_API_KEY": "bench",
+        "PERPLEXITY_API_KEY": "bench",
+        "UPSTAGE_BASE_URL": f"{upstage_url}/v1",
+        "PERPLEXITY_BASE_URL": perplexity_url,
+        "PAPER_DB_BACKEND": "sqlite",
+        "PAPER_SQLITE_PATH": os.path.join("data", "papers.sqlite3"),
+        "WARMUP_ON_STARTUP": "0",
+        "LOCAL_PARSE": "0" if args.remote_parse else "1",
+    })
+    if not args.warm:
+        # 같은 추출 결과가 재생되더라도 매번 비교 분석을 다시 수행
+        os.environ["ANALYSIS_CACHE_TTL"] = "0"
+
+
+def start_app():
+    import logging
+    from werkzeug.serving import make_server
+    from students_ai_backend.uploader import ingest
+    from students_ai_backend.app import app
+
+    ingest()
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+# 콜드 모드에서는 PDF 끝에 요청마다 다른 주석을 붙여 내용 해시 기반 캐시를 우회
+def make_uploads(pdfs, count, warm):
+    uploads = []
+    for i in range(count):
+        path = pdfs[i % len(pdfs)]
+        with open(path, 'rb') as f:
+            data = f.read()
+        if not warm:
+            data += f"\n%bench-{i}-{time.time_ns()}\n".encode('ascii')
+        uploads.append((f"bench_{i}_{os.path.basename(path)}", data))
+    return uploads
+
+
+def run_phase(name, func, items, clients, mock):
+    before = mock.snapshot()["calls"]
+    latencies = []
+    errors = Counter()
+    outputs = [None] * len(items)
+    lock = threading.Lock()
+
+    def call(index):
+        start = time.perf_counter()
+        try:
+            response = func(items[index])
+            ok = response.status_code < 400
+            outputs[index] = response
+            status = response.status_code
+        except Exception as e:
+            ok, status = False, type(e).__name__
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                errors[status] += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(call, range(len(items))))
+    wall = time.perf_counter() - start
+
+    after = mock.snapshot()["calls"]
+    upstream = {key: after.get(key, 0) - before.get(key, 0) for key in after if after.get(key, 0) != before.get(key, 0)}
+    return {
+        "endpoint": name,
+        "requests": len(items),
+        "errors": dict(errors),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "req_per_s": len(items) / wall if wall else 0.0,
+        "rss_mb": rss_mb(),
+        "upstream_calls": upstream,
+    }, outputs
+
+
+def print_report(results, mock):
+    print(f"{'endpoint':<24}{'n':>5}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}{'RSS MB':>9}  upstream")
+    for r in results:
+        upstream = ", ".join(f"{k}={v}" for k, v in sorted(r["upstream_calls"].items())) or "-"
+        print(f"{r['endpoint']:<24}{r['requests']:>5}{sum(r['errors'].values()):>5}{r['p50_ms']:>10.1f}"
+              f"{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}{r['req_per_s']:>9.2f}{r['rss_mb']:>9.1f}  {upstream}")
+        if r["errors"]:
+            print(f"{'':<24}오류: {r['errors']}")
+    snapshot = mock.snapshot()
+    print(f"업스트림 호출 합계: {snapshot['calls']}, 주입된 오류: {snapshot['errors']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="대역 서버를 사용하는 오프라인 엔드투엔드 벤치마크")
+    parser.add_argument("--clients", type=int, default=4, help="동시 클라이언트 수")
+    parser.add_argument("--iterations", type=int, default=3, help="클라이언트당 요청 수")
+    parser.add_argument("--latency-ms", type=float, default=200, help="업스트림 평균 지연")
+    parser.add_argument("--jitter-ms", type=float, default=50, help="업스트림 지연 편차")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="업스트림 503 비율 (0~1)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pdf", action="append", help="업로드할 PDF (기본: papers/*.pdf)")
+    parser.add_argument("--warm", action="store_true", help="같은 PDF 를 반복 업로드하여 캐시 적중 경로 측정")
+    parser.add_argument("--remote-parse", action="store_true", help="로컬 파싱 대신 항상 document-parse 대역 서버 사용")
+    parser.add_argument("--json", help="결과를 JSON 파일로도 저장")
+    parser.add_argument("--keep-workdir", action="store_true")
+    args = parser.parse_args(argv)
+    if args.json:
+        args.json = os.path.abspath(args.json)
+
+    pdfs = [os.path.abspath(p) for p in (args.pdf or sorted(glob.glob(os.path.join(BACKEND_DIR, "papers", "*.pdf"))))]
+    with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+        schema = f.read()
+
+    mock = MockUpstream(args.latency_ms, args.jitter_ms, args.error_rate, args.seed)
+    upstage_url, perplexity_url = mock.start(), mock.start()
+    workdir = prepare_workdir(args)
+    configure_env(args, upstage_url, perplexity_url)
+    rss_start = rss_mb()
+    server, base_url = start_app()
+    print(f"작업 디렉토리: {workdir}, 앱: {base_url}, 시작 RSS {rss_start:.1f}MB → {rss_mb():.1f}MB")
+
+    count = args.clients * args.iterations
+    uploads = make_uploads(pdfs, count, args.warm)
+    session = requests.Session()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=args.clients))
+    results = []
+
+    prompts = [RECOMMEND_PROMPTS[i % len(RECOMMEND_PROMPTS)] for i in range(count)]
+    result, _ = run_phase("/recommend", lambda p: session.post(f"{base_url}/recommend", json={"prompt": p}),
+                          prompts, args.clients, mock)
+    results.append(result)
+
+    result, responses = run_phase(
+        "/upload-pdf",
+        lambda u: session.post(f"{base_url}/upload-pdf", files={"file": (u[0], u[1], "application/pdf")}),
+        uploads, args.clients, mock)
+    results.append(result)
+    doc_ids = [r.json().get("doc_id") for r in responses if r is not None and r.status_code == 200]
+
+    result, _ = run_phase(
+        "/universal-extraction",
+        lambda u: session.post(f"{base_url}/universal-extraction",
+                               files={"file": (u[0], u[1], "application/pdf")}, data={"schema": schema}),
+        uploads, args.clients, mock)
+    results.append(result)
+
+    result, _ = run_phase("/run-perplexity", lambda d: session.get(f"{base_url}/run-perplexity/{d}"),
+                          [d for d in doc_ids if d], args.clients, mock)
+    results.append(result)
+
+    print_report(results, mock)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"args": vars(args), "results": results, "upstream": mock.snapshot()}, f, indent=2)
+
+    server.shutdown()
+    mock.stop()
+    if not args.keep_workdir:
+        os.chdir(BACKEND_DIR)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,96 @@
+# 앱 import(워커 부팅) 비용 측정
+# 사용법: python -m students_ai_backend.benchmarks.bench_import [--repeat 5] [--top 15] [--module students_ai_backend.app] [--json 경로]
+# - 새 인터프리터에서 `python -X importtime -c "import <module>"` 을 반복 실행 (빈 임시 작업 디렉토리에서)
+# - import 시간 중앙값/최소값, 누적 시간이 큰 모듈, import 후 로드된 무거운 의존성, import 만으로 생긴 파일/디렉토리를 출력
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+PACKAGE_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+# import 시점에는 로드되지 않아야 하는 (첫 사용 또는 사전 로드 때 로드되는) 의존성
+HEAVY_MODULES = [
+    "numpy", "pandas", "openpyxl", "openai", "pymysql", "bs4",
+    "sentence_transformers", "torch", "pdfminer", "pypdf",
+]
+
+PROBE = (
+    "import sys, json, time\n"
+    "start = time.perf_counter()\n"
+    "import {module}\n"
+    "elapsed = time.perf_counter() - start\n"
+    "print(json.dumps({{'seconds': elapsed, 'heavy': [m for m in {heavy!r} if m in sys.modules]}}))\n"
+)
+
+
+# importtime 출력: "import time: self [us] | cumulative | imported package"
+def parse_importtime(stderr):
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def run_once(module, env):
+    workdir = tempfile.mkdtemp(prefix="bench_import_")
+    try:
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=workdir, env=env, capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        result["modules"] = parse_importtime(completed.stderr)
+        result["created"] = sorted(os.listdir(workdir))
+        return result
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="앱 import 시간 벤치마크")
+    parser.add_argument("--module", default="students_ai_backend.app")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="누적 시간이 큰 모듈 출력 수")
+    parser.add_argument("--json", help="결과를 JSON 파일로도 저장")
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in [PACKAGE_ROOT, env.get("PYTHONPATH")] if p)
+    # 시작 시 백그라운드 작업은 끄고 import 비용만 측정
+    env.update({"WARMUP_ON_STARTUP": "0", "PREWARM_ON_STARTUP": "0"})
+
+    runs = [run_once(args.module, env) for _ in range(args.repeat)]
+    seconds = [run["seconds"] for run in runs]
+    last = runs[-1]
+
+    print(f"{args.module}: 중앙값 {statistics.median(seconds) * 1000:.1f}ms, 최소 {min(seconds) * 1000:.1f}ms "
+          f"({args.repeat}회, Python {sys.version.split()[0]})")
+    print(f"import 후 로드된 무거운 의존성: {', '.join(last['heavy']) or '없음'}")
+    print(f"import 만으로 생긴 파일/디렉토리: {', '.join(last['created']) or '없음'}")
+    print(f"\n{'cumulative ms':>14}{'self ms':>10}  module")
+    for name, self_us, cumulative_us in sorted(last["modules"], key=lambda row: -row[2])[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f}{self_us / 1000:>10.1f}  {name}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                "module": args.module,
+                "seconds": seconds,
+                "heavy": last["heavy"],
+                "created": last["created"],
+                "modules": last["modules"],
+            }, f, indent=2)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
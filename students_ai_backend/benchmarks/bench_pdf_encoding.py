@@ -0,0 +1,69 @@
+# Information Extraction 요청 본문 생성 시 프로세스 최대 RSS 비교 벤치마크
+# 사용법: python -m students_ai_backend.benchmarks.bench_pdf_encoding [PDF 경로 ...]
+#   before: 기존 방식 (read → b64encode → decode → f-string → json.dumps)
+#   after : 스트리밍 방식 (mmap → 청크 base64 → 본문 generator)
+# 각 방식은 별도 프로세스에서 실행하여 ru_maxrss 증가량을 측정
+import os
+import sys
+import json
+import base64
+import resource
+import subprocess
+
+DEFAULT_PDFS = [
+    os.path.join(os.path.dirname(__file__), "..", "papers", "1.pdf"),
+    os.path.join(os.path.dirname(__file__), "..", "papers", "14.pdf"),
+]
+SCHEMA = {"name": "bench", "schema": {"type": "object", "properties": {"subsections": {"type": "array"}}}}
+
+
+def peak_rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_before(pdf_path):
+    with open(pdf_path, 'rb') as pdf_file:
+        base64_data = base64.b64encode(pdf_file.read()).decode('utf-8')
+    body = json.dumps({
+        "model": "information-extract",
+        "messages": [{"role": "user", "content": [
+            {"type": "image_url", "image_url": {"url": f"data:application/pdf;base64,{base64_data}"}}
+        ]}],
+        "response_format": {"type": "json_schema", "json_schema": SCHEMA}
+    }).encode('utf-8')
+    return len(body)
+
+
+def run_after(pdf_path):
+    from students_ai_backend.DP_IE import iter_extraction_request_body
+    # 실제 전송처럼 청크를 흘려보내기만 하고 보관하지 않음
+    return sum(len(chunk) for chunk in iter_extraction_request_body(pdf_path, SCHEMA))
+
+
+def child(mode, pdf_path):
+    if mode == "after":
+        import students_ai_backend.DP_IE  # noqa: F401  (import 비용은 측정에서 제외)
+    baseline = peak_rss_kb()
+    size = run_before(pdf_path) if mode == "before" else run_after(pdf_path)
+    print(json.dumps({"body_bytes": size, "rss_delta_kb": peak_rss_kb() - baseline}))
+
+
+def main(pdf_paths):
+    print(f"{'pdf':<12}{'size(MB)':>10}{'before(MB)':>12}{'after(MB)':>12}")
+    for pdf_path in pdf_paths:
+        row = {}
+        for mode in ("before", "after"):
+            out = subprocess.run(
+                [sys.executable, "-m", "students_ai_backend.benchmarks.bench_pdf_encoding", "--child", mode, pdf_path],
+                capture_output=True, text=True, check=True
+            ).stdout
+            row[mode] = json.loads(out)["rss_delta_kb"] / 1024
+        size_mb = os.path.getsize(pdf_path) / (1024 * 1024)
+        print(f"{os.path.basename(pdf_path):<12}{size_mb:>10.2f}{row['before']:>12.2f}{row['after']:>12.2f}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], sys.argv[3])
+    else:
+        main(sys.argv[1:] or DEFAULT_PDFS)
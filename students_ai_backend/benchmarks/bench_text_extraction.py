@@ -0,0 +1,106 @@
+# extract_text_and_id_maps 의 html → 텍스트 처리량 비교 벤치마크
+# 사용법: python -m students_ai_backend.benchmarks.bench_text_extraction [document-parse 응답 JSON ...]
+#   before: 요소마다 BeautifulSoup(html, "html.parser").get_text(separator=' ', strip=True)
+#   after : html_text.html_texts (정규식 태그 제거, 요소 묶음 처리)
+# 응답 JSON 을 주지 않으면 papers/ 의 PDF 를 로컬 파싱한 요소에 document-parse 형태의 표 요소
+# (html 표 + base64_encoding)를 섞어서 사용. 두 방식의 결과가 같은지도 함께 확인
+import os
+import sys
+import glob
+import json
+import time
+import base64
+
+from bs4 import BeautifulSoup
+
+from students_ai_backend.html_text import html_texts
+from students_ai_backend import local_parse
+
+PAPER_DIR = os.path.join(os.path.dirname(__file__), "..", "papers")
+REPEAT = 5
+
+# (html, 기대 결과): 정규식 태그 제거가 틀리기 쉬운 경우
+EDGE_CASES = [
+    ("<img alt='x > y'/> caption", "caption"),
+    ('<figure><img alt="a > b" src="data:image/png;base64,AAAA"/><figcaption>Fig. 1</figcaption></figure>', "Fig. 1"),
+    ("<p>a &lt; b &amp;&amp; c &gt; d</p>", "a < b && c > d"),
+    ("<!-- <p>hidden</p> --><p>shown</p>", "shown"),
+]
+
+
+def load_response_elements(paths):
+    elements = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            elements.extend(json.load(f).get("elements", []))
+    return elements
+
+
+def table_element(eid, page, rows=12, cols=6):
+    cells = "".join(
+        "<tr>" + "".join(f"<td>r{r}c{c} &amp; {r * c}</td>" for c in range(cols)) + "</tr>"
+        for r in range(rows)
+    )
+    return {
+        "id": eid,
+        "page": page,
+        "category": "table",
+        "content": {"html": f"<table id='{eid}' style='font-size:14px'>{cells}</table>", "markdown": "", "text": ""},
+        "base64_encoding": base64.b64encode(os.urandom(48 * 1024)).decode('ascii'),
+        "coordinates": [],
+    }
+
+
+def sample_elements():
+    elements = []
+    for pdf_path in sorted(glob.glob(os.path.join(PAPER_DIR, "*.pdf"))):
+        parsed, _ = local_parse.parse_pdf(pdf_path)
+        for el in parsed:
+            elements.append(el)
+            if el["id"] % 25 == 0:
+                elements.append(table_element(len(elements), el["page"]))
+    return elements
+
+
+def run_before(htmls):
+    return [BeautifulSoup(html, "html.parser").get_text(separator=' ', strip=True) for html in htmls]
+
+
+def run_after(htmls):
+    return html_texts(htmls)
+
+
+def measure(func, htmls):
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = func(htmls)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    paths = sys.argv[1:]
+    elements = load_response_elements(paths) if paths else sample_elements()
+    htmls = [el["content"]["html"] for el in elements if el.get("content", {}).get("html")]
+    size_mb = sum(len(html) for html in htmls) / 1024 / 1024
+    print(f"요소 {len(htmls)}개, html {size_mb:.1f}MB ({'응답 파일' if paths else 'papers/ 샘플'})")
+
+    before_time, before = measure(run_before, htmls)
+    after_time, after = measure(run_after, htmls)
+    mismatches = sum(1 for a, b in zip(before, after) if a != b)
+
+    edge_htmls = [html for html, _ in EDGE_CASES]
+    for (html, expected), bs_text, text in zip(EDGE_CASES, run_before(edge_htmls), run_after(edge_htmls)):
+        if not (text == bs_text == expected):
+            mismatches += 1
+            print(f"불일치: {html!r} → html_text {text!r}, BeautifulSoup {bs_text!r}, 기대값 {expected!r}")
+
+    print(f"before (BeautifulSoup): {before_time * 1000:8.1f}ms  {len(htmls) / before_time:10.0f} 요소/초")
+    print(f"after  (html_text)    : {after_time * 1000:8.1f}ms  {len(htmls) / after_time:10.0f} 요소/초")
+    print(f"속도 향상: {before_time / after_time:.1f}배, 결과 불일치: {mismatches}개")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+# 벤치마크용 로컬 Upstage / Perplexity 대역 서버
+# - document-parse, information-extract, solar chat(stream), Perplexity chat(stream/일반) 응답을 흉내냄
+# - information-extract 는 output_data/*_universal.json 에 저장된 실제 응답을 차례로 재생
+# - 호출마다 지연(latency ± jitter)과 일정 비율의 503 오류를 줄 수 있음
+import io
+import os
+import glob
+import json
+import time
+import random
+import threading
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+RECORDED_DIR = os.path.join(os.path.dirname(__file__), "..", "output_data")
+
+ANALYSIS_KEYS = [
+    "subsections_comments", "figures_comments", "equations_comments", "methods_comparison",
+    "metrics_comparison", "academic_improvements", "key_differences",
+]
+
+
+def load_recorded_extractions(pattern=os.path.join(RECORDED_DIR, "*_universal.json")):
+    responses = []
+    for path in sorted(glob.glob(pattern)):
+        with open(path, 'r', encoding='utf-8') as f:
+            responses.append(json.load(f))
+    return responses
+
+
+def mock_analysis():
+    analysis = {key: [f"Mock {key.replace('_', ' ')} {i}" for i in range(3)] for key in ANALYSIS_KEYS}
+    analysis["accept_probability"] = [42]
+    analysis["accept_probability_metrics"] = ["Mock minor critics: 2, major critics: 0"]
+    return analysis
+
+
+# 매칭 프롬프트의 후보 {id: 문장} 과 코멘트 목록을 읽어 {코멘트: 첫 번째 후보 id} 로 응답
+def mock_matches(prompt):
+    decoder = json.JSONDecoder()
+    try:
+        candidates, _ = decoder.raw_decode(prompt[prompt.index("{", prompt.index("ID입니다:")):])
+        comments, _ = decoder.raw_decode(prompt[prompt.index("[", prompt.index("코멘트들:")):])
+    except ValueError:
+        return {}
+    first = next(iter(candidates), None)
+    return {comment: first for comment in comments} if first is not None else {}
+
+
+def _count_pages(body):
+    start, end = body.find(b"%PDF"), body.rfind(b"%%EOF")
+    if start == -1 or end == -1:
+        return 1
+    try:
+        from pypdf import PdfReader
+        return len(PdfReader(io.BytesIO(body[start:end + 5])).pages)
+    except Exception:
+        return 1
+
+
+def _sse(chunks):
+    for chunk in chunks:
+        yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode('utf-8')
+    yield b"data: [DONE]\n\n"
+
+
+def _delta_chunks(text, model, piece=24):
+    for i in range(0, len(text), piece):
+        yield {
+            "id": "mock", "object": "chat.completion.chunk", "created": 0, "model": model,
+            "choices": [{"index": 0, "delta": {"content": text[i:i + piece]}, "finish_reason": None}]
+        }
+
+
+def _completion(text, model):
+    return {
+        "id": "mock", "object": "chat.completion", "created": 0, "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}]
+    }
+
+
+class MockUpstream:
+    def __init__(self, latency_ms=0, jitter_ms=0, error_rate=0.0, seed=None, parse_elements_per_page=12):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.parse_elements_per_page = parse_elements_per_page
+        self.random = random.Random(seed)
+        self.recorded = load_recorded_extractions()
+        self.calls = Counter()
+        self.errors = Counter()
+        self._lock = threading.Lock()
+        self._next_recorded = 0
+        self._servers = []
+
+    # --- 라우트별 응답 ---
+
+    def document_parse(self, body, payload):
+        elements = []
+        sentences = self._sentences()
+        for page in range(1, _count_pages(body) + 1):
+            for i in range(self.parse_elements_per_page):
+                eid = len(elements)
+                text = sentences[eid % len(sentences)]
+                elements.append({
+                    "id": eid, "page": page, "category": "paragraph",
+                    "content": {"html": f"<p id='{eid}' data-category='paragraph'>{text}</p>", "markdown": "", "text": ""},
+                    "coordinates": [
+                        {"x": 0.1, "y": 0.05 + i * 0.07}, {"x": 0.9, "y": 0.05 + i * 0.07},
+                        {"x": 0.9, "y": 0.1 + i * 0.07}, {"x": 0.1, "y": 0.1 + i * 0.07},
+                    ],
+                })
+        return 200, {"api": "2.0", "model": "document-parse", "elements": elements}
+
+    def information_extract(self, body, payload):
+        with self._lock:
+            response = self.recorded[self._next_recorded % len(self.recorded)]
+            self._next_recorded += 1
+        return 200, response
+
+    def solar_chat(self, body, payload):
+        text = json.dumps({"keywords": ["image recognition"], "min_year": 2015})
+        if payload.get("stream"):
+            return 200, _sse(_delta_chunks(text, "solar-pro"))
+        return 200, _completion(text, "solar-pro")
+
+    def perplexity_chat(self, body, payload):
+        prompt = payload["messages"][-1]["content"]
+        if "코멘트들" in prompt:
+            # run_perplexity 의 (보조) 매칭: 모든 코멘트를 첫 번째 후보 요소에 매칭
+            text = "```json\n" + json.dumps(mock_matches(prompt), ensure_ascii=False) + "\n```"
+        else:
+            text = "```json\n" + json.dumps(mock_analysis(), ensure_ascii=False, indent=2) + "\n```"
+        if payload.get("stream"):
+            return 200, _sse(_delta_chunks(text, "sonar"))
+        return 200, _completion(text, "sonar")
+
+    def _sentences(self):
+        sentences = []
+        for response in self.recorded:
+            try:
+                content = json.loads(response["choices"][0]["message"]["content"])
+            except (KeyError, IndexError, ValueError):
+                continue
+            for values in content.values():
+                if isinstance(values, list):
+                    sentences.extend(v for v in values if isinstance(v, str))
+        return sentences or ["Mock paragraph text."]
+
+    # --- 서버 ---
+
+    def routes(self):
+        return {
+            "/v1/document-digitization": ("document-parse", self.document_parse),
+            "/v1/information-extraction/chat/completions": ("information-extract", self.information_extract),
+            "/v1/chat/completions": ("solar-chat", self.solar_chat),
+            "/chat/completions": ("perplexity-chat", self.perplexity_chat),
+        }
+
+    def _delay(self):
+        delay = self.latency_ms + self.random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def handle(self, path, headers, body):
+        name, route = self.routes().get(path, (None, None))
+        if route is None:
+            return 404, {"error": f"unknown path {path}"}
+        with self._lock:
+            self.calls[name] += 1
+            fail = self.random.random() < self.error_rate
+        self._delay()
+        if fail:
+            with self._lock:
+                self.errors[name] += 1
+            return 503, {"error": "mock upstream error"}
+        payload = {}
+        if "application/json" in headers.get("Content-Type", ""):
+            payload = json.loads(body or b"{}")
+        return route(body, payload)
+
+    def start(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _read_body(self):
+                if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+                    # 스트리밍 업로드(iter_extraction_request_body)는 chunked 로 들어옴
+                    chunks = []
+                    while True:
+                        size = int(self.rfile.readline().split(b";")[0].strip(), 16)
+                        if size == 0:
+                            self.rfile.readline()
+                            return b"".join(chunks)
+                        chunks.append(self.rfile.read(size))
+                        self.rfile.readline()
+                return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+            def do_POST(self):
+                status, result = mock.handle(self.path, self.headers, self._read_body())
+                self.send_response(status)
+                if isinstance(result, dict):
+                    data = json.dumps(result, ensure_ascii=False).encode('utf-8')
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                    return
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for chunk in result:
+                    self.wfile.write(f"{len(chunk):x}\r\n".encode('ascii') + chunk + b"\r\n")
+                    self.wfile.flush()
+                self.wfile.write(b"0\r\n\r\n")
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self._servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    def stop(self):
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+
+    def snapshot(self):
+        with self._lock:
+            return {"calls": dict(self.calls), "errors": dict(self.errors)}
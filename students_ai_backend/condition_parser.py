@@ -0,0 +1,206 @@
+# /recommend 프롬프트의 추천 조건(min_year, max_year, journal_name, keywords, min_citation)을
+# 규칙 기반으로 빠르게 추출. 규칙으로 해석할 수 없는 프롬프트만 LLM(extract_conditions)으로 넘김
+import re
+import threading
+from collections import OrderedDict
+
+CONDITION_CACHE_SIZE = 1024
+# 규칙 처리 후 남은 단어가 이보다 많으면 키워드로 보기 어렵다고 판단하여 LLM 사용
+KEYWORD_MAX_WORDS = 5
+
+KNOWN_VENUES = [
+    "CVPR", "ICCV", "ECCV", "NeurIPS", "NIPS", "ICML", "ICLR", "AAAI", "IJCAI",
+    "ACL", "EMNLP", "NAACL", "COLING", "KDD", "WWW", "SIGIR", "CHI", "ICRA", "IROS",
+    "TPAMI", "IJCV", "JMLR", "TIP", "Nature", "Science",
+]
+
+# 일반 단어와 겹치는 학회/저널 이름: 대소문자까지 같고 학회/저널 문맥이 있을 때만 인정
+# ("computer science", "nature-inspired", "chi-square", "www" 등이 학회 조건이 되지 않도록)
+# 한 단어짜리 일반 단어 모양의 이름(Nature, Science, 카탈로그의 Access 등)도 같은 규칙 적용
+AMBIGUOUS_VENUES = {"WWW", "CHI", "TIP"}
+VENUE_CONTEXT_BEFORE = r"(?i:\b(?:published in|accepted (?:at|to|in)|appeared in|in|at|from)\s+)"
+VENUE_CONTEXT_AFTER = r"(?i:\s+(?:journal|conference|proceedings)\b|\s*에\s*(?:실린|발표된|게재된))"
+
+STOPWORDS = {
+    "paper", "papers", "article", "articles", "publication", "publications", "work", "works",
+    "find", "show", "give", "recommend", "recommendation", "recommendations", "suggest", "search",
+    "me", "please", "some", "any", "the", "a", "an", "of", "on", "about", "in", "for", "with",
+    "and", "or", "to", "from", "that", "which", "are", "is", "published", "related", "top", "best",
+    "citation", "citations", "cited", "year", "years", "than", "more", "at", "least",
+    "논문", "논문들", "논문을", "논문들을", "추천", "추천해줘", "추천해", "추천해주세요", "찾아줘", "찾아주세요",
+    "관련", "관련된", "에", "의", "을", "를", "이", "가", "은", "는", "좀", "보여줘", "주세요", "해줘",
+}
+
+YEAR = r"((?:19|20)\d{2})"
+NUMBER = r"(\d+(?:[.,]\d+)?\s*[kK]?)"
+
+# (패턴, 조건 생성 함수) — 위에서부터 적용하고 매칭된 부분은 프롬프트에서 제거
+YEAR_RULES = [
+    (rf"between\s+{YEAR}\s+and\s+{YEAR}", lambda a, b: {"min_year": int(a), "max_year": int(b)}),
+    (rf"{YEAR}\s*년?\s*(?:-|~|–|to|부터)\s*{YEAR}\s*년?(?:\s*(?:까지|사이))?", lambda a, b: {"min_year": int(a), "max_year": int(b)}),
+    (rf"(?:after|later than|newer than)\s+{YEAR}", lambda y: {"min_year": int(y) + 1}),
+    (rf"(?:since|from|starting)\s+{YEAR}|{YEAR}\s*(?:or later|and later|onwards|\+)", lambda a, b=None: {"min_year": int(a or b)}),
+    (rf"(?:before|earlier than|older than)\s+{YEAR}", lambda y: {"max_year": int(y) - 1}),
+    (rf"(?:until|up to|through|by)\s+{YEAR}|{YEAR}\s*(?:or earlier|and earlier)", lambda a, b=None: {"max_year": int(a or b)}),
+    (rf"{YEAR}\s*년?\s*(?:이후|부터)", lambda y: {"min_year": int(y)}),
+    (rf"{YEAR}\s*년?\s*(?:이전|까지)", lambda y: {"max_year": int(y)}),
+    (rf"(?:in\s+)?{YEAR}\s*년?", lambda y: {"min_year": int(y), "max_year": int(y)}),
+]
+
+CITATION_RULES = [
+    (rf"(?:>=?|over|above|more than|at least|minimum of|min\.?)\s*{NUMBER}\s*(?:\+\s*)?(?:citations?|cites?|cited)",
+     lambda n: {"min_citation": n}),
+    (rf"{NUMBER}\s*\+\s*(?:citations?|cites?)", lambda n: {"min_citation": n}),
+    (rf"(?:citations?|cited|cites?)\s*(?:>=?|over|above|more than|at least)\s*{NUMBER}", lambda n: {"min_citation": n}),
+    (rf"(?:인용|피인용)\s*(?:수)?\s*{NUMBER}\s*(?:회|번|건)?\s*(?:이상|넘는|초과)", lambda n: {"min_citation": n}),
+    (rf"{NUMBER}\s*(?:회|번|건)?\s*(?:이상|넘게)\s*(?:인용|피인용)", lambda n: {"min_citation": n}),
+]
+
+
+def _parse_number(text):
+    text = text.strip().replace(",", "")
+    if text[-1:] in ("k", "K"):
+        return int(float(text[:-1]) * 1000)
+    return int(float(text))
+
+
+# LLM 이 돌려준 조건을 저장소 필터가 쓰는 형식으로 정리
+# 숫자 조건은 "500+", "2020년", "1.5k" 같은 문자열에서 숫자만 읽고, 읽을 수 없는 값은 버림
+NUMERIC_CONDITIONS = ("min_year", "max_year", "min_citation")
+
+
+def coerce_conditions(conditions):
+    coerced = {}
+    for key in NUMERIC_CONDITIONS:
+        value = conditions.get(key)
+        if isinstance(value, bool):
+            continue
+        if isinstance(value, (int, float)):
+            coerced[key] = int(value)
+        elif isinstance(value, str):
+            match = re.search(NUMBER, value)
+            if match:
+                coerced[key] = _parse_number(match.group(1))
+    journal_name = conditions.get("journal_name")
+    if isinstance(journal_name, str) and journal_name.strip():
+        coerced["journal_name"] = journal_name.strip()
+    keywords = conditions.get("keywords")
+    if isinstance(keywords, str):
+        keywords = [keywords]
+    if isinstance(keywords, list):
+        keywords = [k.strip() for k in keywords if isinstance(k, str) and k.strip()]
+        if keywords:
+            coerced["keywords"] = keywords
+    return coerced
+
+
+# 캐시 키: 공백만 정리 (애매한 학회 이름은 대소문자로 구분하므로 대소문자는 유지)
+def _normalize(prompt):
+    return " ".join(prompt.split())
+
+
+def is_ambiguous_venue(venue):
+    venue = venue.strip()
+    return venue in AMBIGUOUS_VENUES or (" " not in venue and (venue.istitle() or venue.islower()))
+
+
+# 프롬프트에서 학회/저널 이름 찾기 (긴 이름 우선): (이름, 매칭) / 애매한 이름만 있으면 (None, "ambiguous")
+def _match_venue(text, venues):
+    ambiguous = False
+    for venue in sorted(set(venues) | set(KNOWN_VENUES), key=len, reverse=True):
+        token = rf"(?<![\w-]){re.escape(venue)}(?![\w-])"
+        if not is_ambiguous_venue(venue):
+            match = re.search(token, text, flags=re.IGNORECASE)
+            if match:
+                return venue, match
+            continue
+        match = re.search(rf"{VENUE_CONTEXT_BEFORE}{token}|{token}{VENUE_CONTEXT_AFTER}", text)
+        if match:
+            return venue, match
+        ambiguous = ambiguous or re.search(token, text) is not None
+    return None, ("ambiguous" if ambiguous else None)
+
+
+# 규칙 기반 조건 추출. 해석할 수 없으면 None 반환
+def parse_conditions(prompt, venues=()):
+    text = f" {prompt} "
+    conditions = {}
+
+    # 인용 수를 먼저 처리 ("2000 citations" 가 연도로 해석되지 않도록)
+    for pattern, build in CITATION_RULES:
+        match = re.search(pattern, text, flags=re.IGNORECASE)
+        if match:
+            conditions.update({key: _parse_number(value) for key, value in build(match.group(1)).items()})
+            text = text[:match.start()] + " " + text[match.end():]
+            break
+
+    for pattern, build in YEAR_RULES:
+        match = re.search(pattern, text, flags=re.IGNORECASE)
+        if match:
+            conditions.update(build(*[g for g in match.groups() if g is not None]))
+            text = text[:match.start()] + " " + text[match.end():]
+            break
+
+    # 카탈로그/알려진 학회 이름 매칭
+    # 문맥 없이 대문자로 쓴 애매한 이름("Nature papers on ...")은 학회인지 키워드인지 LLM 에 맡김
+    venue, match = _match_venue(text, venues)
+    if match == "ambiguous":
+        return None
+    if venue:
+        conditions["journal_name"] = venue
+        text = text[:match.start()] + " " + text[match.end():]
+
+    words = [w for w in re.findall(r"[\w\-]+", text) if w.lower() not in STOPWORDS]
+    # 처리되지 않은 숫자가 남아 있으면 규칙이 놓친 조건이 있을 수 있음
+    if any(re.search(r"\d", w) for w in words) or len(words) > KEYWORD_MAX_WORDS:
+        return None
+    if words:
+        conditions["keywords"] = [" ".join(words)]
+    return conditions
+
+
+class ConditionResolver:
+    def __init__(self, llm_extract, venues_loader=None, cache_size=CONDITION_CACHE_SIZE):
+        self.llm_extract = llm_extract
+        self.venues_loader = venues_loader
+        self.cache_size = cache_size
+        self._venues = None
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self.stats = {"cache_hits": 0, "local": 0, "llm_fallback": 0}
+
+    def venues(self):
+        if self._venues is None:
+            try:
+                self._venues = sorted(set(self.venues_loader())) if self.venues_loader else []
+            except Exception as e:
+                print("⚠️ 학회 목록 로드 실패:", e)
+                self._venues = []
+        return self._venues
+
+    def resolve(self, prompt):
+        key = _normalize(prompt)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.stats["cache_hits"] += 1
+                return dict(self._cache[key])
+
+        conditions = parse_conditions(prompt, self.venues())
+        source = "local"
+        if conditions is None:
+            conditions = coerce_conditions(self.llm_extract(prompt))
+            source = "llm_fallback"
+
+        with self._lock:
+            self.stats[source] += 1
+            self._cache[key] = conditions
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return dict(conditions)
+
+    # 캐시 미스 중 LLM 을 호출한 비율
+    def fallback_rate(self):
+        with self._lock:
+            resolved = self.stats["local"] + self.stats["llm_fallback"]
+            return self.stats["llm_fallback"] / resolved if resolved else 0.0
@@ -0,0 +1,39 @@
+# 서비스 설정 (API 키, 업스트림 주소, 작업 디렉토리)
+# .env 는 이 모듈을 처음 import 할 때 한 번만 읽음
+# 환경 변수를 읽는 모듈은 모두 이 모듈의 env / env_flag / config 를 통해 읽으므로, 어느 진입점(app, uploader, db_init, corpus_warmup)에서 실행해도 .env 값이 반영됨
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+# 모듈별 설정은 os.getenv 대신 이 함수로 읽음 (이 모듈을 import 하면 .env 가 먼저 반영됨)
+def env(name, default=None):
+    return os.getenv(name, default)
+
+
+def env_flag(name, default=""):
+    return env(name, default).lower() in ("1", "true", "yes")
+
+
+class Config:
+    def __init__(self):
+        # API 키 / 업스트림 주소 (벤치마크에서는 대역 서버 주소로 바꿔서 사용)
+        self.upstage_api_key = os.getenv("UPSTAGE_API_KEY")
+        self.perplexity_api_key = os.getenv("PERPLEXITY_API_KEY")
+        self.upstage_base_url = os.getenv("UPSTAGE_BASE_URL", "https://api.upstage.ai/v1")
+        self.perplexity_base_url = os.getenv("PERPLEXITY_BASE_URL", "https://api.perplexity.ai")
+
+        # 디렉토리 경로 (실행 위치 기준 상대 경로, import 시점에는 만들지 않고 쓸 때 생성)
+        self.ref_dir = "ref_pdfs"
+        self.paper_dir = "papers"
+        self.input_dir = "input_pdfs"
+        self.preview_data_dir = "output_data"
+        self.static_pdf_dir = os.path.join("static", "pdfs")
+
+        # 시작 시 백그라운드 작업
+        self.warmup_on_startup = env_flag("WARMUP_ON_STARTUP")
+        self.prewarm_on_startup = env_flag("PREWARM_ON_STARTUP")
+
+
+config = Config()
@@ -0,0 +1,116 @@
+# papers/ 전체 논문을 미리 Information Extraction 하여 캐시와 output_data/ 를 채움
+# /universal-extraction 요청에서는 사용자의 초안만 추출 비용을 내도록 하기 위함
+# - 설정된 스키마(들)에 대해 모든 PDF 를 추출, 이미 캐시된 (PDF, 스키마) 조합은 건너뜀 (중단 후 재실행 시 이어서 진행)
+# - 동시 실행 수 제한 + 분당 호출 수 제한
+# 사용법: python -m students_ai_backend.corpus_warmup [--schema 경로 ...] [--workers N] [--rate 분당호출수]
+#   실행 중인 서버와 같은 디렉토리에서 돌리면 서버도 재시작 없이 바로 캐시를 사용함
+#   (extraction_cache 는 인덱스에 없는 키를 디스크에서 찾아 가져옴)
+import os
+import glob
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from students_ai_backend.config import env
+from students_ai_backend.DP_IE import process_universal_extraction, PAPER_DIR
+from students_ai_backend.extraction_cache import extraction_cache
+
+WARMUP_SCHEMA_PATHS = env(
+    "WARMUP_SCHEMA_PATHS",
+    os.path.join(os.path.dirname(__file__), "schemas", "academic_paper_analysis_schema.json")
+).split(",")
+WARMUP_MAX_WORKERS = int(env("WARMUP_MAX_WORKERS", 2))
+WARMUP_RATE_PER_MINUTE = float(env("WARMUP_RATE_PER_MINUTE", 20))
+
+_status_lock = threading.Lock()
+_status = {"state": "idle", "total": 0, "done": 0, "skipped": 0, "failed": 0}
+_background = None
+
+
+class RateLimiter:
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def load_schemas(paths=WARMUP_SCHEMA_PATHS):
+    schemas = []
+    for path in paths:
+        with open(path.strip(), 'r', encoding='utf-8') as f:
+            schemas.append(json.load(f))
+    return schemas
+
+
+def warmup_status():
+    with _status_lock:
+        return dict(_status)
+
+
+def _record(key):
+    with _status_lock:
+        _status[key] += 1
+        finished = _status["done"] + _status["skipped"] + _status["failed"]
+        print(f"🔥 사전 추출 진행: {finished}/{_status['total']} "
+              f"(추출 {_status['done']}, 건너뜀 {_status['skipped']}, 실패 {_status['failed']})")
+
+
+def _extract(pdf_path, schema, limiter):
+    if extraction_cache.contains(extraction_cache.make_key(pdf_path, schema)):
+        _record("skipped")
+        return
+    limiter.wait()
+    result = process_universal_extraction(pdf_path, schema)
+    if result.get("status") == "success":
+        _record("done")
+    else:
+        print(f"❌ 사전 추출 실패: {pdf_path}: {result.get('error')}")
+        _record("failed")
+
+
+def run_warmup(schemas=None, max_workers=WARMUP_MAX_WORKERS, rate_per_minute=WARMUP_RATE_PER_MINUTE):
+    schemas = schemas if schemas is not None else load_schemas()
+    pdf_paths = sorted(glob.glob(os.path.join(PAPER_DIR, "*.pdf")))
+    tasks = [(pdf_path, schema) for schema in schemas for pdf_path in pdf_paths]
+    with _status_lock:
+        _status.update(state="running", total=len(tasks), done=0, skipped=0, failed=0)
+
+    limiter = RateLimiter(rate_per_minute)
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="warmup") as pool:
+        for future in [pool.submit(_extract, pdf_path, schema, limiter) for pdf_path, schema in tasks]:
+            future.result()
+
+    with _status_lock:
+        _status["state"] = "finished"
+    return warmup_status()
+
+
+# 서버 시작 후 백그라운드 스레드에서 사전 추출 (한 번만 실행)
+def start_background():
+    global _background
+    with _status_lock:
+        if _background is not None:
+            return
+        _background = threading.Thread(target=run_warmup, name="corpus-warmup", daemon=True)
+    _background.start()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="papers/ 논문 사전 Information Extraction")
+    parser.add_argument("--schema", action="append", help="스키마 JSON 파일 경로 (여러 번 지정 가능)")
+    parser.add_argument("--workers", type=int, default=WARMUP_MAX_WORKERS)
+    parser.add_argument("--rate", type=float, default=WARMUP_RATE_PER_MINUTE, help="분당 최대 호출 수")
+    args = parser.parse_args()
+
+    result = run_warmup(load_schemas(args.schema or WARMUP_SCHEMA_PATHS), args.workers, args.rate)
+    print(f"✅ 사전 추출 완료: {result}")
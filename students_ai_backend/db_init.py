@@ -1,37 +1,8 @@
-import pandas as pd
-import pymysql
-
-# 엑셀 파일을 pandas로 읽기
-file_path = 'papers/paper_inf.xlsx'
-df = pd.read_excel(file_path)
-
-# MySQL 데이터베이스 연결
-conn = pymysql.connect(
-    host='localhost',
-    user='root',
-    password='1234'
-)
-
-cursor = conn.cursor()
-cursor.execute("CREATE DATABASE IF NOT EXISTS papers")
-conn.select_db('papers')
-
-# 테이블이 없다면 테이블 생성 (엑셀 컬럼에 맞는 테이블 구조로 생성)
-create_table_query = """
-CREATE TABLE IF NOT EXISTS papers (
-    paper_id INT PRIMARY KEY,
-    title VARCHAR(255),
-    publications VARCHAR(255),
-    date INT,
-    h5 INT,
-    citations INT,
-    keyword TEXT,
-    index_term TEXT,
-    file_path VARCHAR(255)
-)
-"""
-cursor.execute(create_table_query)
-print(cursor.execute("SELECT * FROM papers"))
-conn.commit()
-cursor.close()
-conn.close()
\ No newline at end of file
+from students_ai_backend.config import config  # noqa: F401  (.env 의 DB 접속 정보 / PAPER_DB_BACKEND 를 먼저 읽음)
+from students_ai_backend.paper_store import get_store
+
+# papers 데이터베이스 / 테이블 / 인덱스 생성
+# (PAPER_DB_BACKEND=sqlite 이면 MySQL 없이 로컬 SQLite 파일 사용)
+store = get_store()
+store.init_schema()
+print(store.execute("SELECT COUNT(*) AS n FROM papers")[0]["n"])
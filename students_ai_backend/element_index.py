@@ -0,0 +1,127 @@
+# 문서 요소 임베딩 인덱스 (id_to_coord 와 같은 작업 공간에 저장)
+#   element_vectors.npy : (n, dim) 정규화된 요소 임베딩 (기본 float16)
+#   element_meta.npy    : (n,) 구조화 배열 [id, page, coords(4x2)]
+#   element_source.json : 인덱스를 만든 text_to_id / id_to_coord 의 해시 (다르면 다시 생성)
+# np.load(mmap_mode='r') 로 필요할 때만 읽고, 문서 해시(doc_id) 기준으로 메모리에 캐시
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+from students_ai_backend.config import env
+from students_ai_backend import workspace
+from students_ai_backend.source_matcher import embed_texts
+
+ELEMENT_VECTORS = "element_vectors.npy"
+ELEMENT_META = "element_meta.npy"
+ELEMENT_SOURCE = "element_source.json"
+ELEMENT_INDEX_DTYPE = env("ELEMENT_INDEX_DTYPE", "float16")
+ELEMENT_INDEX_CACHE_DOCS = int(env("ELEMENT_INDEX_CACHE_DOCS", 32))
+
+META_DTYPE = [("id", "U32"), ("page", "i4"), ("coords", "f4", (4, 2))]
+
+_cache = OrderedDict()   # doc_id → ElementIndex
+_cache_lock = threading.Lock()
+
+
+class ElementIndex:
+    def __init__(self, vectors, meta, source=None):
+        self.vectors = vectors
+        self.meta = meta
+        self.source = source
+        self.ids = [str(eid) for eid in meta["id"]]
+
+    def __len__(self):
+        return len(self.ids)
+
+
+# Upstage 좌표 [{x, y} x 4] → (4, 2) 배열 (형식이 다르면 0 으로 채움)
+def _coords_array(coordinates):
+    import numpy as np
+    coords = np.zeros((4, 2), dtype=np.float32)
+    for i, point in enumerate((coordinates or [])[:4]):
+        if isinstance(point, dict):
+            coords[i] = (point.get("x", 0), point.get("y", 0))
+    return coords
+
+
+def _save_npy(doc_id, name, array):
+    import numpy as np
+    path = workspace.artifact_path(doc_id, name)
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+# 인덱스를 만든 매핑의 해시 (문서를 다시 파싱해 매핑이 바뀌면 달라짐)
+def source_digest(text_to_id, id_to_coord):
+    canonical = json.dumps([text_to_id, id_to_coord], ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def _read_source(doc_id):
+    try:
+        return workspace.read_json(doc_id, ELEMENT_SOURCE)
+    except (OSError, ValueError):
+        return None
+
+
+# 매핑을 다시 쓰기 전에 호출: 저장된 인덱스와 메모리 캐시를 버림
+def invalidate(doc_id):
+    with _cache_lock:
+        _cache.pop(doc_id, None)
+    for name in (ELEMENT_SOURCE, ELEMENT_META, ELEMENT_VECTORS):
+        try:
+            os.remove(workspace.artifact_path(doc_id, name))
+        except FileNotFoundError:
+            pass
+
+
+# text_to_id / id_to_coord 로부터 인덱스를 만들어 작업 공간에 저장
+def build_index(doc_id, text_to_id, id_to_coord):
+    import numpy as np
+    texts = list(text_to_id.keys())
+    meta = np.zeros(len(texts), dtype=META_DTYPE)
+    for i, text in enumerate(texts):
+        eid = str(text_to_id[text])
+        coord = id_to_coord.get(eid, {})
+        meta[i] = (eid, coord.get("page") or 0, _coords_array(coord.get("coordinates")))
+    vectors = embed_texts(texts).astype(ELEMENT_INDEX_DTYPE)
+
+    os.makedirs(workspace.workspace_dir(doc_id), exist_ok=True)
+    _save_npy(doc_id, ELEMENT_META, meta)
+    _save_npy(doc_id, ELEMENT_VECTORS, vectors)
+    # 해시는 마지막에 기록 (중간에 실패하면 해시가 없거나 달라서 다음 사용 시 다시 생성)
+    workspace.write_json(doc_id, ELEMENT_SOURCE, source_digest(text_to_id, id_to_coord))
+    with _cache_lock:
+        _cache.pop(doc_id, None)
+    return load_index(doc_id)
+
+
+def load_index(doc_id):
+    import numpy as np
+    with _cache_lock:
+        if doc_id in _cache:
+            _cache.move_to_end(doc_id)
+            return _cache[doc_id]
+    index = ElementIndex(
+        np.load(workspace.artifact_path(doc_id, ELEMENT_VECTORS), mmap_mode='r'),
+        np.load(workspace.artifact_path(doc_id, ELEMENT_META), mmap_mode='r'),
+        _read_source(doc_id)
+    )
+    with _cache_lock:
+        _cache[doc_id] = index
+        while len(_cache) > ELEMENT_INDEX_CACHE_DOCS:
+            _cache.popitem(last=False)
+    return index
+
+
+# 저장된 인덱스가 현재 매핑으로 만든 것이면 그대로 사용하고, 없거나 오래된 것이면 새로 생성
+def get_index(doc_id, text_to_id, id_to_coord):
+    if workspace.exists(doc_id, ELEMENT_VECTORS) and workspace.exists(doc_id, ELEMENT_META):
+        index = load_index(doc_id)
+        if index.source == source_digest(text_to_id, id_to_coord):
+            return index
+    return build_index(doc_id, text_to_id, id_to_coord)
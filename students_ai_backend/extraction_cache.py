@@ -0,0 +1,187 @@
+# Information Extraction 결과 캐시
+# PDF 바이트의 SHA-256 + 정규화된 스키마의 SHA-256 을 키로 사용 (파일 이름과 무관)
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+from students_ai_backend.config import config, env
+
+# 캐시 설정 (환경 변수로 조정 가능)
+EXTRACTION_CACHE_DIR = env("EXTRACTION_CACHE_DIR", os.path.join(config.preview_data_dir, "cache"))
+EXTRACTION_CACHE_MAX_BYTES = int(env("EXTRACTION_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+EXTRACTION_CACHE_HOT_ENTRIES = int(env("EXTRACTION_CACHE_HOT_ENTRIES", 64))
+# 다른 프로세스가 쓴 항목을 반영하려고 디렉토리를 다시 읽는 간격(초) (용량 초과 시에는 바로 다시 읽음)
+EXTRACTION_CACHE_RESCAN_SECONDS = float(env("EXTRACTION_CACHE_RESCAN_SECONDS", 30))
+# hot tier 히트 시 파일 mtime 갱신 간격(초) (다른 프로세스가 보는 LRU 순서용, 히트마다 syscall 하지 않도록)
+EXTRACTION_CACHE_TOUCH_SECONDS = float(env("EXTRACTION_CACHE_TOUCH_SECONDS", 60))
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+# 파일 내용을 청크 단위로 읽어 SHA-256 계산
+def file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# 키 순서/공백과 무관하게 같은 스키마는 같은 해시가 나오도록 정규화
+def schema_sha256(schema):
+    canonical = json.dumps(schema, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class ExtractionCache:
+    def __init__(self, cache_dir=EXTRACTION_CACHE_DIR, max_bytes=EXTRACTION_CACHE_MAX_BYTES,
+                 hot_entries=EXTRACTION_CACHE_HOT_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hot_entries = hot_entries
+        self._lock = threading.Lock()
+        self._hot = OrderedDict()      # 메모리 hot tier: key → result
+        self._disk = OrderedDict()     # 디스크 인덱스: key → 파일 크기 (오래 안 쓴 순서)
+        self._disk_bytes = 0
+        self._access = {}              # key → 이 프로세스에서 마지막으로 사용한 시각 (mtime 보다 최신일 수 있음)
+        self._scanned_at = 0.0
+        self.stats = {"hot_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        self._load_index()
+
+    # 디스크에 있는 항목을 마지막 접근 시각 순서로 다시 읽음
+    # 다른 프로세스(gunicorn 워커, corpus_warmup CLI)가 쓴 항목도 포함 (디렉토리는 처음 저장할 때 생성)
+    # 접근 시각은 파일 mtime 과 이 프로세스의 메모리 기록 중 최신 값 (hot tier 히트가 LRU 순서에서 빠지지 않도록)
+    def _load_index(self):
+        entries = []
+        if os.path.isdir(self.cache_dir):
+            for fname in os.listdir(self.cache_dir):
+                if not fname.endswith('.json'):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, fname))
+                except OSError:
+                    # 다른 프로세스가 방금 삭제한 항목
+                    continue
+                key = fname[:-len('.json')]
+                entries.append((max(stat.st_mtime, self._access.get(key, 0)), key, stat.st_size))
+        self._disk = OrderedDict((key, size) for _, key, size in sorted(entries))
+        self._disk_bytes = sum(self._disk.values())
+        self._access = {key: at for key, at in self._access.items() if key in self._disk}
+        self._scanned_at = time.time()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.json')
+
+    def make_key(self, file_path, schema):
+        return f'{file_sha256(file_path)}_{schema_sha256(schema)[:16]}'
+
+    # 사용 시각 기록, 파일 mtime 은 EXTRACTION_CACHE_TOUCH_SECONDS 마다만 갱신
+    def _touch(self, key, now=None):
+        now = now or time.time()
+        if now - self._access.get(key, 0) >= EXTRACTION_CACHE_TOUCH_SECONDS:
+            try:
+                os.utime(self._path(key), (now, now))
+            except OSError:
+                pass
+        self._access[key] = now
+
+    def _remember(self, key, result):
+        self._hot[key] = result
+        self._hot.move_to_end(key)
+        while len(self._hot) > self.hot_entries:
+            self._hot.popitem(last=False)
+
+    # 히트/미스 통계에 영향 없이 캐시 보유 여부만 확인
+    def contains(self, key):
+        with self._lock:
+            return key in self._hot or key in self._disk or os.path.exists(self._path(key))
+
+    def get(self, key):
+        with self._lock:
+            if key in self._hot:
+                self._hot.move_to_end(key)
+                if key in self._disk:
+                    self._disk.move_to_end(key)
+                    self._touch(key)
+                self.stats["hot_hits"] += 1
+                return self._hot[key]
+            path = self._path(key)
+            if key not in self._disk:
+                # 인덱스에 없어도 다른 프로세스가 저장한 파일이 있으면 가져와서 사용
+                try:
+                    size = os.path.getsize(path)
+                except OSError:
+                    self.stats["misses"] += 1
+                    return None
+                self._disk[key] = size
+                self._disk_bytes += size
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    result = json.load(f)
+            except (OSError, ValueError):
+                # 손상되었거나 외부에서 삭제된 항목은 미스로 처리
+                self._disk_bytes -= self._disk.pop(key)
+                self.stats["misses"] += 1
+                return None
+            self._disk.move_to_end(key)
+            self._access[key] = 0
+            self._touch(key)
+            self._remember(key, result)
+            self.stats["disk_hits"] += 1
+            return result
+
+    def put(self, key, result):
+        data = json.dumps(result, ensure_ascii=False).encode('utf-8')
+        with self._lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(key)
+            tmp_path = f'{path}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            if key in self._disk:
+                self._disk_bytes -= self._disk.pop(key)
+            self._disk[key] = len(data)
+            self._disk_bytes += len(data)
+            self._access[key] = time.time()
+            self._remember(key, result)
+            self._evict()
+
+    def delete(self, key):
+        with self._lock:
+            self._hot.pop(key, None)
+            self._access.pop(key, None)
+            if key in self._disk:
+                self._disk_bytes -= self._disk.pop(key)
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    # 용량 초과 시 가장 오래 사용하지 않은 항목부터 삭제 (LRU)
+    # 용량은 프로세스별 계산이 아니라 디렉토리 전체 기준: 이 프로세스 기준으로 초과했거나
+    # 마지막으로 읽은 지 EXTRACTION_CACHE_RESCAN_SECONDS 가 지났으면 디렉토리를 다시 읽어 다른 프로세스가 쓴 항목도 포함
+    def _evict(self):
+        if self._disk_bytes > self.max_bytes or time.time() - self._scanned_at >= EXTRACTION_CACHE_RESCAN_SECONDS:
+            self._load_index()
+        while self._disk_bytes > self.max_bytes and len(self._disk) > 1:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self._hot.pop(key, None)
+            self._access.pop(key, None)
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            self.stats["evictions"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats, entries=len(self._disk), bytes=self._disk_bytes)
+
+
+# 메인 논문과 참조 논문 추출이 공유하는 기본 캐시
+extraction_cache = ExtractionCache()
@@ -0,0 +1,42 @@
+# document-parse 요소 html 에서 텍스트만 빠르게 추출
+# BeautifulSoup(html, "html.parser").get_text(separator=' ', strip=True) 와 같은 결과를
+# 트리를 만들지 않고 태그 제거 정규식 한 번으로 만듦 (태그 속성 안의 base64 이미지 등은 복사하지 않고 건너뜀)
+import re
+from html import unescape
+
+# 시작/종료 태그, 주석, 선언 (html.parser 가 태그로 보는 형태만: '<' 다음이 글자, '/', '!', '?')
+# 따옴표로 감싼 속성값 안의 '>' 는 태그 끝으로 보지 않음 (예: <img alt='x > y'/>)
+_TAG = re.compile(r"""<!--.*?-->|<[A-Za-z/!?](?:"[^"]*"|'[^']*'|[^'">])*>""", re.DOTALL)
+# 여러 요소를 한 번에 처리할 때 요소 경계 표시 (html 에 나오지 않는 문자)
+_ELEMENT_SEP = "\x00"
+_NODE_SEP = "\x01"
+
+HTML_TEXT_BATCH_SIZE = 256
+
+
+def _join_nodes(stripped):
+    parts = []
+    for node in stripped.split(_NODE_SEP):
+        if "&" in node:
+            node = unescape(node)
+        node = node.strip()
+        if node:
+            parts.append(node)
+    return " ".join(parts)
+
+
+def html_to_text(html):
+    return _join_nodes(_TAG.sub(_NODE_SEP, html))
+
+
+# 여러 html 을 묶어서 정규식 한 번으로 처리
+def html_texts(htmls, batch_size=HTML_TEXT_BATCH_SIZE):
+    texts = []
+    for start in range(0, len(htmls), batch_size):
+        batch = htmls[start:start + batch_size]
+        if any(_ELEMENT_SEP in html for html in batch):
+            texts.extend(html_to_text(html) for html in batch)
+            continue
+        stripped = _TAG.sub(_NODE_SEP, _ELEMENT_SEP.join(batch))
+        texts.extend(_join_nodes(part) for part in stripped.split(_ELEMENT_SEP))
+    return texts
@@ -0,0 +1,201 @@
+# Upstage / Perplexity 호출이 공유하는 HTTP 클라이언트
+# - 호스트별 keep-alive 커넥션 풀 (requests.Session)
+# - 기본 타임아웃, 429/5xx 와 연결 실패에 대한 지수 백오프 + 지터 재시도
+#   (읽기 타임아웃은 서버가 이미 요청을 처리 중일 수 있으므로 POST 중복 실행을 막기 위해 재시도하지 않음)
+# - 호스트별 서킷 브레이커 (연속 실패 시 일정 시간 호출 차단)
+import time
+import random
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from students_ai_backend.config import env
+from students_ai_backend import metrics
+
+HTTP_CONNECT_TIMEOUT = float(env("HTTP_CONNECT_TIMEOUT", 5))
+HTTP_READ_TIMEOUT = float(env("HTTP_READ_TIMEOUT", 120))
+HTTP_POOL_SIZE = int(env("HTTP_POOL_SIZE", 16))
+HTTP_MAX_RETRIES = int(env("HTTP_MAX_RETRIES", 3))
+HTTP_BACKOFF_BASE = float(env("HTTP_BACKOFF_BASE", 0.5))
+HTTP_BACKOFF_MAX = float(env("HTTP_BACKOFF_MAX", 8))
+CIRCUIT_FAILURE_THRESHOLD = int(env("CIRCUIT_FAILURE_THRESHOLD", 5))
+CIRCUIT_RESET_SECONDS = float(env("CIRCUIT_RESET_SECONDS", 30))
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, host, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, reset_seconds=CIRCUIT_RESET_SECONDS):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+
+    # 열린 상태면 차단, reset_seconds 가 지나면 half-open 으로 한 번 시도 허용
+    def before_call(self):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at < self.reset_seconds:
+                raise CircuitOpenError(f"{self.host} 서킷이 열려 있어 호출을 차단합니다")
+            self._opened_at = time.monotonic()
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+_lock = threading.Lock()
+_sessions = {}
+_breakers = {}
+_openai_clients = {}
+
+
+def _host(url):
+    return urlsplit(url).netloc
+
+
+def get_session(url):
+    host = _host(url)
+    with _lock:
+        if host not in _sessions:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[host] = session
+        return _sessions[host]
+
+
+def get_breaker(url):
+    host = _host(url)
+    with _lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker(host)
+        return _breakers[host]
+
+
+def backoff_delay(attempt, retry_after=None):
+    if retry_after is not None:
+        try:
+            return min(float(retry_after), HTTP_BACKOFF_MAX)
+        except ValueError:
+            pass
+    # full jitter: 0 ~ base * 2^attempt
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** attempt)))
+
+
+# 재시도 전에 업로드 파일 포인터를 처음으로 되돌림
+def _rewind(files):
+    for value in (files or {}).values():
+        fileobj = value[1] if isinstance(value, tuple) else value
+        if hasattr(fileobj, "seek"):
+            fileobj.seek(0)
+
+
+# data 가 callable 이면 시도마다 새로 생성 (generator 본문은 한 번만 소비 가능하기 때문)
+def request(method, url, timeout=None, max_retries=HTTP_MAX_RETRIES, data=None, files=None, **kwargs):
+    session = get_session(url)
+    breaker = get_breaker(url)
+    timeout = timeout or (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+    host = _host(url)
+    for attempt in range(max_retries + 1):
+        try:
+            breaker.before_call()
+        except CircuitOpenError:
+            metrics.inc("upstream_circuit_rejections", help="서킷이 열려 차단된 업스트림 호출 수", host=host)
+            raise
+        if attempt > 0:
+            _rewind(files)
+            metrics.inc("upstream_retries", help="업스트림 재시도 횟수", host=host)
+        body = data() if callable(data) else data
+        start = time.perf_counter()
+        try:
+            response = session.request(method, url, timeout=timeout, data=body, files=files, **kwargs)
+        except requests.ConnectionError as e:
+            # ConnectTimeout 도 ConnectionError 의 하위 클래스 (요청이 서버에 전달되지 않은 경우만 재시도)
+            _observe(host, start, type(e).__name__)
+            breaker.record_failure()
+            if attempt == max_retries:
+                raise
+            time.sleep(backoff_delay(attempt))
+            continue
+        except requests.Timeout as e:
+            _observe(host, start, type(e).__name__)
+            breaker.record_failure()
+            raise
+
+        _observe(host, start, response.status_code)
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        if response.status_code not in RETRY_STATUS or attempt == max_retries:
+            return response
+        # stream=True 응답은 닫아야 커넥션이 풀로 돌아감
+        response.close()
+        time.sleep(backoff_delay(attempt, response.headers.get("Retry-After")))
+    return response
+
+
+# 업스트림 호출 1회의 소요 시간 (stream=True 면 응답 헤더를 받을 때까지)과 실패 집계
+def _observe(host, start, status):
+    metrics.observe("upstream_request_seconds", time.perf_counter() - start,
+                    help="업스트림 HTTP 호출 소요 시간", host=host, status=status)
+    if not isinstance(status, int) or status >= 400:
+        metrics.inc("upstream_failures", help="실패한 업스트림 호출 수", host=host, status=status)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+# OpenAI SDK 호출용: 서킷 브레이커만 적용 (재시도/타임아웃은 SDK 클라이언트 설정 사용)
+@contextmanager
+def circuit(url):
+    breaker = get_breaker(url)
+    breaker.before_call()
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        _observe(_host(url), start, type(e).__name__)
+        breaker.record_failure()
+        raise
+    _observe(_host(url), start, 200)
+    breaker.record_success()
+
+
+# base_url 별로 하나의 OpenAI 클라이언트를 재사용 (내부 httpx 커넥션 풀 공유)
+def get_openai_client(api_key, base_url):
+    from openai import OpenAI
+    with _lock:
+        if base_url not in _openai_clients:
+            _openai_clients[base_url] = OpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                timeout=HTTP_READ_TIMEOUT,
+                max_retries=HTTP_MAX_RETRIES
+            )
+        return _openai_clients[base_url]
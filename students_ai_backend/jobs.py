@@ -0,0 +1,228 @@
+# 백그라운드 작업 큐 (외부 브로커 없이 로컬 SQLite 파일 사용)
+# 엔드포인트는 작업을 등록하고 job id 를 바로 반환하고, 워커 스레드가 파이프라인을 실행
+# 실행 중인 작업은 워커 프로세스 ID + heartbeat 로 임대(lease)하여, 임대가 만료된 작업(실행하던 프로세스가 죽은 경우)만
+# 다시 대기열로 돌림 (여러 웹 워커 프로세스가 같은 DB 를 써도 살아있는 작업을 중복 실행하지 않음)
+# 워커 스레드는 import 시점이 아니라 처음 작업을 등록/조회할 때 시작 (gunicorn --preload 의 fork 된 자식,
+# debug reloader 의 부모 프로세스에서 잘못 시작/누락되지 않도록)
+import os
+import json
+import socket
+import time
+import uuid
+import sqlite3
+import threading
+import traceback
+from contextlib import contextmanager
+
+from students_ai_backend.config import env
+
+JOBS_DB_PATH = env("JOBS_DB_PATH", os.path.join("data", "jobs.sqlite3"))
+JOB_WORKERS = int(env("JOB_WORKERS", 2))
+JOB_POLL_SECONDS = 1.0
+# DB 오류(database is locked 등) 후 워커가 다시 시도하기까지 최대 대기 시간(초)
+JOB_ERROR_BACKOFF_MAX = 30.0
+# 이 시간 동안 heartbeat 가 없으면 실행하던 프로세스가 죽은 것으로 보고 다시 대기열로
+JOB_LEASE_SECONDS = float(env("JOB_LEASE_SECONDS", 60))
+JOB_HEARTBEAT_SECONDS = JOB_LEASE_SECONDS / 4
+
+_instance = uuid.uuid4().hex[:8]
+
+_handlers = {}
+_workers = []
+_workers_lock = threading.Lock()
+_wakeup = threading.Event()
+
+
+@contextmanager
+def _connect():
+    conn = sqlite3.connect(JOBS_DB_PATH, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def init_db():
+    os.makedirs(os.path.dirname(JOBS_DB_PATH) or ".", exist_ok=True)
+    with _connect() as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                progress REAL NOT NULL DEFAULT 0,
+                stage TEXT,
+                payload TEXT,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        if "worker_id" not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN worker_id TEXT")
+        if "heartbeat_at" not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat_at REAL")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs (status, created_at)")
+
+
+# 작업을 실행하는 프로세스 식별자 (fork 된 워커 프로세스마다 다름)
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}:{_instance}"
+
+
+# kind 별 실행 함수 등록: handler(payload, progress) → JSON 직렬화 가능한 결과
+def register(kind, handler):
+    _handlers[kind] = handler
+
+
+def enqueue(kind, payload):
+    start_workers()
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    with _connect() as conn:
+        conn.execute(
+            "INSERT INTO jobs (id, kind, status, payload, created_at, updated_at) VALUES (?, ?, 'queued', ?, ?, ?)",
+            (job_id, kind, json.dumps(payload, ensure_ascii=False), now, now)
+        )
+    _wakeup.set()
+    return job_id
+
+
+def get_job(job_id):
+    start_workers()
+    with _connect() as conn:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    if row is None:
+        return None
+    job = {
+        "job_id": row["id"],
+        "kind": row["kind"],
+        "status": row["status"],
+        "progress": row["progress"],
+        "stage": row["stage"],
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"]
+    }
+    if row["result"] is not None:
+        job["result"] = json.loads(row["result"])
+    if row["error"] is not None:
+        job["error"] = row["error"]
+    return job
+
+
+# 이 프로세스가 임대 중인 작업만 갱신 (임대가 만료되어 다른 프로세스가 가져간 작업은 덮어쓰지 않음)
+def _update(job_id, **fields):
+    now = time.time()
+    fields["updated_at"] = now
+    fields["heartbeat_at"] = now
+    columns = ", ".join(f"{key} = ?" for key in fields)
+    with _connect() as conn:
+        conn.execute(f"UPDATE jobs SET {columns} WHERE id = ? AND worker_id = ?",
+                     (*fields.values(), job_id, worker_id()))
+
+
+# 임대가 만료된 running 작업(실행하던 프로세스가 종료됨)을 다시 대기열로
+def _requeue_expired(conn, now):
+    conn.execute(
+        "UPDATE jobs SET status = 'queued', stage = NULL, worker_id = NULL "
+        "WHERE status = 'running' AND (heartbeat_at IS NULL OR heartbeat_at < ?)",
+        (now - JOB_LEASE_SECONDS,)
+    )
+
+
+# 대기 중인 가장 오래된 작업을 하나 가져와 running 으로 표시 (워커 간 중복 실행 방지)
+def _claim():
+    with _connect() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        now = time.time()
+        _requeue_expired(conn, now)
+        row = conn.execute(
+            "SELECT id, kind, payload FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+        ).fetchone()
+        if row is None:
+            conn.execute("COMMIT")
+            return None
+        conn.execute(
+            "UPDATE jobs SET status = 'running', worker_id = ?, heartbeat_at = ?, updated_at = ? WHERE id = ?",
+            (worker_id(), now, now, row["id"])
+        )
+        conn.execute("COMMIT")
+    return row["id"], row["kind"], json.loads(row["payload"])
+
+
+def _run(job_id, kind, payload):
+    def progress(value, stage=None):
+        _update(job_id, progress=value, stage=stage)
+
+    try:
+        handler = _handlers[kind]
+        result = handler(payload, progress)
+        _update(job_id, status="succeeded", progress=1.0, stage="done",
+                result=json.dumps(result, ensure_ascii=False))
+    except Exception as e:
+        print(f"❌ 작업 실패 ({kind} {job_id}):", e)
+        traceback.print_exc()
+        _update(job_id, status="failed", error=str(e))
+
+
+# 한 번의 반복에서 난 오류(DB 잠금 등)로 스레드가 죽지 않도록 기록 후 점점 길게 쉬고 다시 시도
+def _worker_loop():
+    failures = 0
+    while True:
+        try:
+            claimed = _claim()
+            if claimed is None:
+                _wakeup.wait(JOB_POLL_SECONDS)
+                _wakeup.clear()
+            else:
+                _run(*claimed)
+            failures = 0
+        except Exception as e:
+            failures += 1
+            delay = min(JOB_ERROR_BACKOFF_MAX, JOB_POLL_SECONDS * (2 ** failures))
+            print(f"⚠️ 작업 워커 오류, {delay:.0f}초 후 다시 시도:", e)
+            traceback.print_exc()
+            time.sleep(delay)
+
+
+# 이 프로세스가 실행 중인 작업의 임대 갱신 (진행률 갱신 없이 오래 걸리는 단계 동안에도 유지)
+def _heartbeat_loop():
+    while True:
+        time.sleep(JOB_HEARTBEAT_SECONDS)
+        try:
+            with _connect() as conn:
+                conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE status = 'running' AND worker_id = ?",
+                             (time.time(), worker_id()))
+        except sqlite3.Error as e:
+            print("⚠️ 작업 heartbeat 갱신 실패:", e)
+
+
+# fork 된 자식 프로세스에는 부모의 스레드가 없으므로 워커 목록을 비워서 자식에서 다시 시작하게 함
+def _reset_after_fork():
+    global _workers_lock
+    _workers_lock = threading.Lock()
+    _workers.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def start_workers(count=JOB_WORKERS):
+    if _workers:
+        return
+    with _workers_lock:
+        if _workers:
+            return
+        init_db()
+        for i in range(count):
+            worker = threading.Thread(target=_worker_loop, name=f"job-worker-{i}", daemon=True)
+            worker.start()
+            _workers.append(worker)
+        heartbeat = threading.Thread(target=_heartbeat_loop, name="job-heartbeat", daemon=True)
+        heartbeat.start()
+        _workers.append(heartbeat)
@@ -0,0 +1,119 @@
+# LLM 이 토큰 단위로 흘려보내는 JSON 객체를 점진적으로 파싱
+# 최상위 객체의 배열 항목(예: subsections_comments 의 각 코멘트)이나 값이 완성되는 즉시 이벤트로 돌려줌
+# (앞뒤의 ```json 코드 블록 표시나 설명 문장은 무시)
+import json
+
+
+class IncrementalJSONParser:
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0
+        self._stack = []            # 열린 괄호들 ('{' 또는 '[')
+        self._in_string = False
+        self._escape = False
+        self._expect_key = False    # 최상위 객체에서 다음 문자열이 키인지
+        self._key_start = None
+        self._key = None
+        self._value_start = None    # 최상위 스칼라/객체 값 시작 위치
+        self._item_start = None     # 최상위 배열 항목 시작 위치
+        self.done = False
+
+    # 새로 들어온 텍스트를 처리하고 완성된 항목 목록을 반환
+    # ("item", key, value): 최상위 배열 key 의 항목 하나 완성
+    # ("field", key, value): 최상위 key 의 값 전체 완성 (배열이면 배열 전체)
+    def feed(self, chunk):
+        self.buffer += chunk
+        events = []
+        while self._pos < len(self.buffer) and not self.done:
+            self._step(self.buffer[self._pos], events)
+            self._pos += 1
+        return events
+
+    def _parse(self, start, end):
+        try:
+            return json.loads(self.buffer[start:end])
+        except ValueError:
+            return self.buffer[start:end].strip()
+
+    def _step(self, ch, events):
+        pos = self._pos
+        depth = len(self._stack)
+
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._in_string = False
+                if self._key_start is not None:
+                    self._key = self._parse(self._key_start, pos + 1)
+                    self._key_start = None
+            return
+
+        if depth == 0:
+            # 최상위 객체 시작 전의 텍스트는 건너뜀
+            if ch == "{":
+                self._stack.append("{")
+                self._expect_key = True
+            return
+
+        if ch.isspace():
+            return
+
+        # 최상위 객체 안: 키 또는 값의 시작
+        if depth == 1 and self._value_start is None and self._item_start is None:
+            if ch == '"' and self._expect_key:
+                self._in_string = True
+                self._key_start = pos
+                return
+            if ch == ":":
+                self._expect_key = False
+                return
+            if ch == ",":
+                self._expect_key = True
+                return
+            if ch == "}":
+                self._stack.pop()
+                self.done = True
+                return
+            self._value_start = pos
+
+        # 최상위 배열 안: 항목의 시작
+        if depth == 2 and self._stack[1] == "[" and self._item_start is None and ch not in ",]":
+            self._item_start = pos
+
+        if ch == '"':
+            self._in_string = True
+        elif ch in "{[":
+            self._stack.append(ch)
+        elif ch in "}]":
+            if depth == 1 and self._value_start is not None:
+                # 마지막 스칼라 값 뒤에 바로 객체가 닫힘
+                events.append(("field", self._key, self._parse(self._value_start, pos)))
+                self._value_start = None
+            if depth == 2 and ch == "]" and self._item_start is not None:
+                events.append(("item", self._key, self._parse(self._item_start, pos)))
+                self._item_start = None
+            self._stack.pop()
+            if len(self._stack) == 1:
+                events.append(("field", self._key, self._parse(self._value_start, pos + 1)))
+                self._value_start = None
+            elif not self._stack:
+                self.done = True
+        elif ch == ",":
+            if depth == 2 and self._item_start is not None:
+                events.append(("item", self._key, self._parse(self._item_start, pos)))
+                self._item_start = None
+            elif depth == 1 and self._value_start is not None:
+                events.append(("field", self._key, self._parse(self._value_start, pos)))
+                self._value_start = None
+                self._expect_key = True
+
+    # 스트림이 끝났을 때 마지막 스칼라 값이 닫히지 않은 채 남아 있으면 정리
+    def close(self):
+        events = []
+        if len(self._stack) == 1 and self._value_start is not None:
+            events.append(("field", self._key, self._parse(self._value_start, len(self.buffer))))
+            self._value_start = None
+        return events
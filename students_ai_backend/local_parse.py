@@ -0,0 +1,108 @@
+# 텍스트 레이어가 있는 PDF 를 로컬에서 파싱 (pdfminer.six)
+# Upstage document-parse 의 elements 와 같은 형태(id, page, category, content.html/text, coordinates)를 만들어
+# extract_text_and_id_maps 가 그대로 사용할 수 있도록 함. 텍스트가 없는(스캔) 페이지 번호는 따로 돌려줌
+import io
+import re
+import html
+
+# 페이지에서 추출한 글자 수가 이보다 적으면 스캔 페이지로 판단
+LOCAL_PARSE_MIN_CHARS = 20
+# 글꼴 정보가 없어 "(cid:123)" 형태로 추출되는 글자의 비율이 이보다 높으면 텍스트 레이어를 믿지 않음
+LOCAL_PARSE_MAX_CID_RATIO = 0.1
+
+_CID = re.compile(r"\(cid:\d+\)")
+_HTML_ID = re.compile(r"""\bid=(['"])\d+\1""")
+
+
+def _normalize_text(text):
+    return " ".join(text.split())
+
+
+# PDF 좌표(왼쪽 아래 원점, pt) → Upstage 좌표(왼쪽 위 원점, 페이지 크기 대비 0~1)의 네 꼭짓점
+def _coordinates(bbox, page_box):
+    x0, y0, x1, y1 = bbox
+    px0, py0, px1, py1 = page_box
+    width, height = (px1 - px0) or 1, (py1 - py0) or 1
+    left, right = (x0 - px0) / width, (x1 - px0) / width
+    top, bottom = (py1 - y1) / height, (py1 - y0) / height
+    return [
+        {"x": round(left, 4), "y": round(top, 4)},
+        {"x": round(right, 4), "y": round(top, 4)},
+        {"x": round(right, 4), "y": round(bottom, 4)},
+        {"x": round(left, 4), "y": round(bottom, 4)},
+    ]
+
+
+def make_element(eid, page, text, coordinates, category="paragraph"):
+    return {
+        "id": eid,
+        "page": page,
+        "category": category,
+        "content": {
+            "html": f"<p id='{eid}' data-category='{category}'>{html.escape(text, quote=False)}</p>",
+            "text": text,
+            "markdown": ""
+        },
+        "coordinates": coordinates
+    }
+
+
+# 로컬 파싱 결과 (elements, 텍스트 레이어가 없는 페이지 번호 목록) 반환 (페이지 번호는 1부터)
+def parse_pdf(file_path):
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LAParams, LTTextContainer
+
+    elements = []
+    scanned_pages = []
+    for page_number, page in enumerate(extract_pages(file_path, laparams=LAParams()), 1):
+        page_elements = []
+        chars = 0
+        cid_chars = 0
+        for box in page:
+            if not isinstance(box, LTTextContainer):
+                continue
+            raw = box.get_text()
+            cid_chars += sum(len(m) for m in _CID.findall(raw))
+            text = _normalize_text(raw)
+            if not text:
+                continue
+            chars += len(text)
+            page_elements.append((text, _coordinates(box.bbox, page.bbox)))
+
+        if chars < LOCAL_PARSE_MIN_CHARS or cid_chars > chars * LOCAL_PARSE_MAX_CID_RATIO:
+            scanned_pages.append(page_number)
+            continue
+        for text, coordinates in page_elements:
+            elements.append(make_element(len(elements), page_number, text, coordinates))
+    return elements, scanned_pages
+
+
+def page_count(file_path):
+    from pypdf import PdfReader
+    return len(PdfReader(file_path).pages)
+
+
+# 지정한 페이지들만 담은 PDF 바이트 생성 (스캔 페이지나 페이지 청크만 원격 파싱으로 보내기 위함)
+def page_subset(file_path, pages):
+    from pypdf import PdfReader, PdfWriter
+
+    reader = PdfReader(file_path)
+    writer = PdfWriter()
+    for page_number in pages:
+        writer.add_page(reader.pages[page_number - 1])
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+# 페이지 → 원래 순서로 정렬하고 id 를 0부터 다시 매김 (html 의 id 속성도 함께 변경)
+def renumber(elements):
+    ordered = sorted(enumerate(elements), key=lambda item: (item[1].get("page") or 0, item[0]))
+    result = []
+    for eid, (_, el) in enumerate(ordered):
+        el = dict(el, id=eid)
+        content = el.get("content")
+        if isinstance(content, dict) and content.get("html"):
+            el["content"] = dict(content, html=_HTML_ID.sub(f"id='{eid}'", content["html"], count=1))
+        result.append(el)
+    return result
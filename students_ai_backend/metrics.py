@@ -0,0 +1,169 @@
+# 가벼운 계측: 단계별 소요 시간 히스토그램, 카운터, Prometheus 텍스트 형식 출력
+# - span("stage") 으로 파이프라인 단계/업스트림 호출 시간 측정
+# - 다른 모듈이 이미 가진 통계(캐시 적중 등)는 register_collector 로 /metrics 출력 시점에 수집
+# - 요청 단위 프로파일러 (PROFILE_REQUESTS=1 일 때 ?profile=1 요청만)
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+from students_ai_backend.config import env, env_flag
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+METRICS_PREFIX = "students_ai"
+
+PROFILE_REQUESTS = env_flag("PROFILE_REQUESTS", "")
+PROFILE_DIR = env("PROFILE_DIR", os.path.join("data", "profiles"))
+
+_lock = threading.Lock()
+_histograms = {}    # name → (help, buckets, {labels: [bucket counts..., sum, count]})
+_counters = {}      # name → (help, {labels: value})
+_collectors = []
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def observe(name, value, help="", buckets=DEFAULT_BUCKETS, **labels):
+    key = _label_key(labels)
+    with _lock:
+        if name not in _histograms:
+            _histograms[name] = (help, buckets, {})
+        _, buckets, series = _histograms[name]
+        counts = series.setdefault(key, [0] * len(buckets) + [0.0, 0])
+        for i, bound in enumerate(buckets):
+            if value <= bound:
+                counts[i] += 1
+        counts[-2] += value
+        counts[-1] += 1
+
+
+def inc(name, value=1, help="", **labels):
+    key = _label_key(labels)
+    with _lock:
+        if name not in _counters:
+            _counters[name] = (help, {})
+        series = _counters[name][1]
+        series[key] = series.get(key, 0) + value
+
+
+# with span("prompt_build"): ... → students_ai_stage_seconds{stage="prompt_build"}
+@contextmanager
+def span(stage, **labels):
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        observe("stage_seconds", time.perf_counter() - start, help="파이프라인 단계별 소요 시간",
+                stage=stage, status=status, **labels)
+
+
+# 호출 시점의 값을 돌려주는 함수 등록: () → [(이름, 종류, 설명, {라벨}, 값), ...]
+def register_collector(collect):
+    with _lock:
+        _collectors.append(collect)
+
+
+def render():
+    lines = []
+    with _lock:
+        histograms = {name: (h, b, {k: list(v) for k, v in s.items()}) for name, (h, b, s) in _histograms.items()}
+        counters = {name: (h, dict(s)) for name, (h, s) in _counters.items()}
+        collectors = list(_collectors)
+
+    for name, (help, buckets, series) in sorted(histograms.items()):
+        full = f"{METRICS_PREFIX}_{name}"
+        lines += [f"# HELP {full} {help}", f"# TYPE {full} histogram"]
+        for key, counts in sorted(series.items()):
+            for bound, count in zip(buckets, counts):
+                lines.append(f"{full}_bucket{_format_labels(key, [('le', str(bound))])} {count}")
+            lines.append(f"{full}_bucket{_format_labels(key, [('le', '+Inf')])} {counts[-1]}")
+            lines.append(f"{full}_sum{_format_labels(key)} {counts[-2]}")
+            lines.append(f"{full}_count{_format_labels(key)} {counts[-1]}")
+
+    for name, (help, series) in sorted(counters.items()):
+        full = f"{METRICS_PREFIX}_{name}_total"
+        lines += [f"# HELP {full} {help}", f"# TYPE {full} counter"]
+        for key, value in sorted(series.items()):
+            lines.append(f"{full}{_format_labels(key)} {value}")
+
+    collected = {}
+    for collect in collectors:
+        try:
+            for name, kind, help, labels, value in collect():
+                collected.setdefault((name, kind, help), []).append((_label_key(labels), value))
+        except Exception as e:
+            print("⚠️ 메트릭 수집 실패:", e)
+    for (name, kind, help), series in sorted(collected.items()):
+        full = f"{METRICS_PREFIX}_{name}"
+        lines += [f"# HELP {full} {help}", f"# TYPE {full} {kind}"]
+        for key, value in series:
+            lines.append(f"{full}{_format_labels(key)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+# stats dict 를 내보내는 collector 생성: 누적 값은 {name}_total{label=키}, gauges 에 있는 키는 {name}_{키}
+def stats_collector(name, get_stats, help="", label="kind", gauges=()):
+    def collect():
+        rows = []
+        for key, value in get_stats().items():
+            if key in gauges:
+                rows.append((f"{name}_{key}", "gauge", help, {}, value))
+            else:
+                rows.append((f"{name}_total", "counter", help, {label: key}, value))
+        return rows
+    return collect
+
+
+# 요청 단위 프로파일러 (pyinstrument 가 있으면 샘플링 프로파일러, 없으면 cProfile)
+class RequestProfiler:
+    def __init__(self, name):
+        self.name = name
+        try:
+            from pyinstrument import Profiler
+            self._profiler = Profiler()
+            self._sampling = True
+        except ImportError:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._sampling = False
+
+    def start(self):
+        if self._sampling:
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    # 프로파일 결과를 PROFILE_DIR 에 저장하고 경로 반환
+    def stop(self):
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}_{self.name}_{threading.get_ident()}.txt")
+        if self._sampling:
+            self._profiler.stop()
+            report = self._profiler.output_text(unicode=True)
+        else:
+            import io
+            import pstats
+            self._profiler.disable()
+            buffer = io.StringIO()
+            pstats.Stats(self._profiler, stream=buffer).sort_stats("cumulative").print_stats(60)
+            report = buffer.getvalue()
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(report)
+        return path
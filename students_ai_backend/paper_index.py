@@ -0,0 +1,216 @@
+# 논문 추천용 벡터 인덱스 (papers/paper_inf.xlsx 의 모든 논문)
+# 제목 / 키워드 / index term (+ 있으면 output_data/{paper_id}_universal.json 의 내용)을 임베딩하여
+# data/paper_index/ 에 저장하고, 카탈로그나 추출 결과가 바뀌면 변경된 논문만 다시 임베딩 (증분 갱신)
+import os
+import json
+import time
+import hashlib
+import threading
+
+from students_ai_backend.config import config, env, env_flag
+from students_ai_backend.source_matcher import embed_texts
+
+PAPER_CATALOG_PATH = env("PAPER_CATALOG_PATH", os.path.join(config.paper_dir, "paper_inf.xlsx"))
+PAPER_INDEX_DIR = env("PAPER_INDEX_DIR", os.path.join("data", "paper_index"))
+PREVIEW_DATA_DIR = config.preview_data_dir
+# 추출된 논문 내용을 인덱스 텍스트에 포함할지 여부와 최대 길이
+PAPER_INDEX_USE_EXTRACTION = env_flag("PAPER_INDEX_USE_EXTRACTION", "1")
+PAPER_INDEX_EXTRACTION_CHARS = 2000
+# output_data 가 바뀌었을 때 논문 텍스트 해시를 다시 확인하는 최소 간격(초) (warmup 중 요청마다 다시 읽지 않도록)
+PAPER_INDEX_REFRESH_SECONDS = float(env("PAPER_INDEX_REFRESH_SECONDS", 30))
+
+VECTORS_FILE = "vectors.npy"
+META_FILE = "meta.json"
+
+# 엑셀 컬럼 → papers 테이블 컬럼
+CATALOG_COLUMNS = {
+    "paper_id": "paper_id",
+    "Paper_Title": "title",
+    "Publications": "publications",
+    "Date": "date",
+    "h5": "h5",
+    "Citations": "citations",
+    "Keyword": "keyword",
+    "Index_Term": "index_term",
+}
+
+
+# openpyxl read-only 모드로 엑셀을 한 행씩 읽어 papers 테이블 컬럼 이름의 dict 로 반환
+def iter_catalog(path=PAPER_CATALOG_PATH):
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None) or ()
+        positions = {name: i for i, name in enumerate(header) if name in CATALOG_COLUMNS}
+        for values in rows:
+            if not values or values[positions.get("paper_id", 0)] is None:
+                continue
+            yield {CATALOG_COLUMNS[name]: values[i] for name, i in positions.items()}
+    finally:
+        workbook.close()
+
+
+def load_catalog(path=PAPER_CATALOG_PATH):
+    return list(iter_catalog(path))
+
+
+# 엑셀의 "a\n,\nb" 형태 키워드 목록을 "a, b" 로 정리
+def _clean_terms(value):
+    if not isinstance(value, str):
+        return ""
+    terms = [term.strip() for term in value.replace("\n", "").split(",")]
+    return ", ".join(term for term in terms if term)
+
+
+def _extraction_text(paper_id):
+    path = os.path.join(PREVIEW_DATA_DIR, f'{paper_id}_universal.json')
+    if not os.path.exists(path):
+        return ""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            content = json.loads(json.load(f)["choices"][0]["message"]["content"])
+    except (OSError, ValueError, KeyError, IndexError):
+        return ""
+    parts = []
+    for key in ("subsections", "methods"):
+        values = content.get(key)
+        if isinstance(values, list):
+            parts.extend(v for v in values if isinstance(v, str))
+    return " ".join(parts)[:PAPER_INDEX_EXTRACTION_CHARS]
+
+
+def paper_text(row):
+    parts = [
+        str(row.get("title") or ""),
+        _clean_terms(row.get("keyword")),
+        _clean_terms(row.get("index_term")),
+    ]
+    if PAPER_INDEX_USE_EXTRACTION:
+        parts.append(_extraction_text(row.get("paper_id")))
+    return "\n".join(part for part in parts if part)
+
+
+class PaperIndex:
+    def __init__(self, index_dir=PAPER_INDEX_DIR):
+        import numpy as np
+        self.index_dir = index_dir
+        self._lock = threading.Lock()
+        self.paper_ids = []
+        self.hashes = {}
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self._positions = {}
+        self._catalog_mtime = None
+        self._catalog_rows = []
+        self._extraction_mtime = None
+        self._checked_at = 0.0
+        self._load()
+
+    def _load(self):
+        import numpy as np
+        meta_path = os.path.join(self.index_dir, META_FILE)
+        vectors_path = os.path.join(self.index_dir, VECTORS_FILE)
+        if not (os.path.exists(meta_path) and os.path.exists(vectors_path)):
+            return
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        self.paper_ids = meta["paper_ids"]
+        self.hashes = meta["hashes"]
+        self.vectors = np.load(vectors_path)
+        self._positions = {pid: i for i, pid in enumerate(self.paper_ids)}
+
+    def _save(self):
+        import numpy as np
+        os.makedirs(self.index_dir, exist_ok=True)
+        vectors_path = os.path.join(self.index_dir, VECTORS_FILE)
+        meta_path = os.path.join(self.index_dir, META_FILE)
+        with open(f'{vectors_path}.tmp', 'wb') as f:
+            np.save(f, self.vectors)
+        with open(f'{meta_path}.tmp', 'w', encoding='utf-8') as f:
+            json.dump({"paper_ids": self.paper_ids, "hashes": self.hashes}, f)
+        os.replace(f'{vectors_path}.tmp', vectors_path)
+        os.replace(f'{meta_path}.tmp', meta_path)
+
+    # 텍스트 해시가 바뀐 논문만 다시 임베딩하고, 카탈로그에서 빠진 논문은 제거
+    def update(self, rows):
+        import numpy as np
+        texts = {str(row["paper_id"]): paper_text(row) for row in rows}
+        hashes = {pid: hashlib.sha256(text.encode('utf-8')).hexdigest() for pid, text in texts.items()}
+        changed = [pid for pid in texts if self.hashes.get(pid) != hashes[pid]]
+        removed = set(self.hashes) - set(texts)
+        if not changed and not removed:
+            return 0
+
+        new_vectors = dict(zip(changed, embed_texts([texts[pid] for pid in changed]))) if changed else {}
+        paper_ids = list(texts.keys())
+        vectors = [
+            new_vectors[pid] if pid in new_vectors else self.vectors[self._positions[pid]]
+            for pid in paper_ids
+        ]
+        with self._lock:
+            self.paper_ids = paper_ids
+            self.hashes = hashes
+            self.vectors = np.vstack(vectors).astype(np.float32) if vectors else np.zeros((0, 0), dtype=np.float32)
+            self._positions = {pid: i for i, pid in enumerate(paper_ids)}
+            self._save()
+        print(f"✅ 논문 인덱스 갱신: {len(changed)}개 임베딩, {len(removed)}개 제거")
+        return len(changed)
+
+    # output_data 디렉토리 mtime (추출 결과 파일이 새로 쓰이면 바뀜), 추출 내용을 쓰지 않으면 None
+    def _extraction_signature(self):
+        if not PAPER_INDEX_USE_EXTRACTION:
+            return None
+        try:
+            return os.path.getmtime(PREVIEW_DATA_DIR)
+        except OSError:
+            return None
+
+    # 카탈로그 파일이 바뀌면 다시 읽어 바로 증분 갱신하고,
+    # 추출 결과(output_data)가 바뀌면 PAPER_INDEX_REFRESH_SECONDS 마다 텍스트 해시를 다시 확인
+    def refresh(self, catalog_path=PAPER_CATALOG_PATH):
+        mtime = os.path.getmtime(catalog_path)
+        extraction_mtime = self._extraction_signature()
+        if mtime != self._catalog_mtime:
+            rows = load_catalog(catalog_path)
+        elif (extraction_mtime != self._extraction_mtime
+              and time.time() - self._checked_at >= PAPER_INDEX_REFRESH_SECONDS):
+            rows = self._catalog_rows
+        else:
+            return
+        self.update(rows)
+        self._catalog_rows = rows
+        self._catalog_mtime = mtime
+        self._extraction_mtime = extraction_mtime
+        self._checked_at = time.time()
+
+    # 후보 논문들(구조화 필터를 통과한 행)을 질의와의 코사인 유사도로 정렬해 top_k 반환
+    # 인덱스에 아직 없는 후보(카탈로그 갱신 직후 등)는 버리지 않고 정렬된 후보 뒤에 원래 순서대로 붙임
+    def rank(self, query, candidates, top_k=3):
+        import numpy as np
+        with self._lock:
+            positions = [self._positions.get(str(row["paper_id"])) for row in candidates]
+            vectors = self.vectors
+        indexed = [(row, pos) for row, pos in zip(candidates, positions) if pos is not None]
+        if not indexed or not query:
+            return [dict(row, score=None) for row in candidates[:top_k]]
+
+        query_vector = embed_texts([query])[0]
+        scores = vectors[[pos for _, pos in indexed]] @ query_vector
+        order = np.argsort(-scores)[:top_k]
+        ranked = [dict(indexed[i][0], score=float(scores[i])) for i in order]
+        unindexed = [row for row, pos in zip(candidates, positions) if pos is None]
+        ranked.extend(dict(row, score=None) for row in unindexed[:top_k - len(ranked)])
+        return ranked
+
+
+_paper_index = None
+_paper_index_lock = threading.Lock()
+
+
+def get_paper_index():
+    global _paper_index
+    with _paper_index_lock:
+        if _paper_index is None:
+            _paper_index = PaperIndex()
+        _paper_index.refresh()
+        return _paper_index
@@ -0,0 +1,270 @@
+# 논문 메타데이터 접근 계층 (papers 테이블)
+# - MySQL(pymysql) 또는 로컬 SQLite 백엔드 선택 (PAPER_DB_BACKEND)
+# - 커넥션 풀 + 파라미터 바인딩 쿼리 (LLM 출력이 SQL 문자열에 직접 들어가지 않도록)
+# - date / citations / publications 인덱스
+# - 선택적 인메모리 읽기 전용 스냅샷 (NumPy 컬럼 배열): 필터링/정렬을 DB 왕복 없이 처리
+import os
+import time
+import hashlib
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from students_ai_backend.config import env, env_flag
+
+PAPER_DB_BACKEND = env("PAPER_DB_BACKEND", "mysql")
+PAPER_DB_HOST = env("PAPER_DB_HOST", "localhost")
+PAPER_DB_USER = env("PAPER_DB_USER", "root")
+PAPER_DB_PASSWORD = env("PAPER_DB_PASSWORD", "1234")
+PAPER_DB_NAME = env("PAPER_DB_NAME", "papers")
+PAPER_SQLITE_PATH = env("PAPER_SQLITE_PATH", os.path.join("data", "papers.sqlite3"))
+PAPER_DB_POOL_SIZE = int(env("PAPER_DB_POOL_SIZE", 4))
+PAPER_SNAPSHOT = env_flag("PAPER_SNAPSHOT", "1")
+# 스냅샷이 최신인지 DB 에 확인하는 최소 간격(초)
+PAPER_SNAPSHOT_CHECK_SECONDS = float(env("PAPER_SNAPSHOT_CHECK_SECONDS", 5))
+
+COLUMNS = ["paper_id", "title", "publications", "date", "h5", "citations", "keyword", "index_term", "file_path"]
+
+CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS papers (
+    paper_id INT PRIMARY KEY,
+    title VARCHAR(255),
+    publications VARCHAR(255),
+    date INT,
+    h5 INT,
+    citations INT,
+    keyword TEXT,
+    index_term TEXT,
+    file_path VARCHAR(255)
+)
+"""
+
+# 행 내용 해시 (재실행 시 변경된 행만 반영하기 위함)
+CREATE_INGEST_TABLE = """
+CREATE TABLE IF NOT EXISTS paper_ingest_state (
+    paper_id INT PRIMARY KEY,
+    row_hash CHAR(64)
+)
+"""
+
+INDEXES = {
+    "idx_papers_date": "date",
+    "idx_papers_citations": "citations",
+    "idx_papers_publications": "publications",
+}
+
+
+class ConnectionPool:
+    def __init__(self, connect, size=PAPER_DB_POOL_SIZE, ping=None):
+        self._connect = connect
+        self._ping = ping
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self):
+        self._slots.acquire()
+        try:
+            try:
+                conn = self._idle.get_nowait()
+                if self._ping:
+                    self._ping(conn)
+            except queue.Empty:
+                conn = self._connect()
+            try:
+                yield conn
+            except Exception:
+                conn.close()
+                raise
+            self._idle.put_nowait(conn)
+        finally:
+            self._slots.release()
+
+
+class PaperStore:
+    def __init__(self, backend=PAPER_DB_BACKEND):
+        self.backend = backend
+        if backend == "sqlite":
+            self.placeholder = "?"
+            self.pool = ConnectionPool(self._connect_sqlite)
+        elif backend == "mysql":
+            self.placeholder = "%s"
+            self.pool = ConnectionPool(self._connect_mysql, ping=lambda conn: conn.ping(reconnect=True))
+        else:
+            raise ValueError(f"지원하지 않는 PAPER_DB_BACKEND 입니다: {backend}")
+        self._snapshot = None
+        self._snapshot_lock = threading.Lock()
+
+    def _connect_sqlite(self):
+        os.makedirs(os.path.dirname(PAPER_SQLITE_PATH) or ".", exist_ok=True)
+        conn = sqlite3.connect(PAPER_SQLITE_PATH, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _connect_mysql(self, database=PAPER_DB_NAME):
+        import pymysql
+        return pymysql.connect(host=PAPER_DB_HOST, user=PAPER_DB_USER, password=PAPER_DB_PASSWORD,
+                               database=database, charset="utf8mb4")
+
+    def execute(self, sql, params=()):
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
+                columns = [d[0] for d in cursor.description] if cursor.description else []
+            finally:
+                cursor.close()
+            conn.commit()
+        return [dict(zip(columns, row)) for row in rows]
+
+    def executemany(self, sql, param_rows):
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.executemany(sql, param_rows)
+            finally:
+                cursor.close()
+            conn.commit()
+        self.invalidate()
+
+    # 데이터베이스/테이블/인덱스 생성 (여러 번 실행해도 안전)
+    def init_schema(self):
+        if self.backend == "mysql":
+            conn = self._connect_mysql(database=None)
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(f"CREATE DATABASE IF NOT EXISTS {PAPER_DB_NAME}")
+                conn.commit()
+            finally:
+                conn.close()
+        self.execute(CREATE_TABLE)
+        self.execute(CREATE_INGEST_TABLE)
+        existing = set()
+        if self.backend == "mysql":
+            existing = {row["Key_name"] for row in self.execute("SHOW INDEX FROM papers")}
+        for name, column in INDEXES.items():
+            if name in existing:
+                continue
+            if self.backend == "sqlite":
+                # 학회 이름은 대소문자 구분 없이 비교하므로 NOCASE 인덱스 사용
+                collate = " COLLATE NOCASE" if column == "publications" else ""
+                self.execute(f"CREATE INDEX IF NOT EXISTS {name} ON papers ({column}{collate})")
+            else:
+                self.execute(f"CREATE INDEX {name} ON papers ({column})")
+
+    # 키 충돌 시 나머지 컬럼을 갱신하는 다중 행 upsert 문
+    def upsert_sql(self, table, columns, key):
+        p = self.placeholder
+        values = ", ".join([p] * len(columns))
+        updates = [column for column in columns if column != key]
+        if self.backend == "sqlite":
+            assignments = ", ".join(f"{column} = excluded.{column}" for column in updates)
+            conflict = f"ON CONFLICT({key}) DO UPDATE SET {assignments}"
+        else:
+            assignments = ", ".join(f"{column} = VALUES({column})" for column in updates)
+            conflict = f"ON DUPLICATE KEY UPDATE {assignments}"
+        return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({values}) {conflict}"
+
+    # 조건에 맞는 논문을 최신순으로 반환 (값은 모두 바인딩 파라미터로 전달)
+    def query_papers(self, journal_name=None, min_citation=None, min_year=None, max_year=None):
+        p = self.placeholder
+        clauses, params = [], []
+        if journal_name is not None:
+            # MySQL 기본 collation 은 대소문자 구분 없음, SQLite 는 NOCASE 로 맞춤
+            clauses.append(f"publications = {p}" + (" COLLATE NOCASE" if self.backend == "sqlite" else ""))
+            params.append(str(journal_name))
+        if min_citation is not None:
+            clauses.append(f"citations >= {p}")
+            params.append(int(min_citation))
+        if min_year is not None:
+            clauses.append(f"date >= {p}")
+            params.append(int(min_year))
+        if max_year is not None:
+            clauses.append(f"date <= {p}")
+            params.append(int(max_year))
+        sql = f"SELECT {', '.join(COLUMNS)} FROM papers"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY date DESC"
+        return self.execute(sql, params)
+
+    # 테이블 내용이 바뀌었는지 판단하기 위한 지문
+    # 집계 값 + paper_ingest_state 의 행 해시 전체의 해시 (uploader 가 다른 프로세스에서 제목/학회만 바꿔도 감지)
+    def fingerprint(self):
+        row = self.execute(
+            "SELECT COUNT(*) AS n, COALESCE(MAX(paper_id), 0) AS max_id, COALESCE(SUM(citations), 0) AS cites,"
+            " COALESCE(SUM(date), 0) AS dates FROM papers"
+        )[0]
+        return tuple(int(v) for v in row.values()) + (self.ingest_digest(),)
+
+    def ingest_digest(self):
+        digest = hashlib.sha256()
+        try:
+            rows = self.execute("SELECT paper_id, row_hash FROM paper_ingest_state ORDER BY paper_id")
+        except Exception:
+            # init_schema 전이라 테이블이 없는 경우 (백엔드마다 예외 종류가 다름)
+            return ""
+        for row in rows:
+            digest.update(f'{row["paper_id"]}:{row["row_hash"]};'.encode('ascii'))
+        return digest.hexdigest()
+
+    def invalidate(self):
+        with self._snapshot_lock:
+            self._snapshot = None
+
+    def snapshot(self):
+        with self._snapshot_lock:
+            snap = self._snapshot
+            now = time.monotonic()
+            if snap is not None and now - snap.checked_at < PAPER_SNAPSHOT_CHECK_SECONDS:
+                return snap
+            fingerprint = self.fingerprint()
+            if snap is None or snap.fingerprint != fingerprint:
+                snap = PaperSnapshot(self.query_papers(), fingerprint)
+                self._snapshot = snap
+            snap.checked_at = now
+            return snap
+
+    def find_papers(self, conditions):
+        filters = {key: conditions.get(key) for key in ("journal_name", "min_citation", "min_year", "max_year")}
+        if PAPER_SNAPSHOT:
+            return self.snapshot().filter(**filters)
+        return self.query_papers(**filters)
+
+
+class PaperSnapshot:
+    def __init__(self, rows, fingerprint):
+        import numpy as np
+        self.rows = rows    # date 내림차순
+        self.fingerprint = fingerprint
+        self.checked_at = time.monotonic()
+        self.dates = np.array([row["date"] or 0 for row in rows], dtype=np.int64)
+        self.citations = np.array([row["citations"] or 0 for row in rows], dtype=np.int64)
+        self.publications = np.array([(row["publications"] or "").lower() for row in rows], dtype=object)
+
+    def filter(self, journal_name=None, min_citation=None, min_year=None, max_year=None):
+        import numpy as np
+        mask = np.ones(len(self.rows), dtype=bool)
+        if journal_name is not None:
+            mask &= self.publications == str(journal_name).lower()
+        if min_citation is not None:
+            mask &= self.citations >= int(min_citation)
+        if min_year is not None:
+            mask &= self.dates >= int(min_year)
+        if max_year is not None:
+            mask &= self.dates <= int(max_year)
+        return [dict(self.rows[i]) for i in np.flatnonzero(mask)]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PaperStore()
+        return _store
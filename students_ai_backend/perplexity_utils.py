@@ -1,20 +1,17 @@
 # 필요한 라이브러리 임포트
-import requests
-import os
 import json
-from dotenv import load_dotenv
-
-# .env 파일에서 API 키 불러오기
-load_dotenv()
-API_KEY = os.getenv("PERPLEXITY_API_KEY")
-API_URL = "https://api.perplexity.ai/chat/completions"
-
-# 데이터 파일 경로 설정
-DATA_DIR = "data"
-TEXT_TO_ID_PATH = os.path.join(DATA_DIR, "text_to_id.json")         # 원문 문장 → ID
-ID_TO_COORD_PATH = os.path.join(DATA_DIR, "id_to_coord.json")       # ID → 좌표 정보
-SUMMARY_LIST_PATH = os.path.join(DATA_DIR, "summary_list.json")     # 요약 문장 리스트
-SUMMARY_COORD_PATH = os.path.join(DATA_DIR, "summary_to_coords.json")  # 결과 저장 위치
+from students_ai_backend.config import config, env_flag
+from students_ai_backend import http_client
+from students_ai_backend import workspace
+from students_ai_backend import source_matcher
+from students_ai_backend import element_index
+from students_ai_backend import prompt_builder
+from students_ai_backend import metrics
+from students_ai_backend.response_parser import parse_llm_json
+
+PERPLEXITY_API_KEY = config.perplexity_api_key
+PERPLEXITY_BASE_URL = config.perplexity_base_url
+PERP_API_URL = f"{PERPLEXITY_BASE_URL}/chat/completions"
 
 # API 요청 헤더
 headers = {
@@ -22,20 +19,100 @@ headers = {
     "Content-Type": "application/json"
 }
 
-# Perplexity API를 호출하여 요약 문장에 해당하는 원문 ID를 추정하고, 해당 ID의 좌표를 찾아 저장
-def run_perplexity():
-    # 사전 정리된 JSON 파일들 로딩
-    with open(TEXT_TO_ID_PATH, "r", encoding="utf-8") as f:
-        text_to_id = json.load(f)
-    with open(ID_TO_COORD_PATH, "r", encoding="utf-8") as f:
-        id_to_coord = json.load(f)
-    with open(SUMMARY_LIST_PATH, "r", encoding="utf-8") as f:
-        summary_list = json.load(f)
-
-    # LLM 프롬프트 구성
+# 로컬 매칭 점수가 낮은 코멘트만 LLM 으로 다시 매칭할지 여부
+MATCH_LLM_FALLBACK = env_flag("MATCH_LLM_FALLBACK", "1")
+
+def _coords_entry(id_to_coord, eid, score=None):
+    entry = {
+        "id": eid,
+        "page": id_to_coord[eid]["page"],
+        "coordinates": id_to_coord[eid]["coordinates"]
+    }
+    if score is not None:
+        entry["score"] = score
+    return entry
+
+# 요약 문장/코멘트에 해당하는 원문 ID 를 로컬 임베딩 검색으로 찾고, 해당 ID의 좌표를 찾아 저장
+# 신뢰도가 낮은 코멘트만 Perplexity API 로 후보 요소 중에서 다시 고름
+# 로컬 매칭을 할 수 없으면 (임베딩 모델 로드 실패 등) 전체 코멘트를 LLM 으로 매칭
+def run_perplexity(doc_id, llm_fallback=MATCH_LLM_FALLBACK):
+    # 문서 작업 공간에 사전 정리된 JSON 파일들 로딩
+    text_to_id = workspace.read_json(doc_id, workspace.TEXT_TO_ID)
+    id_to_coord = workspace.read_json(doc_id, workspace.ID_TO_COORD)
+    summary_list = workspace.read_json(doc_id, workspace.SUMMARY_LIST)
+    comments = source_matcher.collect_comments(summary_list)
+    id_to_text = {str(eid): text for text, eid in text_to_id.items()}
+
+    try:
+        index = element_index.get_index(doc_id, text_to_id, id_to_coord)
+        matches = source_matcher.match_comments(comments, index.ids, index.vectors, id_to_coord)
+    except Exception as e:
+        if not (llm_fallback and PERPLEXITY_API_KEY):
+            print("❌ 로컬 매칭 실패:", e)
+            return False, {"error": str(e)}
+        print("⚠️ 로컬 매칭 실패, LLM 으로 전체 매칭:", e)
+        return match_all_with_llm(doc_id, comments, id_to_text, id_to_coord)
+
+    summary_to_coords = {}
+    low_confidence = {}
+    for comment, candidates in matches.items():
+        if not candidates:
+            continue
+        best = candidates[0]
+        summary_to_coords[comment] = _coords_entry(id_to_coord, best["id"], best["score"])
+        if best["score"] < source_matcher.MATCH_MIN_SCORE:
+            low_confidence[comment] = candidates
+
+    # 신뢰도가 낮은 코멘트는 LLM 결과가 있으면 그것으로 교체 (실패 시 로컬 최선 후보 유지)
+    if low_confidence and llm_fallback and PERPLEXITY_API_KEY:
+        candidates = {}
+        for options in low_confidence.values():
+            for option in options:
+                candidates[option["id"]] = id_to_text.get(option["id"], "")
+        try:
+            matched = match_with_llm(list(low_confidence), candidates)
+            for comment, id_val in matched.items():
+                id_str = str(id_val)
+                if comment in low_confidence and id_str in id_to_coord:
+                    summary_to_coords[comment] = _coords_entry(id_to_coord, id_str)
+        except Exception as e:
+            print("⚠️ LLM 보조 매칭 실패, 로컬 매칭 결과 사용:", e)
+
+    # 결과 저장
+    output_path = workspace.write_json(doc_id, workspace.SUMMARY_TO_COORDS, summary_to_coords)
+
+    print(f"✅ 저장 완료: {output_path} (LLM 보조 매칭 대상 {len(low_confidence)}/{len(matches)})")
+    return True, summary_to_coords
+
+# 로컬 매칭 없이 문서 요소(문서 순서, 토큰 예산 안에서)를 후보로 모든 코멘트를 LLM 으로 매칭
+def match_all_with_llm(doc_id, comments, id_to_text, id_to_coord):
+    try:
+        matched = match_with_llm(comments, id_to_text)
+    except Exception as e:
+        print("❌ LLM 매칭 실패:", e)
+        return False, {"error": str(e)}
+
+    summary_to_coords = {}
+    for comment, id_val in matched.items():
+        id_str = str(id_val)
+        if id_str in id_to_coord:
+            summary_to_coords[comment] = _coords_entry(id_to_coord, id_str)
+
+    output_path = workspace.write_json(doc_id, workspace.SUMMARY_TO_COORDS, summary_to_coords)
+    print(f"✅ 저장 완료: {output_path} (LLM 매칭 {len(summary_to_coords)}/{len(comments)})")
+    return True, summary_to_coords
+
+# Perplexity API를 호출하여 코멘트별 후보 요소({id: 문장}) 중 실제로 요약한 원문 ID를 추정
+def match_with_llm(comments, candidates):
+    # LLM 프롬프트 구성 (문서 전체가 아니라 후보 요소들만, 토큰 예산 안에서 전달)
+    comment_tokens = prompt_builder.count_tokens(prompt_builder.compact_json(comments))
+    candidates, candidate_tokens = prompt_builder.fit_mapping(
+        candidates, max(prompt_builder.PROMPT_TOKEN_BUDGET - comment_tokens, 0)
+    )
+    print(f"📏 보조 매칭 프롬프트 토큰: 후보 {candidate_tokens}, 코멘트 {comment_tokens}")
     prompt = f"""
     다음은 원문 문장과 해당 문장의 ID입니다:
-    {text_to_id}
+    {prompt_builder.compact_json(candidates)}
 
     아래는 요약된 문장과 그 요약된 문장에서 비롯된 코멘트들의 리스트입니다.
     이 코멘트나 요약된 문장이 위 원문 중 어떤 문장을 요약한 것인지 유추해서, 해당 원문의 ID를 찾아주세요.
@@ -50,53 +127,69 @@ def run_perplexity():
     }}
 
     코멘트들:
-    {summary_list}
+    {prompt_builder.compact_json(comments)}
     """
 
     # Perplexity API에 요청 전송
+    full_text = chat(prompt, temperature=0.3)
+    print("✅ Perplexity 응답:\n", full_text[:300], "...")
+
+    # 응답 텍스트에서 JSON 객체만 추출/복구 ({코멘트: ID})
+    return parse_llm_json(full_text, reprompt=chat)
+
+# Perplexity chat completion 을 호출하여 응답 텍스트를 반환
+def chat(prompt, model="sonar", temperature=None):
+    payload = {
+        "model": model,  # 사용할 모델 이름
+        "messages": [{"role": "user", "content": prompt}]
+    }
+    if temperature is not None:
+        payload["temperature"] = temperature
+
+    response = http_client.post(PERP_API_URL, headers=headers, json=payload)
+    if response.status_code != 200:
+        raise Exception(f"Perplexity API 호출 실패 ({response.status_code}): {response.text}")
+    result = response.json()
+    record_usage(result.get("usage"), model)
+    return result["choices"][0]["message"]["content"]
+
+# 응답의 usage 를 LLM 토큰 사용량 메트릭에 반영
+def record_usage(usage, model):
+    for kind in ("prompt_tokens", "completion_tokens"):
+        if usage and usage.get(kind):
+            metrics.inc("llm_tokens", usage[kind], help="LLM 호출 토큰 사용량", model=model, kind=kind)
+
+# Perplexity chat completion 을 stream 모드로 호출하여 생성되는 텍스트 조각을 순서대로 돌려줌
+def stream_chat(prompt, model="sonar"):
     payload = {
-        "model": "sonar",  # 사용할 모델 이름
+        "model": model,
         "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0.3
+        "stream": True
     }
-
-    response = requests.post(PERP_API_URL, headers=headers, json=payload)
-
+    response = http_client.post(PERP_API_URL, headers=headers, json=payload, stream=True)
     try:
-        # 응답에서 JSON 형태 결과 텍스트만 추출
-        full_text = response.json()["choices"][0]["message"]["content"]
-        print("✅ Perplexity 응답:\n", full_text[:300], "...")
-
-        # 응답 텍스트에서 JSON 코드 블록만 추출
-        start = full_text.find("```json")
-        end = full_text.find("```", start + 7)
-
-        if start != -1 and end != -1:
-            json_str = full_text[start + 7:end].strip()
-        else:
-            raise ValueError("JSON 코드 블록을 찾을 수 없습니다.")
-
-        matched = json.loads(json_str)
-
-        # ID를 바탕으로 해당 문장의 좌표 및 페이지 정보 추출
-        summary_to_coords = {}
-        for sentence, id_val in matched.items():
-            id_str = str(id_val)
-            if id_str in id_to_coord:
-                summary_to_coords[sentence] = {
-                    "page": id_to_coord[id_str]["page"],
-                    "coordinates": id_to_coord[id_str]["coordinates"]
-                }
-
-        # 결과 저장
-        with open(SUMMARY_COORD_PATH, "w", encoding="utf-8") as f:
-            json.dump(summary_to_coords, f, ensure_ascii=False, indent=2)
-
-        print(f"✅ 저장 완료: {SUMMARY_COORD_PATH}")
-        return True, summary_to_coords
-
-    except Exception as e:
-        # 예외 발생 시 로깅 및 에러 메시지 반환
-        print("❌ JSON 파싱 실패:", e)
-        print("⚠️ 응답 내용:\n", response.text)
-        return False, {"error": str(e)}
+        if response.status_code != 200:
+            raise Exception(f"Perplexity API 호출 실패 ({response.status_code}): {response.text}")
+        # 응답은 "data: {...}" 줄로 이루어진 SSE, 마지막은 "data: [DONE]"
+        # (charset 이 없으면 requests 가 latin-1 로 해석하므로 직접 UTF-8 로 디코딩)
+        usage = None
+        for raw_line in response.iter_lines():
+            line = raw_line.decode("utf-8")
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+            chunk = json.loads(data)
+            if chunk.get("usage"):
+                # 청크마다 그때까지의 누적 usage 가 올 수 있으므로 마지막 값을 사용
+                usage = chunk["usage"]
+            choices = chunk.get("choices") or []
+            if not choices:
+                continue
+            delta = choices[0].get("delta", {}).get("content")
+            if delta:
+                yield delta
+        record_usage(usage, model)
+    finally:
+        response.close()
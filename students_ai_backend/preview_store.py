@@ -0,0 +1,177 @@
+# output_data/ 의 미리보기 JSON (/data, /universal-data) 저장 및 전송용 인덱스
+# - 쓸 때 한 번 직렬화하고 gzip(+ brotli 가 설치되어 있으면 br) 압축본을 함께 저장
+# - 요청 시에는 JSON 을 다시 읽고 직렬화하지 않고 저장된 바이트를 그대로 전송
+# - ETag 는 내용 해시라서 같은 내용을 다시 써도 바뀌지 않음 (폴링하는 뷰어는 304 를 받음)
+# - 작은 문서는 메모리 LRU 에 두고, 큰 문서는 파일 경로로 send_file
+import os
+import json
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+
+from students_ai_backend.config import config, env
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PREVIEW_DATA_DIR = config.preview_data_dir
+PREVIEW_HOT_ENTRIES = int(env("PREVIEW_HOT_ENTRIES", 32))
+PREVIEW_HOT_MAX_FILE_BYTES = int(env("PREVIEW_HOT_MAX_FILE_BYTES", 2 * 1024 * 1024))
+
+# Content-Encoding → 압축본 파일 확장자 (선호 순서)
+ENCODINGS = {"br": ".br", "gzip": ".gz"} if brotli is not None else {"gzip": ".gz"}
+
+
+def _compress(encoding, data):
+    if encoding == "br":
+        return brotli.compress(data, quality=9)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+# 임시 파일에 쓴 뒤 os.replace 로 교체
+def _write_atomic(path, data):
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+# 요청 경로에서 온 이름은 디렉토리 구분자 없는 .json 파일 이름만 허용
+def is_valid_name(name):
+    return (
+        bool(name)
+        and name.endswith('.json')
+        and not name.startswith('.')
+        and '/' not in name and '\\' not in name and '\x00' not in name
+    )
+
+
+class PreviewStore:
+    def __init__(self, data_dir=PREVIEW_DATA_DIR, hot_entries=PREVIEW_HOT_ENTRIES,
+                 hot_max_file_bytes=PREVIEW_HOT_MAX_FILE_BYTES):
+        self.data_dir = data_dir
+        self.hot_entries = hot_entries
+        self.hot_max_file_bytes = hot_max_file_bytes
+        self._lock = threading.Lock()
+        self._index = {}            # 이름 → {"mtime_ns", "size", "etag", "last_modified"}
+        self._hot = OrderedDict()   # (이름, etag) → {encoding(None = 원본): bytes}
+        self.stats = {"hot_hits": 0, "disk_reads": 0, "file_sends": 0, "not_found": 0, "writes": 0, "unchanged_writes": 0}
+
+    def _path(self, name, encoding=None):
+        path = os.path.join(self.data_dir, name)
+        return path + ENCODINGS[encoding] if encoding else path
+
+    # 직렬화 + 압축본 생성 후 저장. 내용이 같으면 파일을 다시 쓰지 않음 (Last-Modified 유지)
+    def write_json(self, name, data):
+        body = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+        return self.write_bytes(name, body)
+
+    def write_bytes(self, name, body):
+        if not is_valid_name(name):
+            raise ValueError(f"잘못된 파일 이름입니다: {name}")
+        etag = hashlib.sha256(body).hexdigest()[:32]
+        current = self.lookup(name)
+        if current is not None and current["etag"] == etag:
+            with self._lock:
+                self.stats["unchanged_writes"] += 1
+            return self._path(name)
+
+        os.makedirs(self.data_dir, exist_ok=True)
+        # 압축본을 먼저 써서 원본이 바뀐 시점에는 압축본도 이미 새 내용이 되도록 함
+        for encoding in ENCODINGS:
+            _write_atomic(self._path(name, encoding), _compress(encoding, body))
+        _write_atomic(self._path(name), body)
+        with self._lock:
+            self.stats["writes"] += 1
+            self._index[name] = self._entry(os.stat(self._path(name)), etag)
+        return self._path(name)
+
+    @staticmethod
+    def _entry(stat, etag):
+        return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "etag": etag, "last_modified": stat.st_mtime}
+
+    # 인덱스 조회. 파일이 밖에서 바뀌었거나(예: 이전 실행에서 저장) 처음 보는 이름이면 한 번 읽어 등록
+    def lookup(self, name):
+        if not is_valid_name(name):
+            return None
+        path = self._path(name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            with self._lock:
+                self._index.pop(name, None)
+            return None
+        with self._lock:
+            entry = self._index.get(name)
+        if entry is not None and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            return entry
+        return self._register(name, path, stat)
+
+    def _register(self, name, path, stat):
+        with open(path, 'rb') as f:
+            body = f.read()
+        etag = hashlib.sha256(body).hexdigest()[:32]
+        # 압축본이 없거나 원본보다 오래되었으면 다시 생성
+        for encoding in ENCODINGS:
+            variant = self._path(name, encoding)
+            try:
+                stale = os.stat(variant).st_mtime_ns < stat.st_mtime_ns
+            except OSError:
+                stale = True
+            if stale:
+                _write_atomic(variant, _compress(encoding, body))
+        entry = self._entry(stat, etag)
+        with self._lock:
+            self._index[name] = entry
+        return entry
+
+    # 응답할 내용 선택: {"etag", "last_modified", "encoding", "body" 또는 "path"} (없으면 None)
+    # accepts: 클라이언트가 받는 Content-Encoding 집합
+    def open(self, name, accepts=()):
+        entry = self.lookup(name)
+        if entry is None:
+            with self._lock:
+                self.stats["not_found"] += 1
+            return None
+        encoding = next((enc for enc in ENCODINGS if enc in accepts), None)
+        etag = f'{entry["etag"]}-{encoding}' if encoding else entry["etag"]
+        result = {"etag": etag, "last_modified": entry["last_modified"], "encoding": encoding}
+
+        key = (name, entry["etag"])
+        with self._lock:
+            variants = self._hot.get(key)
+            if variants is not None and encoding in variants:
+                self._hot.move_to_end(key)
+                self.stats["hot_hits"] += 1
+                result["body"] = variants[encoding]
+                return result
+
+        path = self._path(name, encoding)
+        if entry["size"] > self.hot_max_file_bytes:
+            with self._lock:
+                self.stats["file_sends"] += 1
+            result["path"] = os.path.abspath(path)
+            return result
+
+        with open(path, 'rb') as f:
+            body = f.read()
+        with self._lock:
+            self.stats["disk_reads"] += 1
+            for stale in [k for k in self._hot if k[0] == name and k != key]:
+                del self._hot[stale]
+            self._hot.setdefault(key, {})[encoding] = body
+            self._hot.move_to_end(key)
+            while len(self._hot) > self.hot_entries:
+                self._hot.popitem(last=False)
+        result["body"] = body
+        return result
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats, indexed=len(self._index), hot_entries=len(self._hot))
+
+
+preview_store = PreviewStore()
@@ -0,0 +1,86 @@
+# 무거운 의존성 / 모델을 첫 요청 전에 백그라운드에서 미리 로드
+# import 시점에는 아무것도 로드하지 않고 (워커 부팅을 빠르게), 서버가 요청을 받기 시작한 뒤
+# PREWARM_ON_STARTUP=1 이면 첫 요청 시점에 한 번만 스레드를 시작
+# 각 단계는 실제 요청 경로와 같은 함수(get_model, get_paper_index ...)를 호출하므로 이후 요청은 로드된 것을 재사용
+import time
+import threading
+
+from students_ai_backend.config import config
+
+_status_lock = threading.Lock()
+_status = {"state": "idle", "steps": {}}
+_background = None
+
+
+def _load_numpy():
+    import numpy  # noqa: F401  (모듈 로드만 미리 해 둠)
+
+
+def _load_embedding_model():
+    from students_ai_backend.source_matcher import get_model
+    get_model()
+
+
+def _load_paper_index():
+    from students_ai_backend.paper_index import get_paper_index
+    get_paper_index()
+
+
+def _load_paper_store():
+    from students_ai_backend.paper_store import get_store
+    get_store()
+
+
+def _load_llm_client():
+    from students_ai_backend import http_client
+    http_client.get_openai_client(config.upstage_api_key, config.upstage_base_url)
+
+
+def _load_pdf_parsers():
+    import pypdf  # noqa: F401  (모듈 로드만 미리 해 둠)
+    import pdfminer.high_level  # noqa: F401  (모듈 로드만 미리 해 둠)
+
+
+PREWARM_STEPS = [
+    ("numpy", _load_numpy),
+    ("pdf_parsers", _load_pdf_parsers),
+    ("llm_client", _load_llm_client),
+    ("paper_store", _load_paper_store),
+    ("embedding_model", _load_embedding_model),
+    ("paper_index", _load_paper_index),
+]
+
+
+def prewarm_status():
+    with _status_lock:
+        return {"state": _status["state"], "steps": dict(_status["steps"])}
+
+
+# 단계별 소요 시간(초) 기록. 실패한 단계는 건너뛰고 (해당 기능은 첫 사용 시 다시 로드 시도) 다음 단계 진행
+def run_prewarm(steps=PREWARM_STEPS):
+    with _status_lock:
+        _status.update(state="running", steps={})
+    for name, load in steps:
+        start = time.perf_counter()
+        try:
+            load()
+            result = {"status": "loaded", "seconds": round(time.perf_counter() - start, 3)}
+        except Exception as e:
+            print(f"⚠️ 사전 로드 실패 ({name}):", e)
+            result = {"status": "failed", "error": str(e)}
+        with _status_lock:
+            _status["steps"][name] = result
+    with _status_lock:
+        _status["state"] = "finished"
+    print("🔥 사전 로드 완료:", prewarm_status()["steps"])
+    return prewarm_status()
+
+
+# 백그라운드 스레드에서 사전 로드 (한 번만 실행)
+def start_background():
+    global _background
+    with _status_lock:
+        if _background is not None:
+            return
+        _background = threading.Thread(target=run_prewarm, name="prewarm", daemon=True)
+    _background.start()
@@ -0,0 +1,223 @@
+# LLM 프롬프트 조립 (토큰 예산 관리)
+# - 토큰 수 측정 (tiktoken 이 있으면 사용, 없으면 문자 기반 추정)
+# - 들여쓰기 없는 compact JSON, 중복/빈 항목 제거
+# - 참조 논문은 메인 논문과의 관련도 순으로 예산을 나눠 섹션별로 고르게 잘라냄
+import re
+import json
+import math
+import hashlib
+from collections import Counter
+
+from students_ai_backend.config import env
+
+PROMPT_TOKEN_BUDGET = int(env("PROMPT_TOKEN_BUDGET", 12000))
+MAIN_PAPER_TOKEN_BUDGET = int(env("MAIN_PAPER_TOKEN_BUDGET", 4000))
+# 문자열 하나가 이보다 길면 잘라냄
+MAX_ITEM_TOKENS = 200
+
+_encoder = None
+_WORD = re.compile(r"[A-Za-z0-9]+|[^\sA-Za-z0-9]")
+
+
+def count_tokens(text):
+    global _encoder
+    if _encoder is None:
+        try:
+            import tiktoken
+            _encoder = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoder = False
+    if _encoder:
+        return len(_encoder.encode(text))
+    # 추정: 영문/숫자는 4글자당 1 토큰, 한글·기호 등 그 외 문자는 문자당 1 토큰
+    tokens = 0
+    for piece in _WORD.findall(text):
+        tokens += math.ceil(len(piece) / 4) if piece.isascii() and piece.isalnum() else 1
+    return tokens
+
+
+def compact_json(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def truncate_text(text, max_tokens=MAX_ITEM_TOKENS):
+    if count_tokens(text) <= max_tokens:
+        return text
+    # 단어 단위로 자르고, 공백 없는 긴 문자열이면 문자 단위로 자름
+    pieces, sep = text.split(), " "
+    if count_tokens(pieces[0]) > max_tokens:
+        pieces, sep = list(text), ""
+    lo, hi = 0, len(pieces)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if count_tokens(sep.join(pieces[:mid])) <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return sep.join(pieces[:lo]) + " …"
+
+
+# 리스트 안의 중복 문자열과 빈 필드 제거
+def dedupe(data):
+    result = {}
+    for key, value in data.items():
+        if isinstance(value, list):
+            value = list(dict.fromkeys(v.strip() if isinstance(v, str) else compact_json(v) for v in value))
+            value = [v for v in value if v]
+        if value in (None, "", [], {}):
+            continue
+        result[key] = value
+    return result
+
+
+# 각 필드에서 번갈아 한 항목씩 가져오며 예산 안에서 채움 (특정 섹션만 남는 것을 방지)
+def fit_to_budget(data, budget):
+    data = dedupe(data)
+    lists = {key: value for key, value in data.items() if isinstance(value, list)}
+    fitted = {key: value for key, value in data.items() if key not in lists}
+    used = count_tokens(compact_json(fitted))
+    if used >= budget:
+        return {}, 0, True
+    positions = {key: 0 for key in lists}
+    truncated = False
+    while positions:
+        for key in list(positions):
+            items = lists[key]
+            if positions[key] >= len(items):
+                del positions[key]
+                continue
+            item = truncate_text(items[positions[key]])
+            cost = count_tokens(compact_json(item)) + 1
+            if key not in fitted:
+                cost += count_tokens(compact_json(key)) + 2
+            if used + cost > budget:
+                truncated = True
+                positions.clear()
+                break
+            fitted.setdefault(key, []).append(item)
+            used += cost
+            positions[key] += 1
+    truncated = truncated or any(len(fitted.get(key, [])) < len(items) for key, items in lists.items())
+    return fitted, used, truncated
+
+
+def _bag_of_words(data):
+    return Counter(w.lower() for w in re.findall(r"[A-Za-z]{3,}|[가-힣]{2,}", compact_json(data)))
+
+
+# 단어 빈도 벡터의 코사인 유사도 (모델 없이 계산 가능한 관련도)
+def relevance(main_data, reference_data):
+    a, b = _bag_of_words(main_data), _bag_of_words(reference_data)
+    dot = sum(a[w] * b[w] for w in a.keys() & b.keys())
+    norm = math.sqrt(sum(v * v for v in a.values())) * math.sqrt(sum(v * v for v in b.values()))
+    return dot / norm if norm else 0.0
+
+
+# 메인 논문 + 참조 논문들을 예산 안에 맞춰 compact JSON 문자열로 반환
+# references: [{"reference_id": n, "content": {...}}, ...]
+def build_comparison_sections(main_data, references, template_tokens=0,
+                              budget=PROMPT_TOKEN_BUDGET, main_budget=MAIN_PAPER_TOKEN_BUDGET):
+    main_fitted, main_tokens, main_truncated = fit_to_budget(main_data, main_budget)
+    # 참조 논문 목록을 감싸는 {"reference_id":..,"content":..} 부분도 예산에서 제외
+    wrappers = count_tokens(compact_json([{"reference_id": ref["reference_id"], "content": {}} for ref in references]))
+    remaining = max(budget - template_tokens - main_tokens - wrappers, 0)
+
+    # 관련도가 높은 참조 논문일수록 더 많은 예산 (최소 비중 보장)
+    scores = [relevance(main_data, ref["content"]) for ref in references]
+    weights = [0.5 + score for score in scores]
+    total_weight = sum(weights) or 1.0
+    ranked = sorted(range(len(references)), key=lambda i: -scores[i])
+
+    fitted_refs = [None] * len(references)
+    usage_refs = [None] * len(references)
+    for i in ranked:
+        ref = references[i]
+        ref_budget = int(remaining * weights[i] / total_weight)
+        content, tokens, truncated = fit_to_budget(ref["content"], ref_budget)
+        fitted_refs[i] = {"reference_id": ref["reference_id"], "content": content}
+        usage_refs[i] = {
+            "reference_id": ref["reference_id"],
+            "relevance": round(scores[i], 4),
+            "budget": ref_budget,
+            "tokens": tokens,
+            "truncated": truncated
+        }
+
+    main_json = compact_json(main_fitted)
+    references_json = compact_json(fitted_refs)
+    usage = {
+        "budget": budget,
+        "template_tokens": template_tokens,
+        "main_tokens": main_tokens,
+        "main_truncated": main_truncated,
+        "references": usage_refs,
+        "total_tokens": template_tokens + count_tokens(main_json) + count_tokens(references_json)
+    }
+    return main_json, references_json, usage
+
+
+# 메인 논문 vs 참조 논문 비교 분석 프롬프트 (/universal-extraction)
+COMPARISON_PROMPT_TEMPLATE = """다음은 학술 논문과 참조 논문들의 분석 결과입니다:
+
+메인 논문:
+{main_paper}
+
+참조 논문들:
+{reference_papers}
+
+참조논문들은 이미 저널에 게제된 검증된 논문들입니다. 다른 소스는 참고하지 말고, 해당 논문들을 레퍼런스로 하여 메인 논문의 허점을 찾고 개선 방향을 찾아주세요.
+위 데이터를 바탕으로 다음 사항을 분석해주세요. 반드시 JSON 형식으로 응답해주세요:
+{{
+  "subsections_comments": [메인 논문의 각 섹션에 대한 참조 논문들에 비해 부족한 점이나 괜찮은 점 코멘트 배열],
+  "figures_comments": [메인 논문의 그림에 대한 참조 논문들에 비해 부족한 점이나 괜찮은 점 코멘트 배열],
+  "equations_comments": [메인 논문의 수식에 대한 참조 논문들에 비해 부족한 점이나 괜찮은 점 코멘트 배열],
+  "methods_comparison": [메인 논문의 방법들의 참신성을 기존의 논문들에 없던 새로운 내용들을 비교하며 코멘트 배열],
+  "metrics_comparison": [메인 논문과 참조 논문들의 평가 지표의 양이나 정확도 비교 코멘트 배열],
+  "academic_improvements": [메인 논문의 비학술적 표현 수정 제안 배열],
+  "key_differences": [메인 논문과 참조 논문들 간의 주요 차이점을 포함한 배열],
+  "accept_probability": [잘쓴 논문의 accept rate 기준이 50의 accept rate 가진다는 것을 토대로 계산, 일단 50에서 감점 방식으로 subsections_comments, figures_comments, equations_comments, methods_comparison, metrics_comparison, academic_improvements, key_differences 에서 마이너한(사소하더라도) critic 있을 때마다 4씩 감점, 메이저(내용과 관련된 심각한 결함) critic있으면 10씩 감점]
+  "accept_probability_metrics": [어떤 메이저한 크리틱과 어떤 마이너한 크리틱이있었는지 보여주면서 이유 설명해주기.]
+}}
+
+각 배열의 항목은 문자열이며, 영어로 작성해야 합니다. 다른 형식이나 추가 설명 없이 오직 위 JSON 형식으로만 응답해주세요. 
+"""
+
+# 비교 분석 응답에서 기대하는 키와 형식 (response_parser 검증용)
+COMPARISON_RESPONSE_TYPES = {
+    "subsections_comments": list,
+    "figures_comments": list,
+    "equations_comments": list,
+    "methods_comparison": list,
+    "metrics_comparison": list,
+    "academic_improvements": list,
+    "key_differences": list,
+    "accept_probability": (list, int, float, str),
+    "accept_probability_metrics": (list, str),
+}
+# 없으면 분석 결과로 쓸 수 없는 핵심 키 (나머지 목록 키는 빠지면 빈 목록으로 채움)
+COMPARISON_REQUIRED_KEYS = ("key_differences", "accept_probability")
+
+# 템플릿이 바뀌면 비교 분석 결과 캐시가 자동으로 무효화되도록 템플릿 내용으로 버전을 정함
+COMPARISON_PROMPT_VERSION = hashlib.sha256(COMPARISON_PROMPT_TEMPLATE.encode('utf-8')).hexdigest()[:12]
+
+
+def build_comparison_prompt(main_data, references, budget=PROMPT_TOKEN_BUDGET):
+    template_tokens = count_tokens(COMPARISON_PROMPT_TEMPLATE)
+    main_json, references_json, usage = build_comparison_sections(
+        main_data, references, template_tokens=template_tokens, budget=budget
+    )
+    prompt = COMPARISON_PROMPT_TEMPLATE.format(main_paper=main_json, reference_papers=references_json)
+    return prompt, usage
+
+
+# {id: 문장} 형태의 후보 목록을 예산 안에서 앞에서부터 채움 (run_perplexity 보조 매칭용)
+def fit_mapping(mapping, budget):
+    fitted, used = {}, 2
+    for key, text in mapping.items():
+        text = truncate_text(text)
+        cost = count_tokens(compact_json({key: text}))
+        if used + cost > budget:
+            break
+        fitted[key] = text
+        used += cost
+    return fitted, used
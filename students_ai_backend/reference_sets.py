@@ -0,0 +1,65 @@
+# 추천 결과로 만들어진 세션별 참조 논문 집합
+# /recommend 가 paper_id 목록을 저장하고 토큰을 반환하면, /universal-extraction 이 그 토큰으로
+# papers/ 의 파일을 직접 참조 (공유 디렉토리로 복사하지 않음)
+import os
+import re
+import json
+import time
+import uuid
+import threading
+
+from students_ai_backend.config import config, env
+
+REFERENCE_SET_DIR = env("REFERENCE_SET_DIR", os.path.join("data", "reference_sets"))
+REFERENCE_SET_TTL_SECONDS = float(env("REFERENCE_SET_TTL_SECONDS", 24 * 3600))
+PAPER_DIR = config.paper_dir
+
+TOKEN_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+def _path(token):
+    return os.path.join(REFERENCE_SET_DIR, f'{token}.json')
+
+
+def paper_path(paper_id):
+    return os.path.join(PAPER_DIR, f"{int(paper_id)}.pdf")
+
+
+def create(paper_ids):
+    os.makedirs(REFERENCE_SET_DIR, exist_ok=True)
+    token = uuid.uuid4().hex
+    tmp_path = f'{_path(token)}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"paper_ids": [int(pid) for pid in paper_ids], "created_at": time.time()}, f)
+    os.replace(tmp_path, _path(token))
+    cleanup()
+    return token
+
+
+# 토큰이 없거나 만료되었으면 None
+def get(token):
+    if not TOKEN_PATTERN.match(token or ''):
+        return None
+    try:
+        with open(_path(token), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if time.time() - data["created_at"] > REFERENCE_SET_TTL_SECONDS:
+        return None
+    return data["paper_ids"]
+
+
+def resolve_paths(paper_ids):
+    return [path for path in (paper_path(pid) for pid in paper_ids) if os.path.exists(path)]
+
+
+def cleanup():
+    now = time.time()
+    for fname in os.listdir(REFERENCE_SET_DIR):
+        path = os.path.join(REFERENCE_SET_DIR, fname)
+        try:
+            if now - os.path.getmtime(path) > REFERENCE_SET_TTL_SECONDS:
+                os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,200 @@
+# LLM 응답에서 JSON 을 관대하게 추출/복구/검증
+# - 코드 블록(```json)이나 앞뒤 설명 문장과 무관하게 처음 나오는 균형 잡힌 JSON 객체를 찾음
+# - 흔한 결함 복구: 끝에 붙은 쉼표, 작은따옴표 문자열, True/False/None, 문자열 안의 줄바꿈, 중간에 잘린 응답
+# - 기대하는 키/타입 검증, 그래도 실패하면 (선택적으로) 깨진 JSON 만 고쳐 달라는 짧은 재요청
+import json
+import threading
+
+REPAIR_PROMPT_MAX_CHARS = 20000
+
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_CLOSERS = {"{": "}", "[": "]"}
+
+_stats_lock = threading.Lock()
+stats = {"parsed": 0, "repaired": 0, "reprompted": 0, "failed": 0}
+
+
+class ResponseParseError(ValueError):
+    pass
+
+
+def _count(name):
+    with _stats_lock:
+        stats[name] += 1
+
+
+# 처음 나오는 JSON 시작 괄호부터 균형이 맞는 곳까지 잘라 (텍스트, 완결 여부) 반환
+def extract_json_text(text, expect=dict):
+    opener = "{" if expect is dict else "["
+    start = text.find(opener)
+    if start == -1:
+        return None, False
+    depth = 0
+    quote = None
+    escape = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if quote:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == quote:
+                quote = None
+        elif ch in "\"'":
+            quote = ch
+        elif ch in "{[":
+            depth += 1
+        elif ch in "}]":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1], True
+    return text[start:], False
+
+
+# 문자열/리터럴/쉼표를 JSON 규칙에 맞게 정규화
+# (정규화된 텍스트, 열린 괄호 목록, 문자열이 열린 채 끝났는지, 잘라낼 수 있는 쉼표 위치 목록) 반환
+def _normalize(text):
+    out = []
+    stack = []
+    cuts = []
+    quote = None
+    escape = False
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if quote:
+            if escape:
+                escape = False
+                if quote == "'" and ch == "'":
+                    out[-1] = "'"
+                else:
+                    out.append(ch)
+            elif ch == "\\":
+                escape = True
+                out.append(ch)
+            elif ch == quote:
+                quote = None
+                out.append('"')
+            elif quote == "'" and ch == '"':
+                out.append('\\"')
+            else:
+                out.append(ch)
+        elif ch in "\"'":
+            quote = ch
+            out.append('"')
+        elif ch in "{[":
+            stack.append(ch)
+            out.append(ch)
+        elif ch in "}]":
+            _strip_trailing_comma(out)
+            if stack:
+                stack.pop()
+            out.append(ch)
+        elif ch == ",":
+            cuts.append((len(out), tuple(stack)))
+            out.append(ch)
+        elif ch.isalpha():
+            j = i
+            while j < len(text) and text[j].isalpha():
+                j += 1
+            word = text[i:j]
+            out.append(_PY_LITERALS.get(word, word))
+            i = j
+            continue
+        else:
+            out.append(ch)
+        i += 1
+    return out, stack, quote is not None, cuts
+
+
+def _strip_trailing_comma(out):
+    while out and out[-1].isspace():
+        out.pop()
+    if out and out[-1] == ",":
+        out.pop()
+
+
+def _close(out, stack):
+    out = list(out)
+    _strip_trailing_comma(out)
+    if out and out[-1] == ":":
+        # 값 없이 끝난 키는 null 로 채움
+        out.append("null")
+    return "".join(out) + "".join(_CLOSERS[ch] for ch in reversed(stack))
+
+
+# 결함이 있는 JSON 텍스트를 고쳐서 파싱. 잘린 응답은 마지막으로 완성된 항목까지만 살림
+def repair_json(text):
+    out, stack, open_string, cuts = _normalize(text)
+    if open_string:
+        out.append('"')
+    try:
+        return json.loads(_close(out, stack), strict=False)
+    except ValueError:
+        pass
+    for position, cut_stack in reversed(cuts):
+        try:
+            return json.loads(_close(out[:position], cut_stack), strict=False)
+        except ValueError:
+            continue
+    raise ResponseParseError("JSON 을 복구할 수 없습니다")
+
+
+# types: {키: 타입 또는 타입 튜플} (있으면 타입 확인), required: 반드시 있어야 하는 키
+def validate(data, types=None, required=(), expect=dict):
+    if not isinstance(data, expect):
+        raise ResponseParseError(f"{expect.__name__} 형식이 아닙니다: {type(data).__name__}")
+    if expect is not dict:
+        return data
+    missing = [key for key in required if key not in data]
+    if missing:
+        raise ResponseParseError(f"필수 키 누락: {', '.join(missing)}")
+    for key, expected in (types or {}).items():
+        if key in data and data[key] is not None and not isinstance(data[key], expected):
+            raise ResponseParseError(f"{key} 의 형식이 올바르지 않습니다: {type(data[key]).__name__}")
+    return data
+
+
+def parse_json(text, types=None, required=(), expect=dict):
+    candidate, complete = extract_json_text(text or "", expect)
+    if candidate is None:
+        raise ResponseParseError("응답에서 JSON 을 찾을 수 없습니다")
+    try:
+        data = json.loads(candidate, strict=False)
+    except ValueError:
+        data = repair_json(candidate)
+        _count("repaired")
+    return validate(data, types, required, expect)
+
+
+# 깨진 응답만 다시 보내 형식만 고쳐 달라는 짧은 프롬프트 (원래의 분석 프롬프트는 다시 보내지 않음)
+def repair_prompt(text, error, required=()):
+    keys = f"\n반드시 다음 키를 포함해야 합니다: {', '.join(required)}" if required else ""
+    return (
+        "다음 텍스트는 JSON 응답이어야 하지만 형식 오류가 있습니다.\n"
+        f"오류: {error}{keys}\n"
+        "내용은 바꾸지 말고 유효한 JSON 으로만 고쳐서, 다른 설명 없이 JSON 만 출력하세요.\n\n"
+        f"{text[:REPAIR_PROMPT_MAX_CHARS]}"
+    )
+
+
+# LLM 응답 파싱. 실패하고 reprompt(프롬프트 → 응답 텍스트)가 주어지면 한 번만 복구 요청
+def parse_llm_json(text, types=None, required=(), expect=dict, reprompt=None):
+    try:
+        data = parse_json(text, types, required, expect)
+        _count("parsed")
+        return data
+    except ResponseParseError as e:
+        if reprompt is None:
+            _count("failed")
+            raise
+        print("⚠️ LLM 응답 파싱 실패, 형식 복구 요청:", e)
+        _count("reprompted")
+        try:
+            data = parse_json(reprompt(repair_prompt(text, e, required)), types, required, expect)
+        except ResponseParseError:
+            _count("failed")
+            raise
+        _count("parsed")
+        return data
@@ -0,0 +1,86 @@
+# 로컬 임베딩 기반 코멘트 → 원문 요소 매칭
+# 문서의 모든 요소 임베딩(element_index 에 저장)을 기준으로,
+# 코멘트들을 배치로 임베딩한 뒤 코사인 유사도(정규화 벡터의 내적)로 top-k 요소를 찾음
+import threading
+
+from students_ai_backend.config import env
+
+EMBEDDING_MODEL_NAME = env("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
+EMBEDDING_BATCH_SIZE = int(env("EMBEDDING_BATCH_SIZE", 64))
+MATCH_TOP_K = int(env("MATCH_TOP_K", 3))
+# 이 점수 미만인 매칭은 신뢰도가 낮다고 보고 LLM 보조 매칭 대상으로 분류
+MATCH_MIN_SCORE = float(env("MATCH_MIN_SCORE", 0.35))
+
+_model = None
+_model_lock = threading.Lock()
+
+
+# sentence-transformers 모델은 첫 사용 시 한 번만 로드
+def get_model():
+    global _model
+    with _model_lock:
+        if _model is None:
+            from sentence_transformers import SentenceTransformer
+            _model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+        return _model
+
+
+# 텍스트 리스트 → L2 정규화된 float32 행렬 (n, dim)
+def embed_texts(texts):
+    import numpy as np
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    vectors = get_model().encode(
+        list(texts),
+        batch_size=EMBEDDING_BATCH_SIZE,
+        normalize_embeddings=True,
+        convert_to_numpy=True,
+        show_progress_bar=False
+    )
+    return np.asarray(vectors, dtype=np.float32)
+
+
+# 유사도 행렬에서 행마다 점수가 높은 k 개 열 인덱스를 내림차순으로 반환
+def top_k_indices(scores, k):
+    import numpy as np
+    k = min(k, scores.shape[1])
+    candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, candidates, axis=1), axis=1)
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+# 코멘트별 top-k 후보 요소 (id, score, page, coordinates) 리스트 반환
+def match_comments(comments, element_ids, element_vectors, id_to_coord, top_k=MATCH_TOP_K):
+    if not comments or len(element_ids) == 0:
+        return {comment: [] for comment in comments}
+    comment_vectors = embed_texts(comments)
+    scores = comment_vectors @ element_vectors.T
+    best = top_k_indices(scores, top_k)
+
+    matches = {}
+    for row, comment in enumerate(comments):
+        candidates = []
+        for col in best[row]:
+            eid = element_ids[col]
+            coord = id_to_coord.get(eid, {})
+            candidates.append({
+                "id": eid,
+                "score": float(scores[row, col]),
+                "page": coord.get("page"),
+                "coordinates": coord.get("coordinates", [])
+            })
+        matches[comment] = candidates
+    return matches
+
+
+# summary_list(원본 요약 + 분석 코멘트)에서 매칭할 문장들만 평탄화
+def collect_comments(summary_list):
+    comments = []
+    sections = [summary_list.get("original_data", {}), summary_list.get("analysis", {})]
+    for section in sections:
+        if not isinstance(section, dict):
+            continue
+        for values in section.values():
+            if isinstance(values, list):
+                comments.extend(v for v in values if isinstance(v, str) and v.strip())
+    return list(dict.fromkeys(comments))
@@ -0,0 +1,79 @@
+# condition_parser 규칙 기반 조건 추출 테스트
+# 실행: python -m pytest students_ai_backend/tests (저장소 루트에서)
+import pytest
+
+from students_ai_backend.condition_parser import parse_conditions, coerce_conditions, ConditionResolver
+
+CATALOG_VENUES = ["IEEE Access", "Access", "Neurocomputing"]
+
+
+# 일반 단어와 겹치는 학회 이름은 학회 조건이 되지 않아야 함
+@pytest.mark.parametrize("prompt", [
+    "computer science papers",
+    "nature-inspired optimization",
+    "chi-square test papers",
+    "transformers in www",
+    "access control papers",
+    "tip of the tongue retrieval",
+])
+def test_common_words_are_not_venues(prompt):
+    conditions = parse_conditions(prompt, CATALOG_VENUES)
+    assert conditions is not None
+    assert "journal_name" not in conditions
+
+
+@pytest.mark.parametrize("prompt, venue", [
+    ("CVPR papers after 2015", "CVPR"),
+    ("cvpr papers after 2015", "CVPR"),
+    ("2018년 이후 NeurIPS 논문 추천해줘", "NeurIPS"),
+    ("papers in Nature about protein folding", "Nature"),
+    ("papers published in Science since 2020", "Science"),
+    ("transformers in WWW", "WWW"),
+    ("papers from CHI about accessibility", "CHI"),
+    ("IEEE Access papers on wireless", "IEEE Access"),
+])
+def test_venues(prompt, venue):
+    assert parse_conditions(prompt, CATALOG_VENUES)["journal_name"] == venue
+
+
+# 문맥 없이 대문자로 쓴 애매한 이름은 LLM 에 맡김
+@pytest.mark.parametrize("prompt", ["Nature papers on climate", "Access control papers in Korea"])
+def test_ambiguous_venue_without_context_falls_back(prompt):
+    assert parse_conditions(prompt, CATALOG_VENUES) is None
+
+
+def test_years_and_citations():
+    assert parse_conditions("papers about image classification with more than 1000 citations") == {
+        "min_citation": 1000, "keywords": ["image classification"]
+    }
+    assert parse_conditions("ICML papers between 2015 and 2018") == {
+        "min_year": 2015, "max_year": 2018, "journal_name": "ICML"
+    }
+
+
+def test_resolver_uses_llm_only_when_rules_fail():
+    calls = []
+    resolver = ConditionResolver(lambda prompt: calls.append(prompt) or {"keywords": ["climate"]},
+                                 venues_loader=lambda: CATALOG_VENUES)
+    assert resolver.resolve("computer science papers") == {"keywords": ["computer science"]}
+    assert resolver.resolve("Nature papers on climate") == {"keywords": ["climate"]}
+    assert resolver.resolve(" Nature  papers on climate") == {"keywords": ["climate"]}
+    assert calls == ["Nature papers on climate"]
+    assert resolver.stats == {"cache_hits": 1, "local": 1, "llm_fallback": 1}
+
+
+# LLM 이 문자열로 준 숫자 조건은 숫자로 바꾸고, 읽을 수 없는 값은 버림
+def test_llm_conditions_are_coerced():
+    assert coerce_conditions({
+        "min_year": "2020년", "max_year": 2023.0, "min_citation": "500+",
+        "journal_name": " CVPR ", "keywords": "vision",
+    }) == {"min_year": 2020, "max_year": 2023, "min_citation": 500, "journal_name": "CVPR", "keywords": ["vision"]}
+    assert coerce_conditions({"min_citation": "1.5k", "min_year": "recent", "max_year": True, "keywords": [1, ""]}) == {
+        "min_citation": 1500
+    }
+
+
+def test_resolver_coerces_llm_answer():
+    resolver = ConditionResolver(lambda prompt: {"min_citation": "many", "min_year": "2019년"},
+                                 venues_loader=lambda: CATALOG_VENUES)
+    assert resolver.resolve("Nature papers on climate") == {"min_year": 2019}
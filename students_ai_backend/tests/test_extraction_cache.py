@@ -0,0 +1,45 @@
+# extraction_cache LRU / 프로세스 간 공유 테스트
+# 실행: python -m pytest students_ai_backend/tests (저장소 루트에서)
+import os
+
+from students_ai_backend import extraction_cache
+from students_ai_backend.extraction_cache import ExtractionCache
+
+ENTRY = "x" * 20            # JSON 으로 22 바이트
+ENTRY_BYTES = 22
+
+
+def _keys(cache_dir):
+    return sorted(name[:-len(".json")] for name in os.listdir(cache_dir))
+
+
+# hot tier 에서만 히트한 항목도 최근 사용으로 보고 남겨야 함
+def test_hot_hits_keep_entry_from_eviction(tmp_path):
+    cache = ExtractionCache(cache_dir=str(tmp_path), max_bytes=3 * ENTRY_BYTES, hot_entries=8)
+    for key in "abc":
+        cache.put(key, ENTRY)
+    for _ in range(5):
+        assert cache.get("a") == ENTRY
+    cache.put("d", ENTRY)
+    assert _keys(tmp_path) == ["a", "c", "d"]
+    assert cache.stats["evictions"] == 1
+
+
+def test_adopts_entries_written_by_another_process(tmp_path):
+    writer = ExtractionCache(cache_dir=str(tmp_path))
+    reader = ExtractionCache(cache_dir=str(tmp_path))
+    writer.put("k", {"v": 1})
+    assert reader.contains("k")
+    assert reader.get("k") == {"v": 1}
+    assert reader.stats["disk_hits"] == 1
+
+
+# 다시 읽는 간격이 지나면 다른 프로세스가 쓴 항목까지 합쳐서 용량 제한
+def test_budget_covers_whole_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr(extraction_cache, "EXTRACTION_CACHE_RESCAN_SECONDS", 0)
+    first = ExtractionCache(cache_dir=str(tmp_path), max_bytes=2 * ENTRY_BYTES)
+    second = ExtractionCache(cache_dir=str(tmp_path), max_bytes=2 * ENTRY_BYTES)
+    first.put("a", ENTRY)
+    first.put("b", ENTRY)
+    second.put("c", ENTRY)
+    assert _keys(tmp_path) == ["b", "c"]
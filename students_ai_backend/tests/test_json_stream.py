@@ -0,0 +1,75 @@
+# json_stream.IncrementalJSONParser (스트리밍 응답 점진 파싱) 테스트
+# 실행: python -m pytest students_ai_backend/tests (저장소 루트에서)
+import json
+
+import pytest
+
+from students_ai_backend.json_stream import IncrementalJSONParser
+
+RESPONSE = {
+    "subsections_comments": ["First, with a comma", "Second \"quoted\" ]", "Third {braces}"],
+    "figures_comments": [],
+    "nested": [{"a": [1, 2]}, {"b": "x"}],
+    "accept_probability": 42,
+    "accept_probability_metrics": "minor: 2, major: 0",
+}
+
+EXPECTED_EVENTS = [
+    ("item", "subsections_comments", "First, with a comma"),
+    ("item", "subsections_comments", "Second \"quoted\" ]"),
+    ("item", "subsections_comments", "Third {braces}"),
+    ("field", "subsections_comments", RESPONSE["subsections_comments"]),
+    ("field", "figures_comments", []),
+    ("item", "nested", {"a": [1, 2]}),
+    ("item", "nested", {"b": "x"}),
+    ("field", "nested", RESPONSE["nested"]),
+    ("field", "accept_probability", 42),
+    ("field", "accept_probability_metrics", "minor: 2, major: 0"),
+]
+
+
+def _feed_all(text, size):
+    parser = IncrementalJSONParser()
+    events = []
+    for start in range(0, len(text), size):
+        events.extend(parser.feed(text[start:start + size]))
+    events.extend(parser.close())
+    return parser, events
+
+
+# 청크가 문자열/이스케이프/괄호 중간에서 잘려도 같은 이벤트가 같은 순서로 나와야 함
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 10000])
+def test_chunk_split_feeds(size):
+    text = "```json\n" + json.dumps(RESPONSE, ensure_ascii=False, indent=2) + "\n```"
+    parser, events = _feed_all(text, size)
+    assert events == EXPECTED_EVENTS
+    assert parser.done
+
+
+def test_prose_before_and_after_object_is_ignored():
+    text = 'Here you go: {"a": [1], "b": true} and some {"trailing": "object"}'
+    parser, events = _feed_all(text, 5)
+    assert events == [("item", "a", 1), ("field", "a", [1]), ("field", "b", True)]
+    assert parser.done
+
+
+def test_escaped_quote_split_across_chunks():
+    parser = IncrementalJSONParser()
+    events = parser.feed('{"a": ["x \\')
+    events += parser.feed('" y"]}')
+    assert events == [("item", "a", 'x " y'), ("field", "a", ['x " y'])]
+
+
+def test_close_flushes_unterminated_scalar():
+    parser = IncrementalJSONParser()
+    events = parser.feed('{"a": [1, 2], "b": 42')
+    assert events == [("item", "a", 1), ("item", "a", 2), ("field", "a", [1, 2])]
+    assert parser.close() == [("field", "b", 42)]
+    assert not parser.done
+
+
+def test_truncated_array_keeps_completed_items():
+    parser = IncrementalJSONParser()
+    events = parser.feed('{"a": ["one", "two", "thr')
+    events += parser.close()
+    assert events == [("item", "a", "one"), ("item", "a", "two")]
@@ -0,0 +1,95 @@
+# response_parser (LLM JSON 추출/복구/검증) 테스트
+# 실행: python -m pytest students_ai_backend/tests (저장소 루트에서)
+import pytest
+
+from students_ai_backend.response_parser import (
+    ResponseParseError, extract_json_text, parse_json, parse_llm_json, repair_json,
+)
+
+
+@pytest.mark.parametrize("text", [
+    '```json\n{"a": [1, 2], "b": "x"}\n```',
+    'Here is the result:\n{"a": [1, 2], "b": "x"}\nLet me know if you need more.',
+    'Sure! ```\n{"a": [1, 2], "b": "x"}\n``` Hope this helps {not json}',
+])
+def test_fences_and_prose_are_ignored(text):
+    assert parse_json(text) == {"a": [1, 2], "b": "x"}
+
+
+def test_braces_inside_strings_do_not_end_the_object():
+    text = 'prefix {"a": "} not the end {", "b": \'x } y\'} suffix }'
+    assert extract_json_text(text) == ('{"a": "} not the end {", "b": \'x } y\'}', True)
+    assert parse_json(text) == {"a": "} not the end {", "b": "x } y"}
+
+
+def test_list_expectation():
+    assert parse_json('ids: [3, 1, 2] done', expect=list) == [3, 1, 2]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": [1, 2,], "b": {"c": 1,},}', {"a": [1, 2], "b": {"c": 1}}),
+    ('{"a": [1, 2 , ] , }', {"a": [1, 2]}),
+])
+def test_trailing_commas(text, expected):
+    assert parse_json(text) == expected
+
+
+def test_single_quotes_and_python_literals():
+    text = "{'name': 'it\\'s \"quoted\"', 'ok': True, 'missing': None, 'off': False}"
+    assert parse_json(text) == {"name": 'it\'s "quoted"', "ok": True, "missing": None, "off": False}
+
+
+def test_literal_like_words_inside_strings_are_kept():
+    assert parse_json('{"a": "True story None"}') == {"a": "True story None"}
+
+
+def test_newlines_inside_strings():
+    assert parse_json('{"a": "line 1\nline 2"}') == {"a": "line 1\nline 2"}
+
+
+@pytest.mark.parametrize("text, expected", [
+    # 문자열 중간에서 잘림: 열린 문자열을 닫고 괄호를 채움
+    ('{"a": ["one", "tw', {"a": ["one", "tw"]}),
+    # 키 뒤에서 잘림: 값은 null
+    ('{"a": [1, 2], "b":', {"a": [1, 2], "b": None}),
+    # 항목 구분 쉼표 뒤에서 잘림
+    ('{"a": [1, 2], "b": [3,', {"a": [1, 2], "b": [3]}),
+])
+def test_truncated_responses(text, expected):
+    assert repair_json(text) == expected
+    assert parse_json(text) == expected
+
+
+def test_truncated_inside_key_keeps_completed_items():
+    assert parse_json('```json\n{"a": [1, 2], "b": [3], "unfinished_ke') == {"a": [1, 2], "b": [3]}
+
+
+def test_required_keys_and_types():
+    with pytest.raises(ResponseParseError, match="필수 키 누락: b"):
+        parse_json('{"a": 1}', required=("a", "b"))
+    with pytest.raises(ResponseParseError, match="형식"):
+        parse_json('{"a": "x"}', types={"a": list})
+    assert parse_json('{"a": null}', types={"a": list}) == {"a": None}
+
+
+def test_no_json_raises():
+    with pytest.raises(ResponseParseError):
+        parse_json("I could not find anything.")
+
+
+def test_reprompt_only_on_failure():
+    prompts = []
+
+    def reprompt(prompt):
+        prompts.append(prompt)
+        return '{"a": [1], "b": 2}'
+
+    assert parse_llm_json('{"a": [1], "b": 2}', required=("a", "b"), reprompt=reprompt) == {"a": [1], "b": 2}
+    assert prompts == []
+    assert parse_llm_json('{"a": [1]}', required=("a", "b"), reprompt=reprompt) == {"a": [1], "b": 2}
+    assert len(prompts) == 1 and "b" in prompts[0] and '{"a": [1]}' in prompts[0]
+
+
+def test_failed_reprompt_raises():
+    with pytest.raises(ResponseParseError):
+        parse_llm_json("no json", reprompt=lambda prompt: "still no json")
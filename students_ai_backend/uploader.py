@@ -1,42 +1,81 @@
-import pandas as pd
-import pymysql
-
-# 엑셀 파일을 pandas로 읽기
-file_path = 'papers/paper_inf.xlsx'
-df = pd.read_excel(file_path)
-
-# MySQL 데이터베이스 연결
-conn = pymysql.connect(
-    host='localhost',
-    user='root',
-    password='1234',
-    database='papers'
-)
-
-cursor = conn.cursor()
-
-# 데이터 삽입
-for i, row in df.iterrows():
-    # paper_id를 기반으로 파일 경로 설정 (예: '1.pdf', '2.pdf' 형태)
-    file_path = f"{row['paper_id']}.pdf"
-
-    # 각 행의 데이터를 MySQL 테이블에 삽입
-    insert_query = """INSERT INTO papers (paper_id, title, publications, date, h5, citations, keyword, index_term, file_path) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)"""
-    cursor.execute(insert_query, (
-        row['paper_id'],
-        row['Paper_Title'],
-        row['Publications'],
-        row['Date'],
-        row['h5'],
-        row['Citations'],
-        row['Keyword'],
-        row['Index_Term'],
-        file_path  # 'paper_id.pdf' 형식으로 저장
-    ))
-
-# 커밋 및 연결 종료
-conn.commit()
-cursor.close()
-conn.close()
-
-print("엑셀 데이터가 MySQL 데이터베이스에 삽입되었습니다.")
+# papers/paper_inf.xlsx → papers 테이블 증분 적재
+# - openpyxl read-only 모드로 행 단위 스트리밍
+# - 행 내용 해시를 paper_ingest_state 에 저장하여 재실행 시 변경된 행만 upsert
+# - executemany 로 batch 단위 upsert
+# - paper_id 마다 papers/{paper_id}.pdf 가 있는지 확인
+# 사용법: python -m students_ai_backend.uploader [--catalog 경로] [--batch-size N] [--require-pdf] [--dry-run]
+import os
+import json
+import hashlib
+import argparse
+
+from students_ai_backend.config import config
+from students_ai_backend.paper_index import iter_catalog, PAPER_CATALOG_PATH
+from students_ai_backend.paper_store import get_store, COLUMNS
+
+PAPER_DIR = config.paper_dir
+INGEST_BATCH_SIZE = 500
+
+
+def row_hash(row):
+    canonical = json.dumps([row.get(column) for column in COLUMNS], ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def ingest(catalog_path=PAPER_CATALOG_PATH, batch_size=INGEST_BATCH_SIZE, require_pdf=False, dry_run=False):
+    store = get_store()
+    store.init_schema()
+    known = {
+        str(row["paper_id"]): row["row_hash"]
+        for row in store.execute("SELECT paper_id, row_hash FROM paper_ingest_state")
+    }
+    paper_sql = store.upsert_sql("papers", COLUMNS, "paper_id")
+    state_sql = store.upsert_sql("paper_ingest_state", ["paper_id", "row_hash"], "paper_id")
+
+    stats = {"rows": 0, "changed": 0, "unchanged": 0, "missing_pdf": 0, "skipped": 0}
+    papers_batch, state_batch = [], []
+
+    def flush():
+        if papers_batch and not dry_run:
+            store.executemany(paper_sql, papers_batch)
+            store.executemany(state_sql, state_batch)
+        papers_batch.clear()
+        state_batch.clear()
+
+    for row in iter_catalog(catalog_path):
+        stats["rows"] += 1
+        paper_id = int(row["paper_id"])
+        # paper_id 를 기반으로 파일 경로 설정 (예: '1.pdf', '2.pdf' 형태)
+        row["paper_id"] = paper_id
+        row["file_path"] = f"{paper_id}.pdf"
+
+        if not os.path.exists(os.path.join(PAPER_DIR, row["file_path"])):
+            stats["missing_pdf"] += 1
+            print(f"⚠️ PDF 파일 없음: paper_id={paper_id}")
+            if require_pdf:
+                stats["skipped"] += 1
+                continue
+
+        digest = row_hash(row)
+        if known.get(str(paper_id)) == digest:
+            stats["unchanged"] += 1
+            continue
+        stats["changed"] += 1
+        papers_batch.append(tuple(row.get(column) for column in COLUMNS))
+        state_batch.append((paper_id, digest))
+        if len(papers_batch) >= batch_size:
+            flush()
+    flush()
+    return stats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="paper_inf.xlsx 를 papers 테이블에 증분 적재")
+    parser.add_argument("--catalog", default=PAPER_CATALOG_PATH)
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE)
+    parser.add_argument("--require-pdf", action="store_true", help="PDF 가 없는 행은 적재하지 않음")
+    parser.add_argument("--dry-run", action="store_true", help="변경 사항만 집계하고 DB 에 쓰지 않음")
+    args = parser.parse_args()
+
+    result = ingest(args.catalog, args.batch_size, args.require_pdf, args.dry_run)
+    print(f"엑셀 데이터 적재 완료: {result}")
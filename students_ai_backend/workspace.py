@@ -0,0 +1,84 @@
+# 문서별 작업 공간 (data/docs/<doc_id>/)
+# text_to_id / id_to_coord / summary_list / summary_to_coords 를 문서 해시별로 분리 저장하여
+# 여러 사용자가 동시에 요청해도 서로의 결과를 덮어쓰지 않도록 함
+import os
+import re
+import json
+import time
+import shutil
+import threading
+
+from students_ai_backend.config import env
+from students_ai_backend.extraction_cache import file_sha256
+
+WORKSPACE_ROOT = env("WORKSPACE_ROOT", os.path.join("data", "docs"))
+WORKSPACE_MAX_DOCS = int(env("WORKSPACE_MAX_DOCS", 200))
+WORKSPACE_MAX_AGE_SECONDS = float(env("WORKSPACE_MAX_AGE_SECONDS", 7 * 24 * 3600))
+
+TEXT_TO_ID = "text_to_id.json"              # 원문 문장 → ID
+ID_TO_COORD = "id_to_coord.json"            # ID → 좌표 정보
+SUMMARY_LIST = "summary_list.json"          # 요약 문장 리스트
+SUMMARY_TO_COORDS = "summary_to_coords.json"  # 결과 저장 위치
+
+DOC_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+_evict_lock = threading.Lock()
+
+
+class InvalidDocumentId(ValueError):
+    pass
+
+
+# 문서 ID = PDF 내용의 SHA-256 앞 32자리
+def document_id(pdf_path):
+    return file_sha256(pdf_path)[:32]
+
+
+def workspace_dir(doc_id):
+    if not DOC_ID_PATTERN.match(doc_id or ''):
+        raise InvalidDocumentId(f"잘못된 문서 ID 입니다: {doc_id}")
+    return os.path.join(WORKSPACE_ROOT, doc_id)
+
+
+def artifact_path(doc_id, name):
+    return os.path.join(workspace_dir(doc_id), name)
+
+
+def exists(doc_id, name):
+    return os.path.exists(artifact_path(doc_id, name))
+
+
+# 임시 파일에 쓴 뒤 os.replace 로 교체 (읽는 쪽이 반쯤 쓰인 파일을 보지 않도록)
+def write_json(doc_id, name, data):
+    directory = workspace_dir(doc_id)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, name)
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    os.utime(directory)
+    evict()
+    return path
+
+
+def read_json(doc_id, name):
+    with open(artifact_path(doc_id, name), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# 보존 정책: 오래된 작업 공간 삭제 + 최대 문서 수 초과 시 가장 오래 사용하지 않은 것부터 삭제
+def evict(max_docs=WORKSPACE_MAX_DOCS, max_age=WORKSPACE_MAX_AGE_SECONDS):
+    if not os.path.isdir(WORKSPACE_ROOT):
+        return
+    with _evict_lock:
+        now = time.time()
+        entries = []
+        for name in os.listdir(WORKSPACE_ROOT):
+            path = os.path.join(WORKSPACE_ROOT, name)
+            if DOC_ID_PATTERN.match(name) and os.path.isdir(path):
+                entries.append((os.path.getmtime(path), path))
+        entries.sort(reverse=True)
+        for i, (mtime, path) in enumerate(entries):
+            if i >= max_docs or now - mtime > max_age:
+                shutil.rmtree(path, ignore_errors=True)